@@ -68,7 +68,7 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
   const [loadingStatus, setLoadingStatus] = useState<string>("");
   const currentThinkingSteps = useRef<ThinkingStep[]>([]);
   const thinkingStartTime = useRef<number>(0);
-  const [contextChunks, setContextChunks] = useState<any[]>([]);  // 🔥 누적 컨텍스트 저장
+  const [sessionId, setSessionId] = useState<string | null>(null);  // 🔥 서버 측 대화 컨텍스트 세션 ID
   const [hoveredUserMessage, setHoveredUserMessage] = useState<number | null>(null);
   const [copiedUserMessage, setCopiedUserMessage] = useState<number | null>(null);
   const userScrolledUp = useRef(false); // 사용자가 스크롤을 위로 올렸는지 추적
@@ -244,7 +244,7 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
             setMessages(typedMessages);
             setCurrentConversationId(conversationId);
             setIsFavorite(conversation.isFavorite || false);
-            setContextChunks([]);  // 🔥 기존 대화 불러올 때 컨텍스트 초기화
+            setSessionId(null);  // 🔥 기존 대화 불러올 때 세션 초기화 (다음 질문에서 히스토리로 새 세션 시작)
           }
           // 대화 불러오기 완료 후 hasCalledAPI 리셋
           hasCalledAPI.current = false;
@@ -265,7 +265,7 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
 
         // 새 대화 시작
         hasCalledAPI.current = true;
-        setContextChunks([]);  // 🔥 새 대화 시작 시 컨텍스트 초기화
+        setSessionId(null);  // 🔥 새 대화 시작 시 세션 초기화
         queryAPI(initialQuestion, true);
       }
     };
@@ -335,34 +335,38 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
         console.log("   마지막 메시지:", conversationHistory[conversationHistory.length - 1].role, conversationHistory[conversationHistory.length - 1].content.slice(0, 50));
       }
 
-      // 백엔드 SSE 스트리밍 호출 (대화 히스토리 + 누적 컨텍스트 포함)
+      // 백엔드 SSE 스트리밍 호출 (세션이 있으면 세션 ID + 새 질문만 전송)
       console.log("🌐 프론트엔드에서 전송하는 언어:", language);
-      console.log("📚 프론트엔드에서 전송하는 이전 컨텍스트:", contextChunks.length, "개");
+      console.log("📚 서버 세션:", sessionId || "없음 (대화 히스토리로 새 세션 시작)");
       const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
-      const response = await fetch(`${backendUrl}/query-stream`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          question: question,
-          conversation_history: conversationHistory,
-          previous_context_chunks: contextChunks,  // 🔥 이전 컨텍스트 전달
-          language: language, // 현재 선택된 언어 전송
-        }),
-        signal: abortControllerRef.current.signal, // AbortController 시그널 추가
-      });
+      const openStream = async (activeSessionId: string | null) => {
+        const response = await fetch(`${backendUrl}/query-stream`, {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({
+            question: question,
+            session_id: activeSessionId,  // 🔥 서버가 히스토리/이전 컨텍스트를 보관
+            conversation_history: activeSessionId ? [] : conversationHistory,  // 세션이 없을 때만 히스토리 전달
+            language: language, // 현재 선택된 언어 전송
+          }),
+          signal: abortControllerRef.current?.signal, // AbortController 시그널 추가
+        });
 
-      if (!response.ok) {
-        throw new Error("응답 실패");
-      }
+        if (!response.ok) {
+          throw new Error("응답 실패");
+        }
 
-      const reader = response.body?.getReader();
-      const decoder = new TextDecoder();
+        const streamReader = response.body?.getReader();
+        if (!streamReader) {
+          throw new Error("스트림을 읽을 수 없습니다");
+        }
+        return streamReader;
+      };
 
-      if (!reader) {
-        throw new Error("스트림을 읽을 수 없습니다");
-      }
+      let reader = await openStream(sessionId);
+      const decoder = new TextDecoder();
 
       let buffer = "";
       let streamingAnswer = "";  // 실시간 스트리밍 답변
@@ -388,12 +392,20 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
         buffer += decoder.decode(value, { stream: true });
         const lines = buffer.split("\n");
         buffer = lines.pop() || "";
+        let sessionExpired = false;
 
         for (const line of lines) {
           if (line.startsWith("data: ")) {
             try {
               const data = JSON.parse(line.slice(6));
 
+              // 🔥 서버 세션 만료/재시작 → 로컬 대화 히스토리로 다시 요청 (서버가 새 세션 생성)
+              if (data.status === "session_expired") {
+                console.log("📚 서버 세션 만료 - 대화 히스토리로 재요청:", sessionId);
+                sessionExpired = true;
+                break;
+              }
+
               // 로딩 상태 업데이트 및 사고 과정 단계 수집
               const now = Date.now();
               const elapsed = now - streamStartTime;
@@ -543,10 +555,10 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
                 setLoadingStatus(""); // 로딩 완료
                 console.log("✅ Streaming done event received");
 
-                // 🔥 누적 컨텍스트 저장 (다음 질문에서 사용)
-                if (data.context_chunks) {
-                  setContextChunks(data.context_chunks);
-                  console.log("📚 컨텍스트 저장 완료:", data.context_chunks.length, "개");
+                // 🔥 서버 세션 ID 저장 (다음 질문에서 사용)
+                if (data.session_id) {
+                  setSessionId(data.session_id);
+                  console.log("📚 세션 저장 완료:", data.session_id);
                 }
               } else if (data.status === "followup_ready") {
                 // 🚀 후속 질문이 준비되면 추가
@@ -609,6 +621,13 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
             }
           }
         }
+
+        if (sessionExpired) {
+          await reader.cancel();
+          setSessionId(null);
+          reader = await openStream(null);
+          buffer = "";
+        }
       }
 
       // 에러 처리
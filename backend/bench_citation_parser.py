@@ -0,0 +1,135 @@
+"""
+Citation 스트림 파서 마이크로벤치마크
+기존 방식(토큰마다 버퍼 전체에 re.search + 문자열 +=)과 CitationStreamParser 비교
+
+사용법: python bench_citation_parser.py
+"""
+
+import io
+import re
+import random
+import time
+import contextlib
+
+from citation_stream import CitationStreamParser
+
+CITATION_RE = re.compile(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?')
+PARTIAL_PATTERNS = ['{{', '{{c', '{{ci', '{{cit', '{{cita', '{{citat',
+                    '{{citati', '{{citatio', '{{citation', '{{citation:']
+
+
+def legacy_parse(tokens, num_references):
+    """기존 generate_answer_stream의 버퍼링 루프 (비교용, 10ms sleep 제외)"""
+    full_answer = ""
+    buffer = ""
+    for content in tokens:
+        buffer += content
+        output_chunk = ""
+        while buffer:
+            match = CITATION_RE.search(buffer)
+            if match:
+                before_citation = buffer[:match.start()]
+                output_chunk += before_citation
+                full_answer += before_citation
+                cite_nums = [int(n.strip()) for n in match.group(1).split(',')]
+                valid_nums = [n for n in cite_nums if 0 <= n < num_references]
+                if valid_nums:
+                    valid_citation = '{{citation:' + ','.join(map(str, valid_nums)) + '}}'
+                    output_chunk += valid_citation
+                    full_answer += valid_citation
+                buffer = buffer[match.end():]
+            elif buffer and ('{{' in buffer[-10:] or buffer.endswith('{{')):
+                last_double_brace_idx = buffer.rfind('{{')
+                if last_double_brace_idx != -1:
+                    after_brace = buffer[last_double_brace_idx:]
+                    if any(after_brace.startswith(p) for p in PARTIAL_PATTERNS):
+                        if last_double_brace_idx > 0:
+                            safe_chunk = buffer[:last_double_brace_idx]
+                            output_chunk += safe_chunk
+                            full_answer += safe_chunk
+                            buffer = buffer[last_double_brace_idx:]
+                        break
+                    output_chunk += buffer
+                    full_answer += buffer
+                    buffer = ""
+                    break
+                if len(buffer) > 25:
+                    safe_chunk = buffer[:-25]
+                    output_chunk += safe_chunk
+                    full_answer += safe_chunk
+                    buffer = buffer[-25:]
+                break
+            else:
+                output_chunk += buffer
+                full_answer += buffer
+                buffer = ""
+                break
+    return full_answer + buffer
+
+
+def new_parse(tokens, num_references):
+    parser = CitationStreamParser(num_references)
+    for content in tokens:
+        parser.feed(content)
+    parser.flush()
+    return parser.answer
+
+
+def make_tokens(paragraphs: int, seed: int = 7):
+    """GPT 출력과 비슷한 토큰 스트림 생성 (1~4글자 토큰, 문단마다 citation)"""
+    rng = random.Random(seed)
+    words = ["Oclacitinib", "(Apoquel)", "0.4-0.6", "mg/kg", "PO", "twice", "daily", "is",
+             "recommended", "for", "**atopic", "dermatitis**", "in", "dogs", "with", "pruritus."]
+    text = ""
+    for _ in range(paragraphs):
+        text += " ".join(rng.choice(words) for _ in range(60))
+        text += "{{citation:" + ",".join(str(rng.randint(0, 12)) for _ in range(3)) + "}}\n\n"
+    tokens, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 4)
+        tokens.append(text[i:i + step])
+        i += step
+    return tokens
+
+
+def bench(name, func, tokens, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            func(tokens, 10)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {name:<10} {best * 1000:8.2f}ms total, {best / len(tokens) * 1e6:6.2f}µs/token")
+    return best
+
+
+def count_split_mismatches(func, text: str, num_references: int = 6) -> int:
+    """텍스트를 모든 위치에서 두 토큰으로 나눴을 때 정규식 기준 결과와 다른 경우의 수"""
+    def replace(match):
+        valid = [n for n in map(int, match.group(1).split(',')) if 0 <= n < num_references]
+        return '{{citation:' + ','.join(map(str, valid)) + '}}' if valid else ''
+    expected = CITATION_RE.sub(replace, text)
+    mismatches = 0
+    with contextlib.redirect_stderr(io.StringIO()):
+        for offset in range(len(text) + 1):
+            if func([text[:offset], text[offset:]], num_references) != expected:
+                mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🧪 Citation 스트림 파서 벤치마크")
+    print("=" * 70)
+
+    for paragraphs in (5, 20, 80):
+        tokens = make_tokens(paragraphs)
+        print(f"\n📝 {paragraphs}개 문단, {len(tokens)}개 토큰, {sum(map(len, tokens)):,}자")
+        legacy = bench("legacy", legacy_parse, tokens)
+        new = bench("parser", new_parse, tokens)
+        print(f"  → {legacy / new:.1f}x")
+
+    sample = "Dose 10 mg/kg.{citation:1} See {{ table }} and {{citation:2,9}} then {{citation:0}}"
+    print(f"\n🔍 분할 위치별 정확도 ({len(sample) + 1}개 분할)")
+    print(f"  legacy     불일치 {count_split_mismatches(legacy_parse, sample)}개")
+    print(f"  parser     불일치 {count_split_mismatches(new_parse, sample)}개")
@@ -0,0 +1,88 @@
+"""
+/query-stream 동시성 벤치마크
+1. 단일 스트림 1개의 전체 소요 시간 측정
+2. 같은 질문으로 N개 스트림을 동시에 실행
+3. N개 동시 실행의 전체 소요 시간이 단일 스트림과 비슷한지 확인
+
+사용법: python bench_concurrency.py [N]  (백엔드 서버가 localhost:8000에서 실행 중이어야 함)
+"""
+
+import sys
+import json
+import time
+import asyncio
+
+import httpx
+
+BACKEND_URL = "http://localhost:8000"
+QUESTION = "What are the core vaccines recommended for dogs?"
+
+
+async def run_stream(client: httpx.AsyncClient, idx: int) -> dict:
+    """스트림 1개 실행 후 첫 토큰 시간(TTFT)과 전체 시간 반환"""
+    start = time.perf_counter()
+    first_token = None
+    events = 0
+
+    async with client.stream(
+        "POST",
+        f"{BACKEND_URL}/query-stream",
+        json={"question": QUESTION, "conversation_history": []}
+    ) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            events += 1
+            try:
+                data = json.loads(line[6:])
+            except json.JSONDecodeError:
+                continue
+            if data.get("status") == "streaming" and first_token is None:
+                first_token = time.perf_counter() - start
+
+    return {
+        "idx": idx,
+        "ttft": first_token or 0.0,
+        "total": time.perf_counter() - start,
+        "events": events
+    }
+
+
+async def run_parallel(n: int) -> tuple:
+    """N개 스트림을 동시에 실행"""
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[run_stream(client, i) for i in range(n)])
+        return time.perf_counter() - start, results
+
+
+def print_results(label: str, wall: float, results: list):
+    print(f"\n[{label}] wall time: {wall:.2f}s")
+    for r in results:
+        print(f"  stream {r['idx']}: TTFT {r['ttft']:.2f}s, total {r['total']:.2f}s, events {r['events']}")
+
+
+async def main(n: int):
+    print("=" * 70)
+    print(f"🧪 /query-stream 동시성 벤치마크 (N={n})")
+    print("=" * 70)
+
+    single_wall, single_results = await run_parallel(1)
+    print_results("단일 스트림", single_wall, single_results)
+
+    parallel_wall, parallel_results = await run_parallel(n)
+    print_results(f"동시 스트림 {n}개", parallel_wall, parallel_results)
+
+    ratio = parallel_wall / single_wall if single_wall else 0.0
+    print("\n" + "=" * 70)
+    print(f"📊 N={n} wall / 단일 wall = {ratio:.2f}x (직렬 실행이면 약 {n}x)")
+    if ratio < 2.0:
+        print("✅ 스트림들이 실제로 겹쳐서 실행됨")
+    else:
+        print("⚠️  스트림들이 직렬화되고 있음 - 이벤트 루프 블로킹 확인 필요")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(main(n))
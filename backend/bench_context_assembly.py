@@ -0,0 +1,70 @@
+"""
+컨텍스트 조립 토큰 절감 측정
+샘플 질문마다 실제 Pinecone 검색 결과(상위 25개 청크)를 토큰 예산으로 패킹한 뒤
+기존 방식(청크마다 "Document N:")과 문서 단위 조립 방식의 프롬프트 토큰 수 비교
+
+사용법: python bench_context_assembly.py  (.env의 OPENAI_API_KEY, PINECONE_API_KEY 필요)
+"""
+
+import os
+
+from dotenv import load_dotenv
+from openai import OpenAI
+from pinecone import Pinecone
+
+from context_assembly import assemble_context, group_chunks_by_document
+from context_packer import pack_context
+
+load_dotenv()
+
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+QUESTIONS = [
+    "What are the core vaccines recommended for dogs?",
+    "What are the effects of prenatal testosterone excess?",
+    "How is feline hyperthyroidism diagnosed and treated?",
+    "What is the recommended fluid therapy for canine parvovirus?",
+    "Which antibiotics are used for bovine mastitis?",
+    "How should chronic kidney disease in cats be staged?",
+    "What are the clinical signs of canine leptospirosis?",
+    "How is equine colic managed in the field?",
+]
+
+
+def main():
+    openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(PINECONE_INDEX_NAME)
+
+    embeddings = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=QUESTIONS).data
+
+    print(f"{'question':<60} {'chunks':>6} {'docs':>5} {'naive':>7} {'assembled':>9} {'saved':>7}")
+    total_naive = total_assembled = 0
+
+    for question, item in zip(QUESTIONS, embeddings):
+        results = index.query(vector=item.embedding, top_k=25, include_metadata=True)
+        chunks = []
+        for match in results.matches:
+            chunk = dict(match.metadata or {})
+            chunk['id'] = match.id
+            chunk['score'] = match.score
+            chunks.append(chunk)
+
+        packed, _ = pack_context(chunks, CONTEXT_TOKEN_BUDGET)
+        doc_order, seen_docs = group_chunks_by_document(packed)
+        _, stats = assemble_context(doc_order, seen_docs)
+
+        total_naive += stats["naive_tokens"]
+        total_assembled += stats["assembled_tokens"]
+        saved_pct = 100 * stats["tokens_saved"] / stats["naive_tokens"] if stats["naive_tokens"] else 0.0
+        print(f"{question[:60]:<60} {stats['chunks']:>6} {stats['documents']:>5} "
+              f"{stats['naive_tokens']:>7} {stats['assembled_tokens']:>9} {saved_pct:>6.1f}%")
+
+    if total_naive:
+        print(f"\n합계: {total_naive:,} → {total_assembled:,} tokens "
+              f"({100 * (total_naive - total_assembled) / total_naive:.1f}% 절감)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+멀티 쿼리 결과 융합 벤치마크 (녹화된 쿼리 픽스처 사용)
+1. record: 샘플 질문마다 쿼리 확장 + Pinecone 검색 결과(쿼리별 ID/점수/메타데이터 키)를 픽스처로 저장
+   + 질문별 필수 용어가 제목/본문에 모두 들어 있는 청크를 관련 청크(relevant)로 라벨링
+   (융합 방식과 무관한 라벨 → 필요하면 픽스처의 relevant를 직접 수정)
+2. compare: 픽스처로 기존 방식(source/title/page 문자열 키, 먼저 나온 청크 유지 후 점수 정렬)과
+   fuse_results(rrf, max) 순위를 relevant 라벨 기준 precision@10 / MRR로 오프라인 비교
+
+사용법:
+  python bench_fusion.py record   (.env의 OPENAI_API_KEY, PINECONE_API_KEY 필요)
+  python bench_fusion.py compare [픽스처 경로]
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+from fusion import fuse_results
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "fusion_queries.json"
+TOP_K = 25
+
+# (질문, 관련 청크 라벨링용 필수 용어 - 제목/본문에 모두 포함되어야 관련 청크)
+QUESTIONS = [
+    ("What are the core vaccines recommended for dogs?", ("vaccin", "dog")),
+    ("What are the effects of prenatal testosterone excess?", ("prenatal", "testosterone")),
+    ("How is feline hyperthyroidism diagnosed and treated?", ("hyperthyroid", "feline")),
+    ("What is the recommended fluid therapy for canine parvovirus?", ("parvovirus", "fluid")),
+    ("Which antibiotics are used for bovine mastitis?", ("mastitis", "antibiotic")),
+    ("How should chronic kidney disease in cats be staged?", ("kidney", "stag")),
+    ("What are the clinical signs of canine leptospirosis?", ("leptospir", "sign")),
+    ("How is equine colic managed in the field?", ("colic", "horse")),
+]
+
+# 픽스처에 저장할 메타데이터 (본문 text 제외)
+FIXTURE_FIELDS = ("source", "title", "page", "chunk_index")
+
+
+async def record():
+    """실제 검색 결과를 픽스처로 저장 (main.py의 확장/임베딩/검색 경로 그대로 사용)"""
+    import main
+
+    fixtures = []
+    for question, terms in QUESTIONS:
+        queries = await main.expand_query(question)
+        embeddings = await main.embed_queries(queries)
+        per_query, _ = await main.retriever.search(embeddings, top_k=15)
+        chunks_by_id = {c["id"]: c for chunks in per_query for c in chunks}
+        hydrated = await main.hydrate_chunks(list(chunks_by_id.values()))
+        fixtures.append({
+            "question": question,
+            "queries": queries,
+            "results": [
+                [{"id": c["id"], "score": c["score"], **{k: c[k] for k in FIXTURE_FIELDS if k in c}} for c in chunks]
+                for chunks in per_query
+            ],
+            "relevant": sorted(c["id"] for c in hydrated if is_relevant(c, terms))
+        })
+        print(f"🎙️  {question}: {[len(chunks) for chunks in per_query]}, 관련 청크 {len(fixtures[-1]['relevant'])}개")
+
+    FIXTURE_PATH.parent.mkdir(exist_ok=True)
+    FIXTURE_PATH.write_text(json.dumps(fixtures, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ 픽스처 저장: {FIXTURE_PATH} ({len(fixtures)}개 질문)")
+
+
+def is_relevant(chunk, terms) -> bool:
+    """필수 용어가 제목/본문에 모두 들어 있는지 (대소문자 무시, 부분 일치)"""
+    text = f"{chunk.get('title', '')} {chunk.get('text', '')}".lower()
+    return all(term in text for term in terms)
+
+
+def naive_order(per_query):
+    """기존 query_stream 방식: 문자열 키로 먼저 나온 청크만 유지 → 점수 정렬"""
+    seen, chunks = set(), []
+    for results in per_query:
+        for chunk in results:
+            key = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}_{chunk.get('page', 0)}"
+            if key not in seen:
+                seen.add(key)
+                chunks.append(chunk)
+    return sorted(chunks, key=lambda c: c.get('score', 0), reverse=True)
+
+
+def precision_at(ids, relevant, n=10) -> float:
+    """상위 n개 중 관련 청크 비율"""
+    top = ids[:n]
+    return sum(1 for chunk_id in top if chunk_id in relevant) / len(top) if top else 0.0
+
+
+def reciprocal_rank(ids, relevant) -> float:
+    """첫 관련 청크 순위의 역수 (없으면 0)"""
+    return next((1.0 / rank for rank, chunk_id in enumerate(ids, 1) if chunk_id in relevant), 0.0)
+
+
+def compare(path: Path):
+    if not path.exists():
+        print(f"❌ 픽스처가 없습니다: {path}\n   먼저 `python bench_fusion.py record`로 검색 결과와 관련 청크 라벨을 녹화하세요")
+        sys.exit(1)
+    fixtures = json.loads(path.read_text(encoding="utf-8"))
+    labelled = [fixture for fixture in fixtures if fixture.get("relevant")]
+    if len(labelled) < len(fixtures):
+        print(f"⚠️  관련 청크 라벨이 없는 질문 {len(fixtures) - len(labelled)}개 제외 "
+              f"(픽스처의 relevant에 청크 ID를 채우거나 다시 record)")
+
+    methods = ("naive", "max", "rrf")
+    print(f"{'question':<48} {'hits':>4} {'ids':>4} {'rel':>4} {'lost':>4} {'overlap':>7} "
+          f"{'P@10 naive/max/rrf':>19} {'MRR naive/max/rrf':>18}")
+    totals = {"lost": 0, **{f"p_{name}": 0.0 for name in methods}, **{f"rr_{name}": 0.0 for name in methods}}
+
+    for fixture in labelled:
+        per_query = fixture["results"]
+        relevant = set(fixture["relevant"])
+        support = {}
+        for results in per_query:
+            for chunk_id in {c["id"] for c in results}:
+                support[chunk_id] = support.get(chunk_id, 0) + 1
+
+        naive_ids = [c["id"] for c in naive_order(per_query)]
+        max_ids = [c["id"] for c in fuse_results(per_query, mode="max")[0]]
+        rrf_ids = [c["id"] for c in fuse_results(per_query, mode="rrf")[0]]
+
+        # 문자열 키 충돌로 기존 방식에서 사라진 고유 벡터 ID 수
+        lost = len(support) - len(naive_ids)
+        overlap = len(set(naive_ids[:TOP_K]) & set(rrf_ids[:TOP_K])) / max(1, min(TOP_K, len(rrf_ids)))
+        rankings = {"naive": naive_ids, "max": max_ids, "rrf": rrf_ids}
+        precision = {name: precision_at(ids, relevant) for name, ids in rankings.items()}
+        rr = {name: reciprocal_rank(ids, relevant) for name, ids in rankings.items()}
+
+        totals["lost"] += lost
+        for name in methods:
+            totals[f"p_{name}"] += precision[name]
+            totals[f"rr_{name}"] += rr[name]
+
+        hits = sum(len(results) for results in per_query)
+        print(f"{fixture['question'][:48]:<48} {hits:>4} {len(support):>4} {len(relevant):>4} {lost:>4} {overlap:>7.0%} "
+              f"{precision['naive']:>9.0%}/{precision['max']:.0%}/{precision['rrf']:.0%} "
+              f"{rr['naive']:>8.2f}/{rr['max']:.2f}/{rr['rrf']:.2f}")
+
+    n = max(1, len(labelled))
+    print(f"\n{len(labelled)}개 질문: 문자열 키로 잃은 청크 {totals['lost']}개")
+    print("   precision@10 " + ", ".join(f"{name}={totals[f'p_{name}'] / n:.0%}" for name in methods))
+    print("   MRR          " + ", ".join(f"{name}={totals[f'rr_{name}'] / n:.3f}" for name in methods))
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "compare"
+    if command == "record":
+        asyncio.run(record())
+    else:
+        compare(Path(sys.argv[2]) if len(sys.argv) > 2 else FIXTURE_PATH)
@@ -0,0 +1,63 @@
+"""
+하이브리드(희소+밀집) 검색 recall 벤치마크 (밀집 검색만 사용할 때와 비교)
+known-item 방식: 청크 저장소에서 청크를 무작위로 뽑아, 그 청크의 IDF 높은 토큰(약물명, 품종명, 수치 등)으로
+쿼리를 만들고 원래 청크가 top-k 안에 검색되는지 측정
+
+사용법:
+  python bench_hybrid.py [샘플 수]   (.env의 OPENAI_API_KEY, PINECONE_API_KEY, 어휘 파일, dotproduct 인덱스 필요)
+"""
+
+import sys
+import random
+import asyncio
+
+from sparse_encoder import tokenize, scale_sparse
+
+SAMPLES = 100
+QUERY_TOKENS = 4
+TOP_KS = (1, 5, 15)
+ALPHAS = (1.0, 0.8, 0.6, 0.4)  # 1.0 = 밀집 검색만
+
+
+def keyword_query(encoder, text: str) -> str:
+    """청크에서 IDF가 가장 높은 토큰 (숫자만 있는 토큰 제외, 등장 순서 유지)"""
+    tokens = [t for t in dict.fromkeys(tokenize(text)) if t in encoder.index_of and not t.replace(".", "").isdigit()]
+    rare = set(sorted(tokens, key=lambda t: encoder.idf[encoder.index_of[t]], reverse=True)[:QUERY_TOKENS])
+    return " ".join(t for t in tokens if t in rare)
+
+
+async def main(samples: int):
+    import main as app
+
+    if app.sparse_encoder is None or app.chunk_store is None:
+        print("❌ 어휘 파일과 청크 저장소가 필요합니다 (data-pipeline/build_sparse_vocab.py)")
+        return
+
+    random.seed(0)
+    rows = [(chunk_id, text) for chunk_id, text in app.chunk_store.iter_texts() if len(tokenize(text)) >= 50]
+    picked = random.sample(rows, min(samples, len(rows)))
+    queries = [(chunk_id, keyword_query(app.sparse_encoder, text)) for chunk_id, text in picked]
+    queries = [(chunk_id, query) for chunk_id, query in queries if query]
+    print(f"청크 {len(rows):,}개 중 {len(queries)}개 샘플, 쿼리 예: {[q for _, q in queries[:3]]}")
+
+    embeddings = await app.embed_queries([query for _, query in queries])
+    sparse_vectors = [app.sparse_encoder.encode_query(query) for _, query in queries]
+
+    print(f"{'alpha':>6} " + " ".join(f"{f'recall@{k}':>10}" for k in TOP_KS) + f" {'wall_ms':>8}")
+    for alpha in ALPHAS:
+        if alpha < 1.0:
+            dense = [[value * alpha for value in embedding] for embedding in embeddings]
+            sparse = [scale_sparse(vector, 1.0 - alpha) if vector["indices"] else None for vector in sparse_vectors]
+        else:
+            dense, sparse = embeddings, None
+
+        results, stats = await app.retriever.search(dense, top_k=max(TOP_KS), sparse_vectors=sparse, include_metadata=False)
+        recalls = []
+        for k in TOP_KS:
+            hits = sum(1 for (chunk_id, _), chunks in zip(queries, results) if chunk_id in {c["id"] for c in chunks[:k]})
+            recalls.append(hits / len(queries))
+        print(f"{alpha:>6} " + " ".join(f"{recall:>10.3f}" for recall in recalls) + f" {stats['wall_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else SAMPLES))
@@ -0,0 +1,95 @@
+"""
+로컬 IVF 인덱스 recall/지연시간 벤치마크 (전체 탐색 대비)
+nprobe, float32/int8 조합별 recall@10과 쿼리 지연시간(p50/p95) 측정
+
+사용법:
+  python bench_local_index.py [벡터 수] [차원]      (군집 구조가 있는 합성 벡터로 임시 인덱스 생성)
+  python bench_local_index.py --index <디렉터리>    (기존 로컬 인덱스, 저장된 벡터에 잡음을 더해 쿼리 생성)
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from local_index import LocalIndex, DEFAULT_NAMESPACE_DIR
+
+TOP_K = 10
+QUERIES = 200
+NPROBES = (1, 4, 8, 16, 32, 64)
+
+
+def synthetic_vectors(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """실제 임베딩처럼 저차원(64) 구조를 가진 벡터 (뚜렷한 군집 없이 연속적으로 분포)"""
+    latent = rng.standard_normal((count, 64)).astype(np.float32)
+    projection = rng.standard_normal((64, dim)).astype(np.float32)
+    vectors = latent @ projection + rng.standard_normal((count, dim)).astype(np.float32) * 2.0
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_index(path: Path, vectors: np.ndarray, dtype: str) -> LocalIndex:
+    index = LocalIndex(path, dtype=dtype)
+    index.upsert([{"id": f"v{i}", "values": vector, "metadata": {}} for i, vector in enumerate(vectors)])
+    start = time.perf_counter()
+    index.save()
+    print(f"  🏗️  {dtype} 인덱스 생성: {time.perf_counter() - start:.1f}s")
+    return index
+
+
+def run(index: LocalIndex, queries: np.ndarray, truth):
+    for nprobe in NPROBES:
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = index.query(vector=query, top_k=TOP_K, nprobe=nprobe)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({m.id for m in result.matches} & expected)
+        print(f"    nprobe={nprobe:>3}: recall@{TOP_K}={hits / (len(queries) * TOP_K):.3f}, "
+              f"p50={np.percentile(latencies, 50):.2f}ms, p95={np.percentile(latencies, 95):.2f}ms")
+
+
+def brute_force(vectors: np.ndarray, ids, queries: np.ndarray):
+    """정답 top-k와 전체 탐색 지연시간"""
+    truth, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        scores = vectors @ (query / np.linalg.norm(query))
+        best = np.argpartition(-scores, TOP_K)[:TOP_K]
+        latencies.append((time.perf_counter() - start) * 1000)
+        truth.append({ids[i] for i in best})
+    print(f"  전체 탐색: p50={np.percentile(latencies, 50):.2f}ms, p95={np.percentile(latencies, 95):.2f}ms")
+    return truth
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    if len(sys.argv) > 2 and sys.argv[1] == "--index":
+        index = LocalIndex(Path(sys.argv[2]))
+        data = index._namespaces[DEFAULT_NAMESPACE_DIR]
+        ids, vectors, _ = data.live_items()
+        queries = vectors[rng.choice(len(vectors), QUERIES)] + rng.standard_normal((QUERIES, data.dim)).astype(np.float32) * 0.02
+        print(f"기존 인덱스 {sys.argv[2]}: {len(vectors):,}개 × {data.dim}차원 ({data.dtype}, nlist={len(data.centroids)}, "
+              f"세그먼트 {len(data.segments)}개)")
+        truth = brute_force(vectors, ids, queries)
+        run(index, queries, truth)
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    vectors = synthetic_vectors(count, dim, rng)
+    queries = vectors[rng.choice(count, QUERIES)] + rng.standard_normal((QUERIES, dim)).astype(np.float32) * 0.02
+    ids = [f"v{i}" for i in range(count)]
+    print(f"합성 벡터 {count:,}개 × {dim}차원, 쿼리 {QUERIES}개")
+    truth = brute_force(vectors, ids, queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in ("float32", "int8"):
+            build_index(Path(tmp) / dtype, vectors, dtype)
+            run(LocalIndex(Path(tmp) / dtype), queries, truth)  # 디스크에서 메모리 매핑으로 다시 열기
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+MMR 선택 마이크로벤치마크
+확장 쿼리 3개 × top_k 15 = 약 45개 후보(1536차원)에서 K개 선택 시간 측정
+같은 논문의 거의 동일한 청크 묶음을 섞어 점수 순 선택과 MMR 선택의 중복도 비교
+
+사용법: python bench_mmr.py [후보 수] [K]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from selection import mmr_select, select_adaptive
+
+DIM = 1536
+
+
+def make_candidates(n: int, rng: np.random.Generator):
+    """관련 논문 몇 편의 청크가 서로 매우 비슷한 후보 집합 (query와의 유사도 점수 포함)"""
+    query = rng.standard_normal(DIM).astype(np.float32)
+    query /= np.linalg.norm(query)
+
+    papers = [query * 0.6 + rng.standard_normal(DIM).astype(np.float32) * 0.02 for _ in range(4)]
+    chunks = []
+    for i in range(n):
+        base = papers[i % len(papers)] if i < n // 2 else rng.standard_normal(DIM).astype(np.float32) * 0.03 + query * 0.4
+        vector = base + rng.standard_normal(DIM).astype(np.float32) * 0.01
+        vector /= np.linalg.norm(vector)
+        chunks.append({"id": f"c{i}", "values": vector, "score": float(vector @ query)})
+    return query, chunks
+
+
+def redundancy(chunks):
+    matrix = np.asarray([c["values"] for c in chunks], dtype=np.float32)
+    pairwise = matrix @ matrix.T
+    np.fill_diagonal(pairwise, 0.0)
+    return float(pairwise.max()), float(pairwise.sum() / max(1, len(chunks) * (len(chunks) - 1)))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 45
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    rng = np.random.default_rng(0)
+    query, chunks = make_candidates(n, rng)
+
+    runs = 2000
+    mmr_select(chunks, query, k)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(runs):
+        selected, _ = mmr_select(chunks, query, k)
+    mmr_us = (time.perf_counter() - start) / runs * 1e6
+
+    by_score = sorted(chunks, key=lambda c: c["score"], reverse=True)[:k]
+    score_max, score_mean = redundancy(by_score)
+    mmr_max, mmr_mean = redundancy(selected)
+
+    print(f"후보 {n}개 × {DIM}차원 → K={k}")
+    print(f"  mmr_select: {mmr_us:.0f}µs/회 (청크 벡터 → 행렬 쌓기 포함)")
+    print(f"  점수 순 선택 중복도: max={score_max:.3f}, mean={score_mean:.3f}")
+    print(f"  MMR 선택 중복도:    max={mmr_max:.3f}, mean={mmr_mean:.3f}")
+
+    selected, stats = select_adaptive(chunks, max_k=k)
+    print(f"  (참고) select_adaptive: K={stats['k']} ({stats['reason']})")
+
+
+if __name__ == "__main__":
+    main()
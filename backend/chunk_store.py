@@ -0,0 +1,147 @@
+"""
+로컬 청크 저장소 (SQLite)
+벡터 ID → 청크 본문 + 문서 메타데이터
+- 문서 메타데이터(제목, 저자, 저널, reference_format 등)는 문서당 1행으로 저장
+- SLIM_METADATA=true면 Pinecone에는 ID와 필터용 필드(SLIM_METADATA_FIELDS)만 남기고, 검색 후 이 저장소에서 청크를 채움
+  (백엔드에 같은 저장소 파일을 배포할 때만 켤 것, 기본값은 전체 메타데이터)
+- 수집 스크립트(data-pipeline)와 백엔드가 같은 파일을 사용
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+DEFAULT_CHUNK_STORE_PATH = Path(__file__).parent / "data" / "chunks.sqlite3"
+
+# Pinecone에 남길 필터용 메타데이터 (청크 본문/문서 정보는 저장소에만)
+SLIM_METADATA_FIELDS = ("doc_type", "source", "year", "pmcid", "page", "chunk_index")
+
+# 청크별로 달라지는 필드 (나머지는 문서 메타데이터)
+CHUNK_FIELDS = ("text", "page", "chunk_index")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    fields TEXT NOT NULL
+);
+"""
+
+
+def chunk_store_path() -> Path:
+    """저장소 파일 경로 (CHUNK_STORE_PATH 환경 변수 우선)"""
+    return Path(os.getenv("CHUNK_STORE_PATH", str(DEFAULT_CHUNK_STORE_PATH)))
+
+
+def slim_metadata(metadata: Dict) -> Dict:
+    """Pinecone에 저장할 필터용 메타데이터만 추출"""
+    return {key: metadata[key] for key in SLIM_METADATA_FIELDS if key in metadata and metadata[key] not in (None, "")}
+
+
+def slim_metadata_enabled() -> bool:
+    """수집 시 Pinecone에 슬림 메타데이터만 저장할지 (SLIM_METADATA 환경 변수, 기본값 false)"""
+    return os.getenv("SLIM_METADATA", "false").lower() in ("1", "true", "yes")
+
+
+def index_metadata(metadata: Dict) -> Dict:
+    """수집 스크립트가 Pinecone에 저장할 청크 메타데이터 (슬림 모드가 아니면 전체 메타데이터)"""
+    return slim_metadata(metadata) if slim_metadata_enabled() else dict(metadata)
+
+
+def document_id(metadata: Dict) -> str:
+    """문서 키 (PMCID, 없으면 source + 제목)"""
+    return metadata.get("pmcid") or f"{metadata.get('source', 'unknown')}_{metadata.get('title', 'unknown')}"
+
+
+class ChunkStore:
+    """
+    SQLite 기반 청크 저장소
+    하나의 연결을 잠금으로 보호해 검색 스레드 풀에서 동시에 호출 가능
+    """
+
+    def __init__(self, path: Path, readonly: bool = False):
+        self.path = Path(path)
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def put_many(self, chunks: Iterable[Dict]):
+        """
+        청크 저장 (id와 전체 메타데이터를 가진 dict, 같은 ID는 덮어씀)
+        문서 필드는 documents 테이블에 문서당 1행으로 분리
+        """
+        documents = {}
+        rows = []
+        for chunk in chunks:
+            doc_id = document_id(chunk)
+            documents[doc_id] = {
+                key: value for key, value in chunk.items() if key not in CHUNK_FIELDS and key != "id"
+            }
+            rows.append((
+                chunk["id"],
+                doc_id,
+                json.dumps({key: chunk[key] for key in CHUNK_FIELDS if key in chunk}, ensure_ascii=False)
+            ))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (doc_id, metadata) VALUES (?, ?)",
+                [(doc_id, json.dumps(metadata, ensure_ascii=False)) for doc_id, metadata in documents.items()]
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO chunks (id, doc_id, fields) VALUES (?, ?, ?)", rows)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Dict]:
+        """ID 목록 조회 → {id: 문서 메타데이터 + 청크 필드} (없는 ID는 생략)"""
+        if not ids:
+            return {}
+
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c.id, c.fields, d.metadata FROM chunks c "
+                f"JOIN documents d ON d.doc_id = c.doc_id WHERE c.id IN ({placeholders})",
+                list(ids)
+            ).fetchall()
+
+        return {chunk_id: {**json.loads(metadata), **json.loads(fields)} for chunk_id, fields, metadata in rows}
+
+    def iter_texts(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """모든 청크의 (id, text)를 한 번 순회 (희소 벡터 어휘 생성 등)"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, id, fields FROM chunks WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, chunk_id, fields in rows:
+                yield chunk_id, json.loads(fields).get("text", "")
+            last_rowid = rows[-1][0]
+
+    def stats(self) -> Dict:
+        """저장소 통계"""
+        with self._lock:
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "chunks": chunks,
+            "documents": documents,
+            "size_mb": round(self.path.stat().st_size / (1024 * 1024), 1) if self.path.exists() else 0.0
+        }
+
+    def close(self):
+        self._conn.close()
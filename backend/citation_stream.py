@@ -0,0 +1,184 @@
+"""
+스트리밍 Citation 파서
+GPT 토큰 스트림에서 {{citation:N,M}} 태그를 증분 방식으로 인식 (토큰 경계에서 잘려도 처리)
+유효하지 않은 문서 번호는 제거하고, 태그는 {{citation:N,M}} 형식으로 정규화
+"""
+
+import sys
+from typing import List, Set
+
+CITATION_KEYWORD = "citation:"
+
+# 숫자/쉼표 부분 최대 길이 (이보다 길면 citation이 아닌 일반 텍스트로 처리)
+MAX_CITATION_BODY = 64
+
+# 파서 상태
+IDLE = 0        # 후보 없음
+OPEN_ONE = 1    # "{"
+OPEN_TWO = 2    # "{{"
+KEYWORD = 3     # "{{citatio" 처럼 키워드 일부까지 일치
+NUMBER = 4      # "{{citation:1" 처럼 마지막 글자가 숫자
+COMMA = 5       # "{{citation:1," 처럼 마지막 글자가 쉼표
+CLOSED = 6      # "{{citation:1}" - 두 번째 "}"가 올지 대기
+
+
+class CitationStreamParser:
+    """
+    {{?citation:N(,N)*}}? 패턴을 글자 단위 상태 머신으로 파싱
+    - feed(delta): 출력해도 안전한 텍스트 반환 (citation 후보는 판정될 때까지 보류)
+    - flush(): 스트림 종료 시 남은 후보 처리
+    - 보류 중인 후보 길이는 제한되므로 토큰당 O(len(delta))
+    - "{"가 없는 토큰, 키워드/숫자 구간은 글자 단위 _step 없이 슬라이스로 처리
+    """
+
+    def __init__(self, num_references: int):
+        self.num_references = num_references
+        self.seen_citations: Set[int] = set()
+        self.invalid_citations: List[int] = []
+        self._parts: List[str] = []
+        self._pending = ""
+        self._state = IDLE
+        self._keyword_pos = 0
+        self._body = ""
+
+    @property
+    def answer(self) -> str:
+        """지금까지 출력된 (정리된) 전체 답변"""
+        return "".join(self._parts)
+
+    def feed(self, delta: str) -> str:
+        """토큰 추가 후 출력 가능한 텍스트 반환"""
+        state = self._state
+        if state == IDLE and '{' not in delta:
+            # 가장 흔한 경우: 후보 없음 + "{" 없는 토큰 → 리스트/join 없이 그대로 출력
+            if delta:
+                self._parts.append(delta)
+            return delta
+
+        out: List[str] = []
+        i = 0
+        n = len(delta)
+
+        while i < n:
+            state = self._state
+            if state == IDLE:
+                # 빠른 경로: 다음 "{" 전까지는 그대로 출력
+                brace = delta.find('{', i)
+                if brace == -1:
+                    out.append(delta[i:])
+                    break
+                if brace > i:
+                    out.append(delta[i:brace])
+                i = brace
+            elif state == KEYWORD:
+                # 빠른 경로: 남은 키워드와 일치하는 조각을 한 번에 소비 (불일치면 글자 단위로 처리)
+                piece = delta[i:i + len(CITATION_KEYWORD) - self._keyword_pos]
+                if CITATION_KEYWORD.startswith(piece, self._keyword_pos):
+                    self._pending += piece
+                    self._keyword_pos += len(piece)
+                    if self._keyword_pos == len(CITATION_KEYWORD):
+                        self._state = COMMA
+                    i += len(piece)
+                    continue
+            elif state == NUMBER or state == COMMA:
+                # 빠른 경로: 연속된 숫자를 슬라이스로 소비 (길이 제한을 넘으면 글자 단위로 처리)
+                j = i
+                while j < n and '0' <= delta[j] <= '9':
+                    j += 1
+                if j > i and len(self._body) + (j - i) <= MAX_CITATION_BODY:
+                    digits = delta[i:j]
+                    self._body += digits
+                    self._pending += digits
+                    self._state = NUMBER
+                    i = j
+                    continue
+            self._step(delta[i], out)
+            i += 1
+
+        return self._emit(out)
+
+    def flush(self) -> str:
+        """스트림 종료: 완성된 citation은 출력, 미완성 후보는 일반 텍스트로 출력"""
+        out: List[str] = []
+        if self._state == CLOSED:
+            self._complete(out)
+        elif self._pending:
+            out.append(self._pending)
+        self._reset()
+        return self._emit(out)
+
+    def _emit(self, out: List[str]) -> str:
+        text = "".join(out)
+        if text:
+            self._parts.append(text)
+        return text
+
+    def _reset(self):
+        self._pending = ""
+        self._state = IDLE
+        self._keyword_pos = 0
+        self._body = ""
+
+    def _step(self, ch: str, out: List[str]):
+        """한 글자 처리"""
+        state = self._state
+
+        if state == IDLE:
+            if ch == '{':
+                self._pending = ch
+                self._state = OPEN_ONE
+            else:
+                out.append(ch)
+            return
+
+        if state == CLOSED:
+            if ch == '}':
+                self._complete(out)
+            else:
+                self._complete(out)
+                self._step(ch, out)
+            return
+
+        if state == OPEN_ONE and ch == '{':
+            self._state = OPEN_TWO
+        elif state in (OPEN_ONE, OPEN_TWO) and ch == CITATION_KEYWORD[0]:
+            self._state = KEYWORD
+            self._keyword_pos = 1
+        elif state == KEYWORD and ch == CITATION_KEYWORD[self._keyword_pos]:
+            self._keyword_pos += 1
+            if self._keyword_pos == len(CITATION_KEYWORD):
+                self._state = COMMA  # 키워드 직후에는 쉼표 뒤와 마찬가지로 숫자가 와야 함
+        elif state in (NUMBER, COMMA) and '0' <= ch <= '9' and len(self._body) < MAX_CITATION_BODY:
+            self._body += ch
+            self._state = NUMBER
+        elif state == NUMBER and ch == ',':
+            self._body += ch
+            self._state = COMMA
+        elif state == NUMBER and ch == '}':
+            self._state = CLOSED
+        else:
+            # 패턴 불일치: 첫 글자만 일반 텍스트로 내보내고 나머지는 다시 스캔
+            replay = self._pending[1:] + ch
+            out.append(self._pending[0])
+            self._reset()
+            for replay_ch in replay:
+                self._step(replay_ch, out)
+            return
+
+        self._pending += ch
+
+    def _complete(self, out: List[str]):
+        """완성된 citation 검증 후 유효한 번호만 정규화하여 출력"""
+        valid_nums = []
+        for num_str in self._body.split(','):
+            cite_num = int(num_str)
+            if 0 <= cite_num < self.num_references:
+                valid_nums.append(cite_num)
+                self.seen_citations.add(cite_num)
+            else:
+                self.invalid_citations.append(cite_num)
+                print(f"⚠️  Invalid citation {{{{citation:{cite_num}}}}} removed", file=sys.stderr, flush=True)
+
+        if valid_nums:
+            out.append('{{citation:' + ','.join(map(str, valid_nums)) + '}}')
+        self._reset()
@@ -0,0 +1,149 @@
+"""
+문서 단위 컨텍스트 조립
+- 청크를 문서별로 묶고 인접한 chunk_index/page 청크를 하나의 구간으로 병합
+- 인접 청크 사이의 중복 텍스트(청킹 overlap 150자) 제거
+- 문서마다 헤더 1개 → 프롬프트의 Document 번호 = citation 인덱스(doc_order 순서)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from context_packer import count_tokens
+
+# 인접 청크 중복 탐색 범위 (청킹 overlap 150자 + strip/문장 경계 조정 여유)
+MAX_OVERLAP_CHARS = 300
+# 이보다 짧은 일치는 우연한 일치로 보고 제거하지 않음
+MIN_OVERLAP_CHARS = 20
+# 같은 문서의 떨어진 구간 사이 구분자
+SPAN_SEPARATOR = "\n[...]\n"
+
+
+def group_chunks_by_document(chunks: List[Dict]) -> Tuple[List[str], Dict[str, List[Dict]]]:
+    """
+    청크들을 문서별로 그룹화
+    Returns: (doc_order, grouped_chunks)
+    """
+    seen_docs = {}
+    doc_order = []
+
+    for chunk in chunks:
+        ref_key = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}"
+        if ref_key not in seen_docs:
+            seen_docs[ref_key] = []
+            doc_order.append(ref_key)
+        seen_docs[ref_key].append(chunk)
+
+    return doc_order, seen_docs
+
+
+def chunk_position(chunk: Dict) -> Optional[int]:
+    """문서 내 청크 위치 (XML: chunk_index, 기존 메타데이터: page)"""
+    for key in ("chunk_index", "page"):
+        value = chunk.get(key)
+        if value is None or value == "":
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def overlap_length(previous: str, following: str,
+                   max_chars: int = MAX_OVERLAP_CHARS, min_chars: int = MIN_OVERLAP_CHARS) -> int:
+    """previous의 끝과 following의 시작이 겹치는 가장 긴 길이 (min_chars 미만이면 0)"""
+    limit = min(len(previous), len(following), max_chars)
+    for length in range(limit, min_chars - 1, -1):
+        if previous.endswith(following[:length]):
+            return length
+    return 0
+
+
+def merge_spans(chunks: List[Dict]) -> Tuple[List[str], int]:
+    """
+    한 문서의 청크를 위치 순으로 정렬해 연속 구간으로 병합
+    위치가 같은 다른 청크(PDF 가이드라인은 page 하나에 청크 여러 개)는 별도 구간으로 유지
+    같은 ID/같은 본문 청크(이전 턴 청크 병합 등)만 중복으로 제외
+    위치를 모르는 청크는 점수 순서 그대로 별도 구간
+    Returns: (구간 텍스트 리스트, 제거된 중복 글자 수)
+    """
+    positioned = sorted(
+        (chunk for chunk in chunks if chunk_position(chunk) is not None),
+        key=chunk_position
+    )
+    unpositioned = [chunk for chunk in chunks if chunk_position(chunk) is None]
+
+    spans: List[str] = []
+    removed = 0
+    last_position = None
+    seen_ids, seen_texts = set(), set()
+
+    def is_duplicate(chunk: Dict, text: str) -> bool:
+        chunk_id = chunk.get('id')
+        if (chunk_id and chunk_id in seen_ids) or text in seen_texts:
+            return True
+        if chunk_id:
+            seen_ids.add(chunk_id)
+        seen_texts.add(text)
+        return False
+
+    for chunk in positioned:
+        text = chunk.get('text', '').strip()
+        position = chunk_position(chunk)
+
+        if is_duplicate(chunk, text):
+            continue
+
+        if spans and last_position is not None and position == last_position + 1:
+            overlap = overlap_length(spans[-1], text)
+            removed += overlap
+            spans[-1] = spans[-1] + ("" if overlap else "\n") + text[overlap:]
+        else:
+            spans.append(text)
+        last_position = position
+
+    for chunk in unpositioned:
+        text = chunk.get('text', '').strip()
+        if not is_duplicate(chunk, text):
+            spans.append(text)
+    return [span for span in spans if span], removed
+
+
+def assemble_context(doc_order: List[str], seen_docs: Dict[str, List[Dict]]) -> Tuple[str, Dict]:
+    """
+    doc_order 순서로 문서당 헤더 1개를 붙여 프롬프트 컨텍스트 생성
+    Returns: (context_text, 통계 - 청크별 나열 방식 대비 토큰 수)
+    """
+    sections = []
+    naive_parts = []
+    spans_total = 0
+    removed_total = 0
+
+    for i, ref_key in enumerate(doc_order):
+        chunks = seen_docs[ref_key]
+        spans, removed = merge_spans(chunks)
+        spans_total += len(spans)
+        removed_total += removed
+
+        title = chunks[0].get('title', '') if chunks else ''
+        header = f"Document {i}: {title}" if title else f"Document {i}:"
+        sections.append(header + "\n" + SPAN_SEPARATOR.join(spans))
+
+        naive_parts.extend(chunk.get('text', '') for chunk in chunks)
+
+    context_text = "\n\n".join(sections)
+
+    # 비교 기준: 청크마다 "Document N:" 헤더를 붙이던 기존 방식
+    naive_text = "\n\n".join(f"Document {i}: {text}" for i, text in enumerate(naive_parts))
+    naive_tokens = count_tokens(naive_text) if naive_parts else 0
+    assembled_tokens = count_tokens(context_text) if sections else 0
+
+    stats = {
+        "documents": len(doc_order),
+        "chunks": len(naive_parts),
+        "spans": spans_total,
+        "overlap_chars_removed": removed_total,
+        "naive_tokens": naive_tokens,
+        "assembled_tokens": assembled_tokens,
+        "tokens_saved": naive_tokens - assembled_tokens
+    }
+    return context_text, stats
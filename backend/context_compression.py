@@ -0,0 +1,86 @@
+"""
+추출 기반 컨텍스트 압축
+청크를 문장으로 나누고 질문 임베딩과의 코사인 유사도(NumPy 배치 행렬곱)로 점수화해
+청크마다 상위 문장만 원래 순서대로 남김
+숫자(용량, 수치, 기간 등)가 포함된 문장은 점수와 관계없이 항상 유지
+"""
+
+import re
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from context_packer import count_tokens
+
+COMPRESSION_MODES = ("off", "extractive")
+
+# 문장 끝(. ! ? 。) 뒤 공백 기준 분리 - 소수점(0.5 mg)은 뒤에 공백이 없어 분리되지 않음
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。])\s+')
+HAS_NUMBER = re.compile(r'\d')
+
+
+def split_sentences(text: str) -> List[str]:
+    """청크 텍스트를 문장 단위로 분리 (빈 문장 제외)"""
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text or "") if sentence.strip()]
+
+
+def unique_sentences(chunks: List[Dict]) -> List[str]:
+    """임베딩할 문장 목록 (청크 간 중복 문장은 한 번만)"""
+    return list(dict.fromkeys(
+        sentence for chunk in chunks for sentence in split_sentences(chunk.get('text', ''))
+    ))
+
+
+def compress_chunks(chunks: List[Dict], query_vector: Sequence[float], sentences: List[str],
+                    sentence_vectors: Sequence[Sequence[float]], keep_ratio: float = 0.5) -> Tuple[List[Dict], Dict]:
+    """
+    청크마다 유사도 상위 ceil(keep_ratio * 문장 수)개 문장 + 숫자 포함 문장만 남긴 복사본 생성
+    sentences/sentence_vectors: unique_sentences() 결과와 같은 순서의 임베딩
+    Returns: (압축된 청크 - 원본 순서, 통계)
+    """
+    row_of = {sentence: row for row, sentence in enumerate(sentences)}
+
+    # 모든 문장 유사도를 한 번에 계산
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+    similarities = np.zeros(len(sentences), dtype=np.float32)
+    if sentences:
+        matrix = np.asarray(sentence_vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ query) / norms
+
+    compressed = []
+    sentences_in = sentences_kept = numeric_kept = 0
+
+    for chunk in chunks:
+        parts = split_sentences(chunk.get('text', ''))
+        if len(parts) <= 1:
+            compressed.append(chunk)
+            sentences_in += len(parts)
+            sentences_kept += len(parts)
+            continue
+
+        scores = np.array([similarities[row_of[part]] if part in row_of else 0.0 for part in parts])
+        keep_count = max(1, math.ceil(keep_ratio * len(parts)))
+        keep = set(np.argsort(-scores)[:keep_count].tolist())
+        numeric = {i for i, part in enumerate(parts) if HAS_NUMBER.search(part)}
+        numeric_kept += len(numeric - keep)
+        keep |= numeric
+
+        sentences_in += len(parts)
+        sentences_kept += len(keep)
+        compressed.append({**chunk, 'text': " ".join(part for i, part in enumerate(parts) if i in keep)})
+
+    tokens_before = sum(count_tokens(chunk.get('text', '')) for chunk in chunks)
+    tokens_after = sum(count_tokens(chunk.get('text', '')) for chunk in compressed)
+    stats = {
+        "sentences_in": sentences_in,
+        "sentences_kept": sentences_kept,
+        "numeric_kept": numeric_kept,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after
+    }
+    return compressed, stats
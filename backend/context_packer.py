@@ -0,0 +1,54 @@
+"""
+토큰 예산 기반 컨텍스트 패킹
+검색/융합/MMR 순위 그대로 청크를 프롬프트 토큰 예산 안에 채워 넣음 (로컬 토크나이저로 토큰 계산)
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o 토크나이저
+except Exception as e:  # 패키지 미설치 또는 인코딩 파일 다운로드 실패
+    print(f"⚠️  tiktoken 로드 실패 ({e}) → 글자 수 기반 토큰 추정 사용", file=sys.stderr, flush=True)
+    _encoding = None
+
+# "Document N: " 헤더와 구분 줄바꿈에 해당하는 청크당 추가 토큰
+CHUNK_OVERHEAD_TOKENS = 6
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 (tiktoken이 없으면 약 3글자당 1토큰으로 추정)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def pack_context(chunks: List[Dict], budget_tokens: int) -> Tuple[List[Dict], Dict]:
+    """
+    입력 순서(호출 측의 RRF/MMR 순위)대로 예산에 들어가는 청크만 선택
+    원시 코사인 score로 다시 정렬하지 않음 (융합/다양성 순위가 사라지므로)
+    예산을 넘는 청크는 건너뛰고 다음 청크를 계속 시도
+    Returns: (선택된 청크 - 입력 순서, 통계)
+    """
+    packed = []
+    dropped = []
+    tokens_used = 0
+
+    for chunk in chunks:
+        cost = count_tokens(chunk.get('text', '')) + CHUNK_OVERHEAD_TOKENS
+        if tokens_used + cost <= budget_tokens:
+            packed.append(chunk)
+            tokens_used += cost
+        else:
+            dropped.append(chunk)
+
+    stats = {
+        "budget_tokens": budget_tokens,
+        "tokens_used": tokens_used,
+        "chunks_in": len(chunks),
+        "chunks_kept": len(packed),
+        "chunks_dropped": len(dropped),
+        "dropped_ids": [chunk.get('id') for chunk in dropped]
+    }
+    return packed, stats
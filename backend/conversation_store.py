@@ -0,0 +1,88 @@
+"""
+서버 측 대화 컨텍스트 저장소
+세션 ID → 최근 대화 히스토리 + 이전 턴 컨텍스트 청크 ID
+클라이언트는 매 턴 세션 ID와 새 질문만 전송 (context_chunks/대화 히스토리 왕복 제거)
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class ConversationStore:
+    """
+    프로세스 내 세션 저장소
+    - 세션 수 한도(max_sessions) 초과 시 LRU 제거, TTL이 지난 세션은 조회 시 만료
+    - 세션당 히스토리(max_history 메시지)와 청크 ID(max_chunk_refs개) 개수 제한
+    """
+
+    def __init__(self, max_sessions: int = 2000, ttl_seconds: float = 3600.0,
+                 max_history: int = 6, max_chunk_refs: int = 5):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max_history
+        self.max_chunk_refs = max_chunk_refs
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def create(self, history: Optional[List[Dict]] = None) -> str:
+        """새 세션 생성 (기존 클라이언트 히스토리로 시작 가능)"""
+        session_id = uuid.uuid4().hex
+        self._sessions[session_id] = {
+            "history": [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in (history or [])[-self.max_history:]
+            ],
+            "chunk_refs": [],
+            "updated_at": time.monotonic()
+        }
+        self.created += 1
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """세션 조회 (없거나 만료되었으면 None)"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        if time.monotonic() - session["updated_at"] > self.ttl_seconds:
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def record_turn(self, session_id: str, question: str, answer: str, context_chunks: List[Dict]):
+        """턴 종료 시 질문/답변과 이번 컨텍스트 상위 청크 ID 저장"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        session["history"].append({"role": "user", "content": question})
+        session["history"].append({"role": "assistant", "content": answer})
+        session["history"] = session["history"][-self.max_history:]
+        session["chunk_refs"] = [
+            {"id": chunk["id"], "score": chunk.get("score", 0.0)}
+            for chunk in context_chunks if chunk.get("id")
+        ][:self.max_chunk_refs]
+        session["updated_at"] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+    def stats(self) -> Dict:
+        """저장소 통계"""
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
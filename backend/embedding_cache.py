@@ -0,0 +1,81 @@
+"""
+쿼리 임베딩 LRU + TTL 캐시
+(정규화된 쿼리 텍스트, 모델) → float32 벡터
+"""
+
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFKC, 소문자, 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class EmbeddingCache:
+    """
+    프로세스 내 임베딩 캐시
+    - 최대 항목 수 초과 시 가장 오래 사용되지 않은 항목부터 제거 (LRU)
+    - TTL이 지난 항목은 조회 시 만료 처리
+    - 벡터는 float32 배열로 저장 (Python float 리스트 대비 약 1/8 메모리)
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, text: str, model: str) -> Optional[np.ndarray]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        key = (normalize_query(text), model)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        vector, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, text: str, model: str, vector) -> np.ndarray:
+        """벡터를 float32로 변환하여 저장"""
+        key = (normalize_query(text), model)
+        array = np.asarray(vector, dtype=np.float32)
+        self._entries[key] = (array, time.monotonic())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return array
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "memory_bytes": sum(vector.nbytes for vector, _ in self._entries.values())
+        }
@@ -0,0 +1,191 @@
+"""
+여러 인덱스/네임스페이스 연합 검색
+- 한국 가이드라인 인덱스(medical-guidelines-kr)와 논문 인덱스(medical-guidelines)를 한 번에 검색
+- 대상별 MultiQueryRetriever를 동시에 실행, 대상별 타임아웃 → 느린 인덱스는 빈 결과로 처리
+- 대상별 점수 분포를 정규화한 순서(merge_score)로 쿼리마다 병합, 벡터 ID 기준 중복 제거
+  (score는 원래 코사인 그대로 → 적응형 K 선택이 약하게 일치한 인덱스의 청크를 잘라낼 수 있음)
+- MultiQueryRetriever와 같은 search/fetch 인터페이스 (main.py에서 그대로 교체)
+
+대상 지정 (FEDERATED_TARGETS, 쉼표 구분): index[/namespace][@timeout초]
+  예: medical-guidelines-kr,medical-guidelines@2.5,medical-guidelines/documents
+"""
+
+import sys
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+NORMALIZATION_MODES = ("minmax", "none")
+
+
+def parse_targets(spec: str, default_timeout: float) -> List[Dict]:
+    """FEDERATED_TARGETS 문자열 → [{"name", "index", "namespace", "timeout"}]"""
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, timeout = item.partition("@")
+        index_name, _, namespace = name.partition("/")
+        targets.append({
+            "name": name,
+            "index": index_name,
+            "namespace": namespace or None,
+            "timeout": float(timeout) if timeout else default_timeout
+        })
+    return targets
+
+
+def normalize_scores(per_target: List[List[Dict]]):
+    """
+    대상별 min-max 정규화 → [전체 최저 점수, 그 대상의 최고 점수] 범위로 다시 매핑해 merge_score에 기록 (제자리 수정)
+    점수 폭이 좁은 인덱스(한국어 질문 ↔ 영어 논문 등)도 하위 점수를 같은 바닥에 맞춰 병합 순서에서 비교하되,
+    상한은 대상 자신의 최고 코사인으로 고정 (전부 약하게 일치한 인덱스의 1위가 전체 1위로 올라가지 않도록)
+    score는 바꾸지 않음 → 적응형 K 선택의 상대 임계값이 약한 인덱스의 청크를 잘라낼 수 있음
+    """
+    scores = [chunk['score'] for chunks in per_target for chunk in chunks]
+    if not scores:
+        return
+    low = min(scores)
+
+    for chunks in per_target:
+        if not chunks:
+            continue
+        target_low = min(chunk['score'] for chunk in chunks)
+        target_high = max(chunk['score'] for chunk in chunks)
+        for chunk in chunks:
+            chunk['merge_score'] = chunk['score']
+            if target_high > target_low:
+                chunk['merge_score'] = low + (chunk['score'] - target_low) / (target_high - target_low) * (target_high - low)
+
+
+def merge_target_results(per_target: List[List[Dict]], names: List[str], top_k: int,
+                         normalization: str = "minmax") -> List[Dict]:
+    """
+    한 쿼리의 대상별 결과 → merge_score 순 병합 (같은 ID는 높은 점수 유지, 청크에 target 기록)
+    정규화하지 않으면 merge_score = score
+    """
+    if normalization == "minmax":
+        normalize_scores(per_target)
+    else:
+        for chunks in per_target:
+            for chunk in chunks:
+                chunk['merge_score'] = chunk['score']
+
+    merged: Dict[str, Dict] = {}
+    for name, chunks in zip(names, per_target):
+        for chunk in chunks:
+            existing = merged.get(chunk['id'])
+            if existing is None or chunk['merge_score'] > existing['merge_score']:
+                merged[chunk['id']] = {**chunk, 'target': name}
+
+    return sorted(merged.values(), key=lambda c: c['merge_score'], reverse=True)[:top_k]
+
+
+class FederatedRetriever:
+    """대상별 MultiQueryRetriever를 동시에 실행하고 쿼리별로 결과를 병합"""
+
+    def __init__(self, targets: List[Tuple[str, object]], normalization: str = "minmax"):
+        self.targets = targets  # [(이름, MultiQueryRetriever)]
+        self.names = [name for name, _ in targets]
+        self.normalization = normalization if normalization in NORMALIZATION_MODES else "minmax"
+
+    async def _search_target(self, name: str, retriever, embeddings, top_k, sparse_vectors, query_kwargs):
+        """대상 하나 검색 (오류가 나도 다른 대상 결과로 답변할 수 있도록 빈 결과로 처리)"""
+        try:
+            return await retriever.search(embeddings, top_k=top_k, sparse_vectors=sparse_vectors, **query_kwargs)
+        except Exception as e:
+            print(f"⚠️  연합 검색 대상 '{name}' 오류: {e}", file=sys.stderr, flush=True)
+            return [[] for _ in embeddings], {"latencies_ms": [], "wall_ms": 0.0, "timeouts": 0, "errors": len(embeddings),
+                                              "payload_bytes": 0, "error": True}
+
+    async def search(self, embeddings: List[List[float]], top_k: int = 15,
+                     sparse_vectors: Optional[List[Optional[Dict]]] = None, **query_kwargs) -> Tuple[List[List[Dict]], Dict]:
+        """
+        모든 대상에 같은 쿼리를 동시에 보내고 쿼리별로 병합
+        Returns: (쿼리별 chunks 리스트, 지연시간 통계 + 대상별 통계)
+        """
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*[
+            self._search_target(name, retriever, embeddings, top_k, sparse_vectors, query_kwargs)
+            for name, retriever in self.targets
+        ])
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        merged = [
+            merge_target_results([results[i] for results, _ in outcomes], self.names, top_k, self.normalization)
+            for i in range(len(embeddings))
+        ]
+
+        target_stats = {
+            name: {
+                "wall_ms": stats["wall_ms"],
+                "timeouts": stats["timeouts"],
+                "hits": sum(len(chunks) for chunks in results),
+                "kept": sum(1 for chunks in merged for chunk in chunks if chunk['target'] == name),
+                "error": stats.get("error", False) or stats.get("errors", 0) > 0
+            }
+            for name, (results, stats) in zip(self.names, outcomes)
+        }
+        stats = {
+            "latencies_ms": [
+                round(max((stats["latencies_ms"][i] for _, stats in outcomes if len(stats["latencies_ms"]) > i), default=0.0), 1)
+                for i in range(len(embeddings))
+            ],
+            "wall_ms": round(wall_ms, 1),
+            "sum_ms": round(sum(sum(stats["latencies_ms"]) for _, stats in outcomes), 1),
+            "max_ms": round(max((stats["wall_ms"] for _, stats in outcomes), default=0.0), 1),
+            "timeouts": sum(stats["timeouts"] for _, stats in outcomes),
+            "errors": sum(stats.get("errors", 0) for _, stats in outcomes),
+            "payload_bytes": sum(stats["payload_bytes"] for _, stats in outcomes),
+            "targets": target_stats
+        }
+
+        summary = " ".join(
+            f"{name}={target['wall_ms']:.0f}ms/{target['kept']}개" + ("(타임아웃)" if target["timeouts"] else "")
+            for name, target in target_stats.items()
+        )
+        print(f"🌐 연합 검색: {summary} → wall={stats['wall_ms']:.0f}ms", file=sys.stderr, flush=True)
+        return merged, stats
+
+    async def fetch(self, ids: List[str]) -> Tuple[Dict[str, Dict], Dict]:
+        """모든 대상에서 동시에 조회해 찾은 메타데이터 병합 (앞 대상 우선)"""
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*[retriever.fetch(ids) for _, retriever in self.targets], return_exceptions=True)
+
+        metadata: Dict[str, Dict] = {}
+        payload_bytes = 0
+        timed_out = False
+        failed = False
+        for name, outcome in zip(self.names, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"⚠️  연합 조회 대상 '{name}' 오류: {outcome}", file=sys.stderr, flush=True)
+                failed = True
+                continue
+            found, stats = outcome
+            for vector_id, fields in found.items():
+                metadata.setdefault(vector_id, fields)
+            payload_bytes += stats["payload_bytes"]
+            timed_out = timed_out or stats["timed_out"]
+            failed = failed or stats.get("failed", False)
+
+        stats = {
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "payload_bytes": payload_bytes,
+            "missing": sum(1 for vector_id in ids if vector_id not in metadata),
+            "timed_out": timed_out,
+            "failed": failed
+        }
+        return metadata, stats
+
+    def vector_counts(self) -> Dict[str, int]:
+        """대상별 벡터 수 (코퍼스 버전 계산용, 블로킹 호출)"""
+        counts = {}
+        for name, retriever in self.targets:
+            stats = retriever.index.describe_index_stats()
+            if retriever.namespace is not None:
+                summary = (stats.get('namespaces') or {}).get(retriever.namespace) or {}
+                counts[name] = summary.get('vector_count', 0) if isinstance(summary, dict) else getattr(summary, 'vector_count', 0)
+            else:
+                counts[name] = stats.get('total_vector_count', 0)
+        return counts
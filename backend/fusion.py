@@ -0,0 +1,63 @@
+"""
+멀티 쿼리 검색 결과 융합
+- Pinecone 벡터 ID 기준 중복 제거 (source/title/page 문자열 키는 XML 청크에서 충돌/누락)
+- rrf: 쿼리별 순위로 reciprocal rank fusion 점수 합산
+- max: 쿼리 중 최고 코사인 점수로 정렬
+- 청크마다 어느 쿼리에서 몇 위/몇 점으로 나왔는지(provenance) 기록
+"""
+
+from typing import Dict, List, Tuple
+
+FUSION_MODES = ("rrf", "max")
+
+# RRF 상수 (Cormack et al. 기본값)
+RRF_K = 60
+
+
+def chunk_key(chunk: Dict) -> str:
+    """중복 제거 키 (벡터 ID, 없으면 기존 문자열 키)"""
+    return chunk.get('id') or f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}_{chunk.get('page', 0)}"
+
+
+def fuse_results(per_query: List[List[Dict]], mode: str = "rrf", rrf_k: int = RRF_K) -> Tuple[List[Dict], Dict]:
+    """
+    쿼리별 검색 결과(각각 점수 순)를 하나의 순위로 융합
+    - 쿼리 내 순위: merge_score(연합 검색의 대상별 정규화 점수)가 있으면 그 기준, 없으면 score
+    - score: 쿼리 중 최고 코사인 점수 (적응형 K/패킹 기준은 그대로 코사인)
+    - fusion_score: rrf 합 또는 최고 코사인 점수
+    - provenance: [{"query": 쿼리 번호, "rank": 순위(0부터), "score": 코사인}]
+    Returns: (fusion_score 내림차순 청크, 통계)
+    """
+    fused: Dict[str, Dict] = {}
+    hits = 0
+
+    for query_idx, chunks in enumerate(per_query):
+        ranked = sorted(chunks, key=lambda c: c.get('merge_score', c.get('score', 0)), reverse=True)
+        for rank, chunk in enumerate(ranked):
+            hits += 1
+            key = chunk_key(chunk)
+            score = chunk.get('score', 0)
+
+            entry = fused.get(key)
+            if entry is None:
+                entry = {**chunk, 'score': score, 'rrf_score': 0.0, 'provenance': []}
+                fused[key] = entry
+            elif score > entry['score']:
+                entry['score'] = score
+
+            entry['rrf_score'] += 1.0 / (rrf_k + rank + 1)
+            entry['provenance'].append({"query": query_idx, "rank": rank, "score": round(score, 4)})
+
+    for entry in fused.values():
+        rrf_score = entry.pop('rrf_score')
+        entry['fusion_score'] = rrf_score if mode == "rrf" else entry['score']
+
+    ordered = sorted(fused.values(), key=lambda c: (c['fusion_score'], c['score']), reverse=True)
+    stats = {
+        "mode": mode,
+        "queries": len(per_query),
+        "hits": hits,
+        "unique": len(ordered),
+        "multi_query": sum(1 for chunk in ordered if len(chunk['provenance']) > 1)
+    }
+    return ordered, stats
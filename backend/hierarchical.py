@@ -0,0 +1,106 @@
+"""
+계층형 2단계 검색 (논문 → 청크)
+- 수집 시 논문마다 제목 + 초록으로 문서 벡터 1개를 "documents" 네임스페이스에 저장
+- 1단계: 확장 쿼리로 문서 벡터를 검색해 상위 N개 논문(PMCID) 선택
+- 2단계: 선택된 논문의 청크만 pmcid $in 필터로 검색 → 후보 집합 축소, 논문당 청크 수 제한
+- 문서 벡터가 없으면(기존 인덱스) None을 반환해 호출 측이 전체 청크 검색으로 대체
+"""
+
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SEARCH_SCOPES = ("flat", "hierarchical")
+
+DOCUMENTS_NAMESPACE = "documents"
+DOCUMENT_ID_PREFIX = "doc_"
+
+# 수집 스크립트의 청크 ID 형식: "{접두어}_{pmcid}_c{청크 번호}" (예: paper_PMC123_c4, frontvet_PMC123_c0)
+CHUNK_ID_PATTERN = re.compile(r"^[^_]+_(.+)_c\d+$")
+
+# 문서 벡터 입력 길이 제한 (초록 대부분 포함, 임베딩 토큰 한도 이내)
+DOCUMENT_TEXT_MAX_CHARS = 6000
+
+
+def document_vector_id(pmcid: str) -> str:
+    return f"{DOCUMENT_ID_PREFIX}{pmcid}"
+
+
+def document_vector_text(title: str, abstract: str) -> str:
+    """문서 벡터 입력 (제목 + 초록, 초록이 없으면 제목만)"""
+    text = f"{title or ''}\n\n{abstract or ''}".strip()
+    return text[:DOCUMENT_TEXT_MAX_CHARS]
+
+
+def rank_documents(per_query: List[List[Dict]], top_n: int) -> List[Tuple[str, float]]:
+    """쿼리별 문서 검색 결과 → 최고 점수 기준 상위 N개 (pmcid, score)"""
+    best: Dict[str, float] = {}
+    for matches in per_query:
+        for match in matches:
+            pmcid = match.get('pmcid') or match['id'][len(DOCUMENT_ID_PREFIX):]
+            if pmcid and match.get('score', 0) > best.get(pmcid, float('-inf')):
+                best[pmcid] = match.get('score', 0)
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_n]
+
+
+def chunk_pmcid(chunk: Dict) -> Optional[str]:
+    """청크의 논문 PMCID (메타데이터 없이 ID만 받는 two_phase 검색에서는 청크 ID에서 추출)"""
+    if chunk.get('pmcid'):
+        return chunk['pmcid']
+    match = CHUNK_ID_PATTERN.match(chunk.get('id') or "")
+    return match.group(1) if match else None
+
+
+def limit_per_document(chunks: List[Dict], max_per_document: int) -> Tuple[List[Dict], int]:
+    """
+    순위 순서를 유지하며 논문당 청크 수 제한 (pmcid 메타데이터도 없고 ID 형식도 다른 청크는 제한하지 않음)
+    Returns: (청크, 제외된 수)
+    """
+    if max_per_document <= 0:
+        return chunks, 0
+
+    counts: Dict[str, int] = {}
+    kept = []
+    for chunk in chunks:
+        pmcid = chunk_pmcid(chunk)
+        if pmcid:
+            counts[pmcid] = counts.get(pmcid, 0) + 1
+            if counts[pmcid] > max_per_document:
+                continue
+        kept.append(chunk)
+    return kept, len(chunks) - len(kept)
+
+
+async def hierarchical_search(retriever, embeddings: List[List[float]], top_documents: int, top_k: int,
+                              **query_kwargs) -> Optional[Tuple[List[List[Dict]], Dict]]:
+    """
+    1단계 문서 검색 → 2단계 필터 청크 검색 (MultiQueryRetriever.search와 같은 반환 형식)
+    query_kwargs는 2단계 청크 검색에만 전달 (sparse_vectors, include_values 등)
+    Returns: (쿼리별 청크, 통계) 또는 문서 벡터가 없으면 None
+    """
+    document_results, document_stats = await retriever.search(
+        embeddings, top_k=top_documents, namespace=DOCUMENTS_NAMESPACE, include_metadata=True
+    )
+    documents = rank_documents(document_results, top_documents)
+    if not documents:
+        print("⚠️  문서 벡터 검색 결과 없음 → 전체 청크 검색", file=sys.stderr, flush=True)
+        return None
+
+    pmcids = [pmcid for pmcid, _ in documents]
+    chunk_results, chunk_stats = await retriever.search(
+        embeddings, top_k=top_k, filter={"pmcid": {"$in": pmcids}}, **query_kwargs
+    )
+
+    stats = {
+        **chunk_stats,
+        "documents": len(pmcids),
+        "document_ms": document_stats["wall_ms"],
+        "chunk_ms": chunk_stats["wall_ms"],
+        "wall_ms": round(document_stats["wall_ms"] + chunk_stats["wall_ms"], 1),
+        "payload_bytes": document_stats["payload_bytes"] + chunk_stats["payload_bytes"],
+        "timeouts": document_stats["timeouts"] + chunk_stats["timeouts"],
+        "errors": document_stats.get("errors", 0) + chunk_stats.get("errors", 0)
+    }
+    print(f"📚 계층 검색: 논문 {len(pmcids)}개 ({document_stats['wall_ms']:.0f}ms, "
+          f"최고 {documents[0][1]:.3f}) → 청크 검색 {chunk_stats['wall_ms']:.0f}ms", file=sys.stderr, flush=True)
+    return chunk_results, stats
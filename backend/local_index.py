@@ -0,0 +1,443 @@
+"""
+로컬 벡터 인덱스 (IVF, 코사인 유사도)
+Pinecone 대신 백엔드 프로세스 안에서 검색 (오프라인 테스트, 지연시간/비용 절감용)
+- pinecone_index와 같은 인터페이스: query / fetch / upsert / describe_index_stats
+- 디스크에 저장하고 시작 시 np.load(mmap_mode='r')로 메모리 매핑
+- 벡터는 IVF 리스트(클러스터) 순서로 연속 저장 → nprobe개 리스트 구간만 행렬곱
+- float32 또는 int8(벡터별 스케일) 검색, 메타데이터 필터($eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and, $or)
+- 네임스페이스마다 하위 디렉터리, 그 안에 한 번 쓰면 바뀌지 않는 세그먼트 + manifest.json
+  - save(): 새 벡터를 기존 중심점에 배정해 새 세그먼트로 추가 (재학습 없음, 추가분만 기록)
+  - rebuild(): 모든 세그먼트를 모아 IVF 중심점을 다시 학습해 세그먼트 하나로 병합
+  - manifest.json은 임시 파일 → os.replace로 교체 → 실행 중인 백엔드가 매핑한 파일을 덮어쓰지 않음
+"""
+
+import os
+import json
+import math
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_LOCAL_INDEX_PATH = Path(__file__).parent / "data" / "local_index"
+DEFAULT_NAMESPACE_DIR = "__default__"
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_TRAIN = 50_000
+MANIFEST_FILE = "manifest.json"
+SEGMENT_FILES = ("meta.json", "vectors.npy", "codes.npy", "scales.npy", "offsets.npy", "centroids.npy",
+                 "ids.json", "metadata.jsonl")
+
+
+@dataclass
+class Match:
+    id: str
+    score: float
+    metadata: Optional[Dict] = None
+    values: List[float] = field(default_factory=list)
+
+
+@dataclass
+class QueryResponse:
+    matches: List[Match]
+
+
+@dataclass
+class Vector:
+    id: str
+    values: List[float]
+    metadata: Dict
+
+
+@dataclass
+class FetchResponse:
+    vectors: Dict[str, Vector]
+
+
+def local_index_path() -> Path:
+    """인덱스 디렉터리 경로 (LOCAL_INDEX_PATH 환경 변수 우선)"""
+    return Path(os.getenv("LOCAL_INDEX_PATH", str(DEFAULT_LOCAL_INDEX_PATH)))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"지원하지 않는 필터 연산자: {operator}")
+
+
+def matches_filter(metadata: Dict, filter: Optional[Dict]) -> bool:
+    """Pinecone 메타데이터 필터 문법 평가 (필드: 값 은 $eq로 취급)"""
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_compare(metadata.get(key), op, operand) for op, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """구면 k-means로 IVF 중심점 학습 (정규화된 벡터 입력)"""
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > KMEANS_MAX_TRAIN:
+        sample = vectors[rng.choice(len(vectors), KMEANS_MAX_TRAIN, replace=False)]
+
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = sample[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+            else:
+                # 빈 클러스터는 임의의 벡터로 재시작
+                centroids[cluster] = sample[rng.integers(len(sample))]
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+class _Segment:
+    """세그먼트 하나 (IVF 리스트 순서로 정렬된 벡터, 메모리 매핑)"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        info = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.dtype = info["dtype"]
+        self.offsets = np.load(directory / "offsets.npy")
+        # int8 세그먼트는 float32 원본을 저장하지 않을 수 있음 (값 조회 시 코드 × 스케일로 복원)
+        self.vectors = np.load(directory / "vectors.npy", mmap_mode="r") if (directory / "vectors.npy").exists() else None
+        if self.dtype == "int8":
+            self.codes = np.load(directory / "codes.npy", mmap_mode="r")
+            self.scales = np.load(directory / "scales.npy")
+        self.ids = json.loads((directory / "ids.json").read_text(encoding="utf-8"))
+        with open(directory / "metadata.jsonl", "r", encoding="utf-8") as f:
+            self.metadata = [json.loads(line) for line in f]
+
+    def score(self, start: int, end: int, query: np.ndarray) -> np.ndarray:
+        # 리스트가 연속 구간이므로 복사 없이 메모리 매핑 슬라이스에 바로 행렬곱
+        if self.dtype == "int8":
+            return (self.codes[start:end].astype(np.float32) @ query) * self.scales[start:end]
+        return self.vectors[start:end] @ query
+
+    def vector(self, row: int) -> np.ndarray:
+        if self.vectors is not None:
+            return np.asarray(self.vectors[row], dtype=np.float32)
+        return self.codes[row].astype(np.float32) * self.scales[row]
+
+
+class _Namespace:
+    """
+    네임스페이스 하나의 IVF 데이터 (manifest.json에 나열된 세그먼트, 공통 중심점)
+    같은 ID가 여러 세그먼트에 있으면 마지막 세그먼트의 벡터만 검색 대상
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        if (directory / MANIFEST_FILE).exists():
+            self.manifest = json.loads((directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        else:
+            # 세그먼트 도입 전 형식: 디렉터리 자체가 세그먼트 하나
+            info = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+            self.manifest = {"dim": info["dim"], "nlist": info["nlist"], "trained_count": info["count"],
+                             "centroids": "centroids.npy", "segments": ["."]}
+        self.dim = self.manifest["dim"]
+        self.centroids = np.load(directory / self.manifest["centroids"])
+        self.segments = [_Segment(directory / name) for name in self.manifest["segments"]]
+        self.dtype = self.segments[-1].dtype
+
+        # 전체 행 번호 = 세그먼트 시작 행 + 세그먼트 내 행
+        self.bases = np.cumsum([0] + [len(segment.ids) for segment in self.segments]).tolist()
+        self.ids = [vector_id for segment in self.segments for vector_id in segment.ids]
+        self.metadata = [metadata for segment in self.segments for metadata in segment.metadata]
+        self.row_of = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self.live = None
+        if len(self.row_of) < len(self.ids):
+            self.live = np.zeros(len(self.ids), dtype=bool)
+            self.live[list(self.row_of.values())] = True
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def _locate(self, row: int):
+        segment = int(np.searchsorted(self.bases, row, side="right")) - 1
+        return self.segments[segment], row - self.bases[segment]
+
+    def vector(self, row: int) -> np.ndarray:
+        segment, local_row = self._locate(row)
+        return segment.vector(local_row)
+
+    def live_items(self):
+        """검색 대상 벡터 전체 → (ID 목록, 정규화된 float32 행렬, 메타데이터 목록)"""
+        rows = sorted(self.row_of.values())
+        vectors = np.vstack([self.vector(row) for row in rows]) if rows else np.zeros((0, self.dim), np.float32)
+        return [self.ids[row] for row in rows], _normalize(vectors), [self.metadata[row] for row in rows]
+
+    def search(self, query: np.ndarray, top_k: int, nprobe: int, filter: Optional[Dict]):
+        """nprobe개 가까운 리스트만 검색 → (행 번호, 점수) 상위 top_k"""
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        parts, part_rows = [], []
+        for segment, base in zip(self.segments, self.bases):
+            for cluster in probe:
+                start, end = int(segment.offsets[cluster]), int(segment.offsets[cluster + 1])
+                if start < end:
+                    parts.append(segment.score(start, end, query))
+                    part_rows.append(np.arange(base + start, base + end))
+        if not parts:
+            return [], []
+        scores = np.concatenate(parts)
+        rows = np.concatenate(part_rows)
+        if self.live is not None:
+            keep = self.live[rows]
+            scores, rows = scores[keep], rows[keep]
+        if not len(rows):
+            return [], []
+
+        if not filter:
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return rows[best].tolist(), scores[best].tolist()
+
+        # 필터: 점수 순으로 훑으며 조건에 맞는 행만 top_k개까지
+        selected_rows, selected_scores = [], []
+        for i in np.argsort(-scores):
+            row = int(rows[i])
+            if matches_filter(self.metadata[row], filter):
+                selected_rows.append(row)
+                selected_scores.append(float(scores[i]))
+                if len(selected_rows) == top_k:
+                    break
+        return selected_rows, selected_scores
+
+
+class LocalIndex:
+    """
+    pinecone_index 대체용 로컬 인덱스
+    upsert는 메모리에 모아두고 save()에서 기존 중심점 기준 새 세그먼트로 추가,
+    중심점 재학습/세그먼트 병합은 rebuild()에서만 (data-pipeline/rebuild_local_index.py)
+    """
+
+    def __init__(self, path: Path, nprobe: int = 8, dtype: str = "float32", store_float32: Optional[bool] = None):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"지원하지 않는 dtype: {dtype}")
+        self.path = Path(path)
+        self.nprobe = nprobe
+        self.dtype = dtype
+        # int8은 기본적으로 코드/스케일만 저장 (float32 원본까지 쓰면 디스크 절감이 없음)
+        self.store_float32 = dtype == "float32" if store_float32 is None else store_float32
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._pending: Dict[str, Dict[str, Dict]] = {}
+
+        if self.path.exists():
+            for directory in sorted(self.path.iterdir()):
+                if (directory / MANIFEST_FILE).exists() or (directory / "meta.json").exists():
+                    self._namespaces[directory.name] = _Namespace(directory)
+
+    @staticmethod
+    def _dir_name(namespace: str) -> str:
+        return namespace or DEFAULT_NAMESPACE_DIR
+
+    # ---------------------------------------------------------------- 검색 (Pinecone 호환)
+
+    def query(self, vector: Sequence[float], top_k: int = 10, include_metadata: bool = False,
+              include_values: bool = False, filter: Optional[Dict] = None, namespace: str = "",
+              nprobe: Optional[int] = None, **kwargs) -> QueryResponse:
+        data = self._namespaces.get(self._dir_name(namespace))
+        if data is None:
+            return QueryResponse(matches=[])
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        rows, scores = data.search(query, top_k, min(nprobe or self.nprobe, len(data.centroids)), filter)
+
+        return QueryResponse(matches=[
+            Match(
+                id=data.ids[row],
+                score=float(score),
+                metadata=dict(data.metadata[row]) if include_metadata else None,
+                values=data.vector(row).tolist() if include_values else []
+            )
+            for row, score in zip(rows, scores)
+        ])
+
+    def fetch(self, ids: Sequence[str], namespace: str = "", **kwargs) -> FetchResponse:
+        data = self._namespaces.get(self._dir_name(namespace))
+        vectors = {}
+        if data is not None:
+            for vector_id in ids:
+                row = data.row_of.get(vector_id)
+                if row is not None:
+                    vectors[vector_id] = Vector(id=vector_id, values=data.vector(row).tolist(),
+                                                metadata=dict(data.metadata[row]))
+        return FetchResponse(vectors=vectors)
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        namespaces = {
+            ("" if name == DEFAULT_NAMESPACE_DIR else name): {"vector_count": len(data)}
+            for name, data in self._namespaces.items()
+        }
+        dims = [data.dim for data in self._namespaces.values()]
+        return {
+            "dimension": dims[0] if dims else 0,
+            "total_vector_count": sum(len(data) for data in self._namespaces.values()),
+            "namespaces": namespaces
+        }
+
+    # ---------------------------------------------------------------- 쓰기
+
+    def upsert(self, vectors: Sequence[Dict], namespace: str = "", **kwargs):
+        """{"id", "values", "metadata"} 목록 추가 (save() 전까지는 검색되지 않음)"""
+        pending = self._pending.setdefault(self._dir_name(namespace), {})
+        for vector in vectors:
+            pending[vector["id"]] = {"values": vector["values"], "metadata": vector.get("metadata") or {}}
+
+    def save(self, nlist: Optional[int] = None):
+        """
+        upsert된 벡터를 네임스페이스별 새 세그먼트로 추가 (추가분만 기록, 기존 파일은 그대로)
+        새 네임스페이스만 중심점을 학습 (nlist 기본값: √벡터 수), 이후에는 기존 중심점에 배정
+        """
+        for name, pending in self._pending.items():
+            if not pending:
+                continue
+
+            directory = self.path / name
+            ids = list(pending)
+            vectors = _normalize(np.vstack([np.asarray(item["values"], dtype=np.float32) for item in pending.values()]))
+            metadata = [item["metadata"] for item in pending.values()]
+
+            existing = self._namespaces.get(name)
+            segment = self._next_segment_name(directory)
+            if existing is None:
+                nlist = min(len(ids), nlist or max(1, int(math.sqrt(len(ids)))))
+                centroids = train_ivf(vectors, nlist)
+                directory.mkdir(parents=True, exist_ok=True)
+                manifest = {"dim": int(vectors.shape[1]), "nlist": nlist, "trained_count": len(ids),
+                            "centroids": f"centroids-{segment}.npy", "segments": []}
+                np.save(directory / manifest["centroids"], centroids)
+            else:
+                if vectors.shape[1] != existing.dim:
+                    raise ValueError(f"차원 불일치: {vectors.shape[1]} != {existing.dim} ({name})")
+                centroids = existing.centroids
+                manifest = dict(existing.manifest)
+
+            self._write_segment(directory / segment, ids, vectors, metadata, centroids)
+            manifest["segments"] = manifest["segments"] + [segment]
+            self._commit_manifest(directory, manifest)
+
+        self._pending = {}
+
+    def rebuild(self, nlist: Optional[int] = None, namespaces: Optional[Sequence[str]] = None):
+        """
+        네임스페이스의 모든 세그먼트를 모아 중심점을 다시 학습해 세그먼트 하나로 병합
+        (수집 중 추가된 세그먼트는 처음 학습한 중심점에 배정되어 있으므로 수집이 끝난 뒤 실행)
+        """
+        self.save(nlist)
+        names = [self._dir_name(namespace) for namespace in namespaces] if namespaces is not None else list(self._namespaces)
+        for name in names:
+            existing = self._namespaces.get(name)
+            if existing is None:
+                continue
+
+            directory = self.path / name
+            ids, vectors, metadata = existing.live_items()
+            if not ids:
+                continue
+            count = min(len(ids), nlist or max(1, int(math.sqrt(len(ids)))))
+            centroids = train_ivf(vectors, count)
+            segment = self._next_segment_name(directory)
+            np.save(directory / f"centroids-{segment}.npy", centroids)
+            self._write_segment(directory / segment, ids, vectors, metadata, centroids)
+            self._commit_manifest(directory, {"dim": existing.dim, "nlist": count, "trained_count": len(ids),
+                                              "centroids": f"centroids-{segment}.npy", "segments": [segment]})
+            self._remove_unreferenced(directory, existing.manifest)
+
+    @staticmethod
+    def _next_segment_name(directory: Path) -> str:
+        numbers = [int(path.name[4:]) for path in directory.glob("seg-*") if path.name[4:].isdigit()] if directory.exists() else []
+        return f"seg-{max(numbers, default=0) + 1:06d}"
+
+    def _commit_manifest(self, directory: Path, manifest: Dict):
+        """manifest.json을 원자적으로 교체 → 다른 프로세스는 이전 또는 새 세그먼트 목록만 보게 됨"""
+        temp = directory / f"{MANIFEST_FILE}.tmp"
+        temp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temp, directory / MANIFEST_FILE)
+        self._namespaces[directory.name] = _Namespace(directory)
+
+    @staticmethod
+    def _remove_unreferenced(directory: Path, old_manifest: Dict):
+        """rebuild로 대체된 이전 세그먼트/중심점 삭제 (POSIX에서는 매핑 중인 파일도 매핑이 풀릴 때까지 유지됨)"""
+        for name in old_manifest["segments"]:
+            if name == ".":
+                for filename in SEGMENT_FILES:
+                    (directory / filename).unlink(missing_ok=True)
+            else:
+                shutil.rmtree(directory / name, ignore_errors=True)
+        if old_manifest["centroids"] != "centroids.npy":
+            (directory / old_manifest["centroids"]).unlink(missing_ok=True)
+
+    def _write_segment(self, directory: Path, ids: List[str], vectors: np.ndarray,
+                       metadata: List[Dict], centroids: np.ndarray):
+        """새 세그먼트 디렉터리에 기록 (기존 파일은 절대 덮어쓰지 않음)"""
+        nlist = len(centroids)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        # 리스트 순서로 정렬 → 리스트마다 연속 구간
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        sorted_vectors = np.ascontiguousarray(vectors[order], dtype=np.float32)
+
+        directory.mkdir(parents=True)
+        np.save(directory / "offsets.npy", offsets)
+        if self.dtype == "float32" or self.store_float32:
+            np.save(directory / "vectors.npy", sorted_vectors)
+        if self.dtype == "int8":
+            scales = np.abs(sorted_vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            np.save(directory / "codes.npy", np.round(sorted_vectors / scales[:, None]).astype(np.int8))
+            np.save(directory / "scales.npy", scales.astype(np.float32))
+        (directory / "ids.json").write_text(json.dumps([ids[i] for i in order]), encoding="utf-8")
+        with open(directory / "metadata.jsonl", "w", encoding="utf-8") as f:
+            for i in order:
+                f.write(json.dumps(metadata[i], ensure_ascii=False) + "\n")
+        (directory / "meta.json").write_text(json.dumps({
+            "dim": int(vectors.shape[1]),
+            "dtype": self.dtype,
+            "count": len(ids),
+            "nlist": nlist
+        }), encoding="utf-8")
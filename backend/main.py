@@ -10,6 +10,9 @@ import json
 import asyncio
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import List, Dict, AsyncGenerator, Set, Tuple, Optional
 from pathlib import Path
 
@@ -19,9 +22,29 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pinecone import Pinecone
 
+from retrieval import MultiQueryRetriever, search_reusing
+from embedding_cache import EmbeddingCache
+from response_cache import ResponseCache, iter_replay_chunks
+from semantic_cache import SemanticCache
+from citation_stream import CitationStreamParser
+from sse_output import StreamOutputStage
+from conversation_store import ConversationStore
+from context_packer import pack_context
+from context_assembly import group_chunks_by_document, assemble_context
+from context_compression import COMPRESSION_MODES, unique_sentences, compress_chunks
+from selection import SELECTION_MODES, select_adaptive, mmr_select
+from fusion import FUSION_MODES, fuse_results
+from chunk_store import ChunkStore, chunk_store_path
+from local_index import LocalIndex, local_index_path
+from sparse_encoder import index_metric, load_sparse_encoder, scale_sparse, sparse_vocab_path
+from hierarchical import SEARCH_SCOPES, hierarchical_search, limit_per_document
+from federation import FederatedRetriever, parse_targets
+from term_expansion import EXPANSION_MODES, load_term_expander, vet_terms_path
+from speculation import SPECULATION_MODES, SpeculativeStream, accept_speculation
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -51,13 +74,175 @@ else:
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr")
+PINECONE_MAX_WORKERS = int(os.getenv("PINECONE_MAX_WORKERS", "16"))
+RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "32"))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "5.0"))
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "5000"))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "50"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "21600"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# SSE 출력 모드: passthrough | coalesce | paced (요청별 stream_mode로 변경 가능)
+SSE_STREAM_MODE = os.getenv("SSE_STREAM_MODE", "coalesce")
+SSE_FLUSH_MS = float(os.getenv("SSE_FLUSH_MS", "25"))
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", "256"))
+SSE_PACING_MS = float(os.getenv("SSE_PACING_MS", "10"))
+# 후속 질문 생성에 사용하는 답변 앞부분 길이 (이만큼 스트리밍되면 생성 시작)
+FOLLOWUP_PREFIX_CHARS = int(os.getenv("FOLLOWUP_PREFIX_CHARS", "800"))
+# 서버 측 대화 세션 저장소
+CONVERSATION_STORE_SIZE = int(os.getenv("CONVERSATION_STORE_SIZE", "2000"))
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+# 생성 프롬프트에 넣을 컨텍스트 토큰 예산
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_COMPRESSION_MODE = os.getenv("CONTEXT_COMPRESSION_MODE", "off")  # off | extractive
+CONTEXT_COMPRESSION_KEEP_RATIO = float(os.getenv("CONTEXT_COMPRESSION_KEEP_RATIO", "0.5"))
+SENTENCE_EMBEDDING_CACHE_SIZE = int(os.getenv("SENTENCE_EMBEDDING_CACHE_SIZE", "20000"))
+CONTEXT_MIN_K = int(os.getenv("CONTEXT_MIN_K", "5"))
+CONTEXT_MAX_K = int(os.getenv("CONTEXT_MAX_K", "25"))
+CONTEXT_RELATIVE_THRESHOLD = float(os.getenv("CONTEXT_RELATIVE_THRESHOLD", "0.8"))  # 최고 점수 대비 비율
+CONTEXT_MAX_SCORE_GAP = float(os.getenv("CONTEXT_MAX_SCORE_GAP", "0.08"))  # 연속 점수 차이 한도
+CONTEXT_SELECTION_MODE = os.getenv("CONTEXT_SELECTION_MODE", "score")  # score | mmr
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1.0 = 관련도만, 0.0 = 다양성만
+FUSION_MODE = os.getenv("FUSION_MODE", "rrf")  # rrf | max
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "single")  # single | two_phase
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # pinecone | local
+LOCAL_INDEX_PATH = local_index_path()
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "16"))
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "1.0"))  # 1.0 = 밀집 검색만, 0.0 = 희소(BM25)만
+SEARCH_SCOPE = os.getenv("SEARCH_SCOPE", "flat")  # flat | hierarchical (논문 문서 벡터 → 해당 논문 청크)
+DOCUMENT_TOP_N = int(os.getenv("DOCUMENT_TOP_N", "20"))  # 계층 검색 1단계에서 고르는 논문 수
+DOCUMENT_MAX_CHUNKS = int(os.getenv("DOCUMENT_MAX_CHUNKS", "3"))  # 계층 검색 시 논문당 최대 청크 수 (0 = 제한 없음)
+# 연합 검색 대상 (쉼표 구분 index[/namespace][@timeout초], 비우면 PINECONE_INDEX_NAME 하나만 검색)
+FEDERATED_TARGETS = parse_targets(os.getenv("FEDERATED_TARGETS", ""), default_timeout=RETRIEVAL_TIMEOUT_SECONDS)
+FEDERATED_SCORE_NORMALIZATION = os.getenv("FEDERATED_SCORE_NORMALIZATION", "minmax")  # minmax | none
+QUERY_EXPANSION_MODE = os.getenv("QUERY_EXPANSION_MODE", "local")  # local | llm | hybrid (사전 매칭 없을 때만 LLM)
+QUERY_EXPANSION_LANGUAGE = os.getenv("QUERY_EXPANSION_LANGUAGE", "English")  # LLM 확장 언어 (논문 코퍼스는 영어)
+SPECULATION_MODE = os.getenv("SPECULATION_MODE", "off")  # off | on (원본 질문 검색으로 확장 검색 전에 생성 시작)
+SPECULATION_MAX_CONTEXT_CHANGE = float(os.getenv("SPECULATION_MAX_CONTEXT_CHANGE", "0.3"))  # 추측 채택 기준 (1 - Jaccard)
+# 코퍼스 버전 (미설정 시 인덱스 이름 + 벡터 수로 자동 결정)
+CORPUS_VERSION = os.getenv("CORPUS_VERSION", "")
+CORPUS_VERSION_REFRESH_SECONDS = float(os.getenv("CORPUS_VERSION_REFRESH_SECONDS", "300"))
+
+# OpenAI 클라이언트 (비동기 - 이벤트 루프를 막지 않음)
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+# 벡터 인덱스: Pinecone 또는 프로세스 내 로컬 IVF 인덱스 (같은 query/fetch/describe_index_stats 인터페이스)
+if VECTOR_BACKEND == "local":
+    pinecone_index = LocalIndex(LOCAL_INDEX_PATH, nprobe=LOCAL_INDEX_NPROBE)
+    print(f"✅ 로컬 벡터 인덱스 로드: {LOCAL_INDEX_PATH} "
+          f"({pinecone_index.describe_index_stats()['total_vector_count']:,}개 벡터)", file=sys.stderr, flush=True)
+else:
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    pinecone_index = pc.Index(PINECONE_INDEX_NAME)
+
+# Pinecone SDK는 동기 방식 → 제한된 스레드 풀에서 실행
+pinecone_executor = ThreadPoolExecutor(max_workers=PINECONE_MAX_WORKERS, thread_name_prefix="pinecone")
+
+# 확장 쿼리 검색 전용 (동시 실행 + 쿼리별 타임아웃)
+# 연합 검색: 대상 인덱스/네임스페이스마다 검색기를 두고 동시에 실행 (대상별 타임아웃)
+if FEDERATED_TARGETS and VECTOR_BACKEND != "local":
+    retriever = FederatedRetriever(
+        [
+            (target["name"], MultiQueryRetriever(
+                pc.Index(target["index"]),
+                max_workers=RETRIEVAL_MAX_WORKERS,
+                timeout=target["timeout"],
+                namespace=target["namespace"]
+            ))
+            for target in FEDERATED_TARGETS
+        ],
+        normalization=FEDERATED_SCORE_NORMALIZATION
+    )
+    target_summary = ", ".join(f"{target['name']}({target['timeout']}s)" for target in FEDERATED_TARGETS)
+    print(f"✅ 연합 검색 대상: {target_summary}", file=sys.stderr, flush=True)
+else:
+    retriever = MultiQueryRetriever(pinecone_index, max_workers=RETRIEVAL_MAX_WORKERS, timeout=RETRIEVAL_TIMEOUT_SECONDS)
+
+# 로컬 청크 저장소 (슬림 메타데이터 인덱스의 청크 본문/문서 정보, 파일이 없으면 Pinecone 메타데이터 사용)
+CHUNK_STORE_PATH = chunk_store_path()
+chunk_store = ChunkStore(CHUNK_STORE_PATH, readonly=True) if CHUNK_STORE_PATH.exists() else None
+if chunk_store is not None:
+    print(f"✅ 청크 저장소 로드: {CHUNK_STORE_PATH}", file=sys.stderr, flush=True)
+
+# BM25 희소 벡터 인코더 (어휘 파일이 있을 때만 하이브리드 검색 가능, dotproduct 인덱스 필요)
+sparse_encoder = load_sparse_encoder()
+if sparse_encoder is not None:
+    # 희소-밀집 쿼리는 dotproduct 인덱스에서만 동작 → 시작 시 한 번 확인하고 아니면 하이브리드 비활성화
+    if VECTOR_BACKEND == "local":
+        hybrid_unsupported = ["local"]
+    else:
+        hybrid_indexes = {PINECONE_INDEX_NAME} | {target["index"] for target in FEDERATED_TARGETS}
+        hybrid_unsupported = [name for name in sorted(hybrid_indexes) if index_metric(pc, name) != "dotproduct"]
+    if hybrid_unsupported:
+        print(f"⚠️  dotproduct가 아닌 인덱스 {hybrid_unsupported} → 하이브리드 검색 비활성화", file=sys.stderr, flush=True)
+        sparse_encoder = None
+    else:
+        print(f"✅ 희소 벡터 어휘 로드: {sparse_vocab_path()} ({len(sparse_encoder.tokens):,}개 토큰)", file=sys.stderr, flush=True)
+
+# 수의학 용어 사전 (약어/동의어/상품명/한↔영 → 로컬 쿼리 확장, 없으면 LLM 확장)
+term_expander = load_term_expander()
+if term_expander is not None:
+    print(f"✅ 용어 사전 로드: {vet_terms_path()} ({len(term_expander.groups)}개 그룹, "
+          f"{len(term_expander.group_of)}개 용어)", file=sys.stderr, flush=True)
+
+# 쿼리 임베딩 캐시 (반복 질문의 임베딩 호출 생략)
+embedding_cache = EmbeddingCache(max_entries=EMBEDDING_CACHE_SIZE, ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS)
+
+# 전체 응답 캐시 (같은 질문 + 빈 대화 히스토리 → SSE 재생)
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    max_bytes=int(RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+    corpus_version=CORPUS_VERSION
+)
+corpus_version_checked_at = 0.0
+
+# 의미 기반 검색 결과 캐시 (유사 질문 → 쿼리 확장/Pinecone 검색 생략)
+semantic_cache = SemanticCache(dim=1536, capacity=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD)
+
+# 서버 측 대화 컨텍스트 (세션 ID → 히스토리 + 이전 청크 ID)
+conversation_store = ConversationStore(max_sessions=CONVERSATION_STORE_SIZE, ttl_seconds=CONVERSATION_TTL_SECONDS)
+
+# 답변 생성 프롬프트 캐시 통계 (OpenAI usage.prompt_tokens_details.cached_tokens 누적)
+prompt_cache_stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_hits": 0}
+
+# 컨텍스트 압축용 문장 임베딩 캐시 (쿼리 임베딩 캐시와 분리해 서로 밀어내지 않도록)
+sentence_embedding_cache = EmbeddingCache(max_entries=SENTENCE_EMBEDDING_CACHE_SIZE, ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS)
+
+# 압축 모드별 첫 토큰 시간(TTFT) 및 절감 토큰 누적
+compression_stats = {mode: {"requests": 0, "ttft_ms_total": 0.0, "tokens_saved": 0} for mode in COMPRESSION_MODES}
+
+# 검색 모드별 단계 지연시간/응답 크기 누적 (single: 메타데이터 포함 검색, two_phase: ID 검색 → 선택된 ID만 fetch)
+RETRIEVAL_MODES = ("single", "two_phase")
+retrieval_stats = {
+    mode: {"requests": 0, "search_ms": 0.0, "search_bytes": 0, "fetch_ms": 0.0, "fetch_bytes": 0,
+           "timeouts": 0, "errors": 0}
+    for mode in RETRIEVAL_MODES
+}
+
+# 검색 범위별 지연시간/후보 수 누적 (flat: 전체 청크, hierarchical: 문서 벡터 → 선택 논문 청크)
+search_scope_stats = {
+    scope: {"requests": 0, "search_ms": 0.0, "candidates": 0, "fallbacks": 0}
+    for scope in SEARCH_SCOPES
+}
 
-# OpenAI 클라이언트
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# 연합 검색 대상별 지연시간/타임아웃/최종 결과 기여 누적
+federation_stats = {
+    target["name"]: {"requests": 0, "wall_ms": 0.0, "timeouts": 0, "errors": 0, "kept": 0}
+    for target in (FEDERATED_TARGETS if isinstance(retriever, FederatedRetriever) else [])
+}
 
-# Pinecone 클라이언트
-pc = Pinecone(api_key=PINECONE_API_KEY)
-pinecone_index = pc.Index(PINECONE_INDEX_NAME)
+# 쿼리 확장 모드별 소요 시간 및 LLM 호출 수 누적
+expansion_stats = {mode: {"requests": 0, "ms_total": 0.0, "llm_calls": 0} for mode in EXPANSION_MODES}
+
+# 추측 실행 채택/거절 및 첫 토큰 시간 절감 누적
+speculation_stats = {"requests": 0, "accepted": 0, "rejected": 0, "ttft_saved_ms": 0.0, "context_change_total": 0.0}
+
+# 응답을 기다리지 않는 백그라운드 태스크 (참조를 유지해야 실행 중 GC되지 않음, 끝나면 제거)
+_background_tasks: Set[asyncio.Task] = set()
 
 # FastAPI 앱
 app = FastAPI(
@@ -87,8 +272,18 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     question: str
     conversation_history: List[Dict] = []
-    previous_context_chunks: List[Dict] = []  # 누적 컨텍스트
+    previous_context_chunks: List[Dict] = []  # 누적 컨텍스트 (session_id를 쓰지 않는 기존 클라이언트용)
+    session_id: Optional[str] = None  # 서버 측 대화 세션 (있으면 히스토리/이전 컨텍스트를 서버에서 사용)
+    include_context_chunks: bool = False  # done 이벤트에 context_chunks 포함 (previous_context_chunks로 직접 누적하는 기존 클라이언트용)
     language: str = "한국어"
+    stream_mode: Optional[str] = None  # passthrough | coalesce | paced (기본값: SSE_STREAM_MODE)
+    compression_mode: Optional[str] = None  # off | extractive (기본값: CONTEXT_COMPRESSION_MODE)
+    selection_mode: Optional[str] = None  # score | mmr (기본값: CONTEXT_SELECTION_MODE)
+    retrieval_mode: Optional[str] = None  # single | two_phase (기본값: RETRIEVAL_MODE)
+    hybrid_alpha: Optional[float] = None  # 밀집 가중치 0~1 (기본값: HYBRID_ALPHA)
+    search_scope: Optional[str] = None  # flat | hierarchical (기본값: SEARCH_SCOPE)
+    expansion_mode: Optional[str] = None  # local | llm | hybrid (기본값: QUERY_EXPANSION_MODE)
+    speculation_mode: Optional[str] = None  # off | on (기본값: SPECULATION_MODE)
 
 
 class Reference(BaseModel):
@@ -102,11 +297,242 @@ class Reference(BaseModel):
     relevance_score: float = 0.0
 
 
+async def run_blocking(func, *args, **kwargs):
+    """동기 함수(Pinecone 호출 등)를 스레드 풀에서 실행하여 이벤트 루프 블로킹 방지"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pinecone_executor, partial(func, *args, **kwargs))
+
+
+async def embed_queries(texts: List[str], cache: Optional[EmbeddingCache] = None) -> List[List[float]]:
+    """
+    여러 쿼리를 한 번의 embeddings.create 배치 호출로 임베딩 (입력 순서 유지)
+    캐시에 있는 쿼리는 건너뛰고, 캐시 미스만 배치로 요청
+    """
+    cache = cache or embedding_cache
+    vectors = [cache.get(text, EMBEDDING_MODEL) for text in texts]
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+
+    if missing:
+        response = await openai_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=missing
+        )
+        fetched = {
+            text: cache.put(text, EMBEDDING_MODEL, item.embedding)
+            for text, item in zip(missing, sorted(response.data, key=lambda d: d.index))
+        }
+        vectors = [vector if vector is not None else fetched[text] for text, vector in zip(texts, vectors)]
+
+    print(f"🧮 임베딩: {len(texts)}개 쿼리 중 캐시 히트 {len(texts) - len(missing)}개", file=sys.stderr, flush=True)
+    return [vector.tolist() for vector in vectors]
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """결과를 기다리지 않는 태스크 실행 (_background_tasks로 참조 유지, 예외는 로그로 회수)"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(log_background_error)
+    return task
+
+
+def log_background_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️  백그라운드 작업 실패: {task.exception()}", file=sys.stderr, flush=True)
+
+
+async def refresh_corpus_version():
+    """
+    코퍼스 버전 갱신 (CORPUS_VERSION_REFRESH_SECONDS마다 최대 1회)
+    CORPUS_VERSION이 설정되지 않았으면 인덱스 벡터 수로 버전을 정하고,
+    버전이 바뀌면 응답 캐시 전체 무효화
+    """
+    global corpus_version_checked_at
+    if CORPUS_VERSION or time.monotonic() - corpus_version_checked_at < CORPUS_VERSION_REFRESH_SECONDS:
+        return
+    corpus_version_checked_at = time.monotonic()
+
+    try:
+        if isinstance(retriever, FederatedRetriever):
+            counts = await run_blocking(retriever.vector_counts)
+            version = "+".join(f"{name}:{count}" for name, count in counts.items())
+        else:
+            stats = await run_blocking(pinecone_index.describe_index_stats)
+            version = f"{PINECONE_INDEX_NAME}:{stats.get('total_vector_count', 0)}"
+        if response_cache.set_corpus_version(version):
+            semantic_cache.clear()
+            print(f"🔄 코퍼스 버전 변경: {version} → 응답/의미 캐시 무효화", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"⚠️  코퍼스 버전 확인 실패: {e}", file=sys.stderr, flush=True)
+
+
+async def expand_query(question: str, mode: Optional[str] = None) -> List[str]:
+    """
+    쿼리 확장 (원본 포함 최대 3개)
+    local: 용어 사전만 (LLM 호출 없음), llm: gpt-4o-mini, hybrid: 사전 매칭이 없을 때만 LLM
+    """
+    mode = mode or QUERY_EXPANSION_MODE
+    if mode not in EXPANSION_MODES:
+        print(f"⚠️  알 수 없는 확장 모드 '{mode}' → local 사용", file=sys.stderr, flush=True)
+        mode = "local"
+
+    started = time.perf_counter()
+    stats = expansion_stats[mode]
+    stats["requests"] += 1
+
+    if mode != "llm" and term_expander is not None:
+        expanded_queries = term_expander.expand(question)
+        if len(expanded_queries) > 1 or mode == "local":
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats["ms_total"] += elapsed_ms
+            print(f"🔍 Query expansion(사전): {len(expanded_queries)} queries ({elapsed_ms * 1000:.0f}µs) "
+                  f"{expanded_queries[1:]}", file=sys.stderr, flush=True)
+            return expanded_queries
+
+    stats["llm_calls"] += 1
+    expanded_queries = await expand_query_llm(question)
+    stats["ms_total"] += (time.perf_counter() - started) * 1000
+    return expanded_queries
+
+
+def expands_locally(question: str, mode: Optional[str] = None) -> bool:
+    """expand_query가 LLM 호출 없이 사전만으로 끝나는지 (local, 또는 사전 매칭이 있는 hybrid)"""
+    mode = mode or QUERY_EXPANSION_MODE
+    if mode not in EXPANSION_MODES:
+        mode = "local"
+    if mode == "llm" or term_expander is None:
+        return False
+    return mode == "local" or len(term_expander.expand(question)) > 1
+
+
+async def expand_query_llm(question: str) -> List[str]:
+    """gpt-4o-mini로 대체 질문 생성 (원본 포함 최대 3개)"""
+    expansion_prompt = f"""Generate 2 alternative phrasings of this veterinary question in {QUERY_EXPANSION_LANGUAGE}:
+
+Original: {question}
+
+Return only the alternative questions, one per line."""
+
+    expansion_response = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": expansion_prompt}],
+        temperature=0.7,
+        max_tokens=100
+    )
+
+    expanded_queries = [question]  # 원본 포함
+    expansion_text = expansion_response.choices[0].message.content.strip()
+    for line in expansion_text.split('\n'):
+        if line.strip():
+            expanded_queries.append(line.strip())
+
+    expanded_queries = expanded_queries[:3]  # 최대 3개
+
+    print(f"🔍 Query expansion: {len(expanded_queries)} queries", file=sys.stderr, flush=True)
+    return expanded_queries
+
+
+async def hydrate_chunks(chunks: List[Dict]) -> List[Dict]:
+    """
+    본문(text)이 없는 청크를 로컬 청크 저장소에서 채움 (슬림 메타데이터 인덱스)
+    저장소에도 없는 청크, 저장소 파일이 없을 때의 본문 없는 청크는 제외 (빈 컨텍스트로 답변하지 않도록)
+    """
+    missing = [chunk['id'] for chunk in chunks if 'text' not in chunk and chunk.get('id')]
+    if not missing:
+        return chunks
+    if chunk_store is None:
+        print(f"⚠️  본문 없는 청크 {len(missing)}개 제외 - 슬림 메타데이터 인덱스인데 청크 저장소가 없음 "
+              f"({CHUNK_STORE_PATH})", file=sys.stderr, flush=True)
+        return [chunk for chunk in chunks if 'text' in chunk]
+
+    stored = await run_blocking(chunk_store.get_many, missing)
+    if len(stored) < len(missing):
+        print(f"⚠️  청크 저장소에 없는 청크 {len(missing) - len(stored)}개 제외", file=sys.stderr, flush=True)
+
+    return [
+        chunk if 'text' in chunk else {**stored[chunk['id']], **chunk}
+        for chunk in chunks
+        if 'text' in chunk or chunk.get('id') in stored
+    ]
+
+
+async def fetch_chunks_by_id(chunk_refs: List[Dict]) -> List[Dict]:
+    """세션에 저장된 청크 ID로 청크 메타데이터 조회 (연합 검색이면 모든 대상에서, 저장된 순서/점수 유지)"""
+    try:
+        metadata_by_id, _ = await retriever.fetch([ref["id"] for ref in chunk_refs])
+    except Exception as e:
+        print(f"⚠️  이전 컨텍스트 조회 실패: {e}", file=sys.stderr, flush=True)
+        return []
+
+    chunks = []
+    for ref in chunk_refs:
+        if ref["id"] not in metadata_by_id:
+            continue
+        chunk = dict(metadata_by_id[ref["id"]])
+        chunk['id'] = ref["id"]
+        chunk['score'] = ref["score"]
+        chunks.append(chunk)
+    return await hydrate_chunks(chunks)
+
+
+def cache_variant(request: QueryRequest, generation: bool = True) -> str:
+    """
+    캐시 키용 요청 모드 조합 (모드마다 검색 컨텍스트/답변이 달라지므로 다른 모드로 만든 캐시는 재사용하지 않음)
+    generation=False: 검색 컨텍스트에 영향을 주는 모드만 (의미 캐시용)
+    """
+    hybrid_alpha = request.hybrid_alpha if request.hybrid_alpha is not None else HYBRID_ALPHA
+    modes = [
+        ("expansion", request.expansion_mode or QUERY_EXPANSION_MODE),
+        ("retrieval", request.retrieval_mode or RETRIEVAL_MODE),
+        ("selection", request.selection_mode or CONTEXT_SELECTION_MODE),
+        ("scope", request.search_scope or SEARCH_SCOPE),
+        ("fusion", FUSION_MODE),
+        ("alpha", min(1.0, max(0.0, hybrid_alpha)) if sparse_encoder is not None else 1.0),
+        ("targets", ",".join(target["name"] for target in FEDERATED_TARGETS)
+         if isinstance(retriever, FederatedRetriever) else "")
+    ]
+    if generation:
+        modes.append(("compression", request.compression_mode or CONTEXT_COMPRESSION_MODE))
+        modes.append(("speculation", request.speculation_mode or SPECULATION_MODE))
+    return "|".join(f"{name}={value}" for name, value in modes)
+
+
 def create_sse_event(data: dict) -> str:
     """SSE 이벤트 생성"""
     return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
+def replay_cached_response(cached: Dict, session_id: str, include_chunks: bool = True):
+    """캐시된 응답을 일반 스트리밍과 같은 SSE 이벤트 순서로 재생"""
+    yield create_sse_event({
+        "status": "generating",
+        "message": "답변 생성 중..."
+    })
+    for chunk in iter_replay_chunks(cached["answer"]):
+        yield create_sse_event({
+            "status": "streaming",
+            "chunk": chunk
+        })
+    yield create_sse_event({
+        "status": "references_ready",
+        "answer": cached["answer"],
+        "references": cached["references"]
+    })
+    done_event = {
+        "status": "done",
+        "message": "완료",
+        "session_id": session_id
+    }
+    if include_chunks:
+        done_event["context_chunks"] = cached["context_chunks"]
+    yield create_sse_event(done_event)
+    if cached["followup_questions"]:
+        yield create_sse_event({
+            "status": "followup_ready",
+            "followup_questions": cached["followup_questions"]
+        })
+
+
 def extract_cited_indices(text: str) -> Set[int]:
     """
     텍스트에서 citation 번호 추출
@@ -122,24 +548,6 @@ def extract_cited_indices(text: str) -> Set[int]:
     return citations
 
 
-def group_chunks_by_document(chunks: List[Dict]) -> Tuple[List[str], Dict[str, List[Dict]]]:
-    """
-    청크들을 문서별로 그룹화
-    Returns: (doc_order, grouped_chunks)
-    """
-    seen_docs = {}
-    doc_order = []
-
-    for chunk in chunks:
-        ref_key = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}"
-        if ref_key not in seen_docs:
-            seen_docs[ref_key] = []
-            doc_order.append(ref_key)
-        seen_docs[ref_key].append(chunk)
-
-    return doc_order, seen_docs
-
-
 async def extract_references_from_answer(answer: str, doc_order: List[str], seen_docs: Dict) -> Tuple[str, List[Reference]]:
     """
     답변에서 실제 사용된 참고문헌만 추출하고 citation 번호를 재매핑
@@ -253,34 +661,27 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
         return answer, []
 
 
-async def generate_answer_stream(
-    question: str,
-    context_chunks: List[Dict],
-    language: str,
-    conversation_history: List[Dict]
-) -> AsyncGenerator[Tuple, None]:
-    """
-    GPT를 사용하여 답변 스트리밍 생성
-    Yields: (chunk_text, is_done) OR (full_answer, True, doc_order, seen_docs)
-    """
-    doc_order, seen_docs = group_chunks_by_document(context_chunks)
-    num_references = len(doc_order)
+def record_prompt_usage(usage):
+    """답변 생성 요청의 프롬프트/캐시 토큰 수 로그 및 누적"""
+    if usage is None:
+        return
 
-    print(f"🤖 generate_answer_stream started", file=sys.stderr, flush=True)
-    print(f"   question: {question[:50]}...", file=sys.stderr, flush=True)
-    print(f"   language: {language}", file=sys.stderr, flush=True)
-    print(f"   context_chunks: {len(context_chunks)}", file=sys.stderr, flush=True)
-    print(f"   doc_order: {len(doc_order)} documents", file=sys.stderr, flush=True)
-    print(f"   conversation_history: {len(conversation_history)} messages", file=sys.stderr, flush=True)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+    prompt_cache_stats["requests"] += 1
+    prompt_cache_stats["prompt_tokens"] += usage.prompt_tokens
+    prompt_cache_stats["cached_tokens"] += cached_tokens
+    if cached_tokens:
+        prompt_cache_stats["cache_hits"] += 1
 
-    # 컨텍스트 구성
-    context_text = "\n\n".join([
-        f"Document {i}: {chunk.get('text', '')}"
-        for i, chunk in enumerate(context_chunks[:25])
-    ])
+    print(f"💰 토큰 사용: prompt={usage.prompt_tokens} (cached={cached_tokens}), "
+          f"completion={usage.completion_tokens}", file=sys.stderr, flush=True)
 
-    # 시스템 프롬프트
-    system_prompt = f"""You are an EVIDENCE-BASED CITATION ENGINE for VETERINARY MEDICINE.
+
+# 시스템 프롬프트 (요청마다 바이트 단위로 동일 → OpenAI 프롬프트 프리픽스 캐시 적중)
+# 문서 수, 답변 언어 등 요청별 값은 user 메시지에만 넣을 것
+SYSTEM_PROMPT = """You are an EVIDENCE-BASED CITATION ENGINE for VETERINARY MEDICINE.
 
 Your role is to provide answers that are CLOSELY BASED on the provided veterinary literature, extracting and citing content from the references.
 
@@ -346,17 +747,17 @@ If the references don't contain specific dosages/protocols, you MUST say so expl
 ────────────────────────────────────────
 CITATION RULES
 ────────────────────────────────────────
-1. **ALWAYS cite sources** using {{{{citation:N}}}} format where N is the document index (0-based)
-2. **CRITICAL**: You have EXACTLY {num_references} documents available (indices 0 to {num_references-1})
-3. **NEVER cite document indices >= {num_references}** - such citations are INVALID and will be removed
+1. **ALWAYS cite sources** using {{citation:N}} format where N is the document index (0-based)
+2. **CRITICAL**: The user message states EXACTLY how many documents are available ("Available documents: N", indices 0 to N-1)
+3. **NEVER cite document indices >= N** - such citations are INVALID and will be removed
 4. **Place citations at the END of each paragraph** that uses information from sources
-5. **Multiple citations**: Use comma-separated indices like {{{{citation:0,1,2}}}}
+5. **Multiple citations**: Use comma-separated indices like {{citation:0,1,2}}
 6. **Every clinical claim MUST have a citation**
 7. **Do NOT make claims without citation support**
-8. **ONLY use document indices that exist in the provided references (0 to {num_references-1})**
+8. **ONLY use document indices that exist in the provided references (0 to N-1)**
 9. **PUNCTUATION PLACEMENT**: ALWAYS place periods, exclamation marks, and question marks BEFORE citations, not after
-   - ✅ Correct: "This is a sentence.{{{{citation:0}}}}"
-   - ❌ Wrong: "This is a sentence{{{{citation:0}}}}."
+   - ✅ Correct: "This is a sentence.{{citation:0}}"
+   - ❌ Wrong: "This is a sentence{{citation:0}}."
    - This prevents rendering issues during streaming
 
 ────────────────────────────────────────
@@ -372,7 +773,7 @@ CONTENT & FORMATTING REQUIREMENTS
 2. **Structure**:
    - Use **PARAGRAPH FORMAT** as default (3-5 substantive paragraphs)
    - Each paragraph should be 4-6 sentences covering a specific aspect
-   - Each paragraph MUST end with {{{{citation:X,Y,Z}}}}
+   - Each paragraph MUST end with {{citation:X,Y,Z}}
    - Start each paragraph with a topic sentence
 
 3. **Emphasis**:
@@ -386,27 +787,52 @@ CONTENT & FORMATTING REQUIREMENTS
    - Add citation after the table
 
 5. **Language**:
-   - Write in {language}
+   - Write in the answer language given in the user message
    - Use professional veterinary medical terminology
    - Be precise and clinically relevant
 
 EXAMPLE STRUCTURE:
 
-[Opening paragraph with detailed pathophysiology/background and specific clinical details. **Bold the most important clinical insight.** Include relevant statistics or mechanisms.]{{{{citation:0,1,2}}}}
+[Opening paragraph with detailed pathophysiology/background and specific clinical details. **Bold the most important clinical insight.** Include relevant statistics or mechanisms.]{{citation:0,1,2}}
 
-[Second paragraph focusing on diagnostic approaches, specific tests, interpretation criteria. **Bold critical diagnostic points.**]{{{{citation:3,4}}}}
+[Second paragraph focusing on diagnostic approaches, specific tests, interpretation criteria. **Bold critical diagnostic points.**]{{citation:3,4}}
 
-[Third paragraph on treatment protocols with specific dosages, monitoring parameters, contraindications. **Bold key treatment considerations.**]{{{{citation:5,6,7}}}}
+[Third paragraph on treatment protocols with specific dosages, monitoring parameters, contraindications. **Bold key treatment considerations.**]{{citation:5,6,7}}
 
 [Optional: Comparison table if needed]
 
-[Concluding paragraph with prognosis, complications to monitor, or clinical pearls. **Bold the take-home message.**]{{{{citation:8,9}}}}
-
-Available documents: 0 to {num_references-1}
+[Concluding paragraph with prognosis, complications to monitor, or clinical pearls. **Bold the take-home message.**]{{citation:8,9}}
 """
 
+
+async def generate_answer_stream(
+    question: str,
+    context_chunks: List[Dict],
+    language: str,
+    conversation_history: List[Dict]
+) -> AsyncGenerator[Tuple, None]:
+    """
+    GPT를 사용하여 답변 스트리밍 생성
+    Yields: (chunk_text, is_done) OR (full_answer, True, doc_order, seen_docs)
+    """
+    doc_order, seen_docs = group_chunks_by_document(context_chunks)
+    num_references = len(doc_order)
+
+    print(f"🤖 generate_answer_stream started", file=sys.stderr, flush=True)
+    print(f"   question: {question[:50]}...", file=sys.stderr, flush=True)
+    print(f"   language: {language}", file=sys.stderr, flush=True)
+    print(f"   context_chunks: {len(context_chunks)}", file=sys.stderr, flush=True)
+    print(f"   doc_order: {len(doc_order)} documents", file=sys.stderr, flush=True)
+    print(f"   conversation_history: {len(conversation_history)} messages", file=sys.stderr, flush=True)
+
+    # 컨텍스트 구성: 문서당 헤더 1개 (Document 번호 = citation 인덱스), 인접 청크 중복 제거
+    context_text, assembly_stats = assemble_context(doc_order, seen_docs)
+    print(f"🧩 컨텍스트 조립: {assembly_stats['chunks']} chunks → {assembly_stats['documents']} documents "
+          f"({assembly_stats['spans']} spans, overlap {assembly_stats['overlap_chars_removed']} chars 제거), "
+          f"{assembly_stats['naive_tokens']} → {assembly_stats['assembled_tokens']} tokens", file=sys.stderr, flush=True)
+
     # 메시지 구성
-    messages = [{"role": "system", "content": system_prompt}]
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
 
     # 대화 히스토리 추가
     for msg in conversation_history[-6:]:  # 최근 3턴
@@ -416,7 +842,10 @@ Available documents: 0 to {num_references-1}
         })
 
     # 현재 질문
-    user_message = f"""Question: {question}
+    user_message = f"""Available documents: {num_references} (indices 0 to {num_references-1}). NEVER cite indices >= {num_references}.
+Answer language: {language}
+
+Question: {question}
 
 Context (Documents 0-{num_references-1}):
 {context_text}
@@ -427,148 +856,47 @@ Provide a comprehensive, detailed clinical answer in {language} following the fo
 
     # GPT 스트리밍
     try:
-        stream = openai_client.chat.completions.create(
+        stream = await openai_client.chat.completions.create(
             model="gpt-4o",
             messages=messages,
             stream=True,
             temperature=0.3,
-            max_tokens=2000
+            max_tokens=2000,
+            stream_options={"include_usage": True}
         )
 
-        full_answer = ""  # 🔥 Cleaned answer (invalid citations removed)
-        buffer = ""
-        seen_citations = set()
+        # Citation 증분 파서: {{citation:...}} 패턴이 완성될 때까지 해당 부분만 보류
+        citation_parser = CitationStreamParser(num_references)
         chunk_num = 0
 
-        for chunk in stream:
+        usage = None
+
+        async for chunk in stream:
+            # include_usage: 마지막 청크는 choices 없이 usage만 포함
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
             if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                buffer += content  # 🔥 버퍼에만 원본 추가 (full_answer는 cleaned version 유지)
                 chunk_num += 1
+                output_chunk = citation_parser.feed(chunk.choices[0].delta.content)
 
-                # Citation 버퍼링: {{citation:...}} 패턴이 완성될 때까지 대기
-                output_chunk = ""
-
-                while buffer:
-                    # Citation 패턴 찾기
-                    match = re.search(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?', buffer)
-
-                    if match:
-                        # Citation 앞부분 출력
-                        before_citation = buffer[:match.start()]
-                        output_chunk += before_citation
-                        full_answer += before_citation  # 🔥 Cleaned answer에 추가
-
-                        # Citation 유효성 검증
-                        cite_nums_str = match.group(1)
-                        cite_nums = [int(n.strip()) for n in cite_nums_str.split(',')]
-
-                        valid_nums = []
-                        for cite_num in cite_nums:
-                            if 0 <= cite_num < num_references:
-                                valid_nums.append(cite_num)
-                                seen_citations.add(cite_num)
-                            else:
-                                print(f"⚠️  Invalid citation {{{{citation:{cite_num}}}}} removed", file=sys.stderr, flush=True)
-
-                        # 유효한 citation 출력
-                        if valid_nums:
-                            valid_citation = '{{citation:' + ','.join(map(str, valid_nums)) + '}}'
-                            output_chunk += valid_citation
-                            full_answer += valid_citation  # 🔥 Cleaned answer에 추가
-
-                        # Citation 이후 버퍼 업데이트
-                        buffer = buffer[match.end():]
-                    elif buffer and ('{{' in buffer[-10:] or buffer.endswith('{{')):
-                        # Citation 시작 가능성 - 버퍼 유지
-                        # 🔥 ONLY buffer if we see '{{' pattern (NOT single '{')
-                        # This prevents false positives where GPT outputs '{' as regular text
-
-                        # buffer에서 마지막 '{{' 위치 찾기
-                        last_double_brace_idx = buffer.rfind('{{')
-
-                        if last_double_brace_idx != -1:
-                            # '{{' 이후 텍스트 추출
-                            after_brace = buffer[last_double_brace_idx:]
-
-                            # Partial citation 패턴들 (MUST start with '{{', NOT single '{')
-                            partial_patterns = ['{{', '{{c', '{{ci', '{{cit', '{{cita', '{{citat',
-                                              '{{citati', '{{citatio', '{{citation', '{{citation:']
-
-                            is_partial = any(after_brace.startswith(p) for p in partial_patterns)
-
-                            if is_partial:
-                                # Partial citation - '{{' 앞까지만 출력
-                                if last_double_brace_idx > 0:
-                                    safe_chunk = buffer[:last_double_brace_idx]
-                                    output_chunk += safe_chunk
-                                    full_answer += safe_chunk
-                                    buffer = buffer[last_double_brace_idx:]  # '{{' 부터 버퍼에 유지
-                                break
-                            else:
-                                # '{{' 이후가 citation 패턴이 아님 - 전부 출력
-                                output_chunk += buffer
-                                full_answer += buffer
-                                buffer = ""
-                                break
-
-                        # 일반적인 긴 버퍼 처리
-                        if len(buffer) > 25:
-                            safe_chunk = buffer[:-25]
-                            output_chunk += safe_chunk
-                            full_answer += safe_chunk
-                            buffer = buffer[-25:]
-                        break
-                    else:
-                        # 안전하게 출력
-                        output_chunk += buffer
-                        full_answer += buffer  # 🔥 Cleaned answer에 추가
-                        buffer = ""
-                        break
-
-                # 청크 출력
+                # 청크 출력 (프레임 묶기/속도 조절은 StreamOutputStage에서 처리)
                 if output_chunk:
                     yield (output_chunk, False)
-                    await asyncio.sleep(0.01)  # 🔥 타이핑 속도 조절 (10ms 딜레이)
-
-        # 버퍼 비우기
-        if buffer:
-            print(f"📝 Flushing final buffer: '{buffer}'", file=sys.stderr, flush=True)
-
-            final_output = ""
-            while buffer:
-                match = re.search(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?', buffer)
-
-                if match:
-                    before_citation = buffer[:match.start()]
-                    final_output += before_citation
-
-                    cite_nums_str = match.group(1)
-                    cite_nums = [int(n.strip()) for n in cite_nums_str.split(',')]
-
-                    valid_nums = []
-                    for cite_num in cite_nums:
-                        if 0 <= cite_num < num_references:
-                            valid_nums.append(cite_num)
-                            seen_citations.add(cite_num)
-                        else:
-                            print(f"⚠️  Invalid citation {{{{citation:{cite_num}}}}} removed from final buffer", file=sys.stderr, flush=True)
-
-                    if valid_nums:
-                        valid_citation = '{{citation:' + ','.join(map(str, valid_nums)) + '}}'
-                        final_output += valid_citation
 
-                    buffer = buffer[match.end():]
-                else:
-                    final_output += buffer
-                    buffer = ""
+        # 보류 중인 버퍼 비우기
+        final_output = citation_parser.flush()
+        if final_output:
+            print(f"📝 Flushing final buffer: '{final_output}'", file=sys.stderr, flush=True)
+            yield (final_output, False)
 
-            if final_output:
-                full_answer += final_output
-                yield (final_output, False)
+        full_answer = citation_parser.answer  # 🔥 Cleaned answer (invalid citations removed)
+        seen_citations = citation_parser.seen_citations
 
         print(f"✅ Streaming complete. Seen citations: {sorted(seen_citations)}", file=sys.stderr, flush=True)
         print(f"   Total: {chunk_num} chunks, {len(full_answer)} chars", file=sys.stderr, flush=True)
+        record_prompt_usage(usage)
 
         # 최종 답변 반환
         yield (full_answer, True, doc_order, seen_docs)
@@ -594,7 +922,7 @@ async def generate_followup_questions(question: str, answer: str, conversation_h
         prompt = f"""Based on this veterinary medical Q&A, generate 3 SPECIFIC follow-up questions {language_instruction}.
 
 Question: {question}
-Answer: {answer[:800]}...
+Answer: {answer[:FOLLOWUP_PREFIX_CHARS]}...
 
 IMPORTANT: The follow-up questions must be:
 1. SPECIFIC to the clinical details mentioned in the answer (medications, procedures, findings, etc.)
@@ -614,7 +942,7 @@ Examples of BAD follow-up questions (too general):
 Generate 3 specific follow-up questions based on the actual content of the answer above.
 Return only the questions, one per line, without numbering or bullet points."""
 
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -640,7 +968,7 @@ async def health_check():
         openai_status = "connected" if openai_client else "disconnected"
 
         # Pinecone 연결 확인
-        stats = pinecone_index.describe_index_stats()
+        stats = await run_blocking(pinecone_index.describe_index_stats)
         pinecone_status = "connected"
         total_vectors = stats.get('total_vector_count', 0)
 
@@ -656,24 +984,337 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.on_event("startup")
+async def startup():
+    """시작 시 코퍼스 버전 확인"""
+    await refresh_corpus_version()
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """캐시 통계"""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "conversation_store": conversation_store.stats(),
+        "sentence_embedding_cache": sentence_embedding_cache.stats(),
+        "chunk_store": chunk_store.stats() if chunk_store is not None else None,
+        "compression": {
+            mode: {
+                "requests": stats["requests"],
+                "avg_ttft_ms": round(stats["ttft_ms_total"] / stats["requests"], 1) if stats["requests"] else 0.0,
+                "tokens_saved": stats["tokens_saved"]
+            }
+            for mode, stats in compression_stats.items()
+        },
+        "retrieval": {
+            mode: {
+                "requests": stats["requests"],
+                "timeouts": stats["timeouts"],
+                "errors": stats["errors"],
+                **{
+                    f"avg_{key}": round(stats[key] / stats["requests"], 1) if stats["requests"] else 0.0
+                    for key in ("search_ms", "search_bytes", "fetch_ms", "fetch_bytes")
+                }
+            }
+            for mode, stats in retrieval_stats.items()
+        },
+        "search_scope": {
+            scope: {
+                "requests": stats["requests"],
+                "fallbacks": stats["fallbacks"],
+                "avg_search_ms": round(stats["search_ms"] / stats["requests"], 1) if stats["requests"] else 0.0,
+                "avg_candidates": round(stats["candidates"] / stats["requests"], 1) if stats["requests"] else 0.0
+            }
+            for scope, stats in search_scope_stats.items()
+        },
+        "expansion": {
+            mode: {
+                "requests": stats["requests"],
+                "llm_calls": stats["llm_calls"],
+                "avg_ms": round(stats["ms_total"] / stats["requests"], 3) if stats["requests"] else 0.0
+            }
+            for mode, stats in expansion_stats.items()
+        },
+        "speculation": {
+            "requests": speculation_stats["requests"],
+            "accepted": speculation_stats["accepted"],
+            "rejected": speculation_stats["rejected"],
+            "acceptance_rate": round(speculation_stats["accepted"] / speculation_stats["requests"], 3)
+            if speculation_stats["requests"] else 0.0,
+            "avg_context_change": round(speculation_stats["context_change_total"] / speculation_stats["requests"], 3)
+            if speculation_stats["requests"] else 0.0,
+            "avg_ttft_saved_ms": round(speculation_stats["ttft_saved_ms"] / speculation_stats["accepted"], 1)
+            if speculation_stats["accepted"] else 0.0
+        },
+        "federation": {
+            name: {
+                "requests": stats["requests"],
+                "timeouts": stats["timeouts"],
+                "errors": stats["errors"],
+                "avg_wall_ms": round(stats["wall_ms"] / stats["requests"], 1) if stats["requests"] else 0.0,
+                "avg_kept": round(stats["kept"] / stats["requests"], 1) if stats["requests"] else 0.0
+            }
+            for name, stats in federation_stats.items()
+        },
+        "prompt_cache": {
+            **prompt_cache_stats,
+            "cached_ratio": round(prompt_cache_stats["cached_tokens"] / prompt_cache_stats["prompt_tokens"], 3)
+            if prompt_cache_stats["prompt_tokens"] else 0.0
+        }
+    }
+
+
+async def retrieve_context(request: QueryRequest, queries: List[str], embeddings: List[List[float]],
+                           question_embedding: List[float],
+                           search_cache: Optional[Dict[str, List[Dict]]] = None) -> List[Dict]:
+    """
+    검색 → 결과 융합 → 적응형 K 선택 (→ MMR) → 선택된 청크의 메타데이터/본문 조회
+    요청별 모드(선택/검색/하이브리드/범위)를 적용하고 단계별 통계 누적
+    search_cache: 같은 요청에서 이미 검색한 쿼리의 결과 재사용 (flat 범위만, 계층 검색은 문서 단계가 쿼리 묶음에 따라 달라짐)
+    """
+    # 병렬 검색 (쿼리별 타임아웃 + 지연시간 측정)
+    selection_mode = request.selection_mode or CONTEXT_SELECTION_MODE
+    if selection_mode not in SELECTION_MODES:
+        print(f"⚠️  알 수 없는 선택 모드 '{selection_mode}' → score 사용", file=sys.stderr, flush=True)
+        selection_mode = "score"
+
+    retrieval_mode = request.retrieval_mode or RETRIEVAL_MODE
+    if retrieval_mode not in RETRIEVAL_MODES:
+        print(f"⚠️  알 수 없는 검색 모드 '{retrieval_mode}' → single 사용", file=sys.stderr, flush=True)
+        retrieval_mode = "single"
+
+    # 하이브리드: 밀집 벡터 × alpha + BM25 희소 벡터 × (1 - alpha)
+    hybrid_alpha = request.hybrid_alpha if request.hybrid_alpha is not None else HYBRID_ALPHA
+    hybrid_alpha = min(1.0, max(0.0, hybrid_alpha))
+    search_embeddings = embeddings
+    sparse_vectors = None
+    if sparse_encoder is not None and hybrid_alpha < 1.0:
+        sparse_vectors = [
+            scale_sparse(sparse, 1.0 - hybrid_alpha) if sparse["indices"] else None
+            for sparse in (sparse_encoder.encode_query(query) for query in queries)
+        ]
+        search_embeddings = [[value * hybrid_alpha for value in embedding] for embedding in embeddings]
+        print(f"🧬 하이브리드 검색: alpha={hybrid_alpha}, 희소 토큰 "
+              f"{[len(sparse['indices']) if sparse else 0 for sparse in sparse_vectors]}", file=sys.stderr, flush=True)
+
+    search_scope = request.search_scope or SEARCH_SCOPE
+    if search_scope not in SEARCH_SCOPES:
+        print(f"⚠️  알 수 없는 검색 범위 '{search_scope}' → flat 사용", file=sys.stderr, flush=True)
+        search_scope = "flat"
+
+    # MMR은 청크 벡터가 필요하므로 이때만 include_values 요청
+    # two_phase: 메타데이터 없이 ID/점수만 받고, 최종 선택된 ID의 메타데이터만 나중에 조회
+    chunk_query_kwargs = {
+        "sparse_vectors": sparse_vectors,
+        "include_values": selection_mode == "mmr",
+        "include_metadata": retrieval_mode == "single"
+    }
+    hierarchical_result = None
+    if search_scope == "hierarchical":
+        # 문서 벡터가 아직 없으면 None → 전체 청크 검색으로 대체
+        hierarchical_result = await hierarchical_search(
+            retriever, search_embeddings, top_documents=DOCUMENT_TOP_N, top_k=15, **chunk_query_kwargs
+        )
+        if hierarchical_result is None:
+            search_scope_stats[search_scope]["fallbacks"] += 1
+    if hierarchical_result is not None:
+        all_search_results, search_stats = hierarchical_result
+    elif search_cache is not None:
+        all_search_results, search_stats = await search_reusing(
+            retriever, queries, search_embeddings, search_cache, top_k=15, **chunk_query_kwargs
+        )
+    else:
+        all_search_results, search_stats = await retriever.search(search_embeddings, top_k=15, **chunk_query_kwargs)
+
+    # 벡터 ID 기준 중복 제거 + 쿼리별 순위 융합
+    fusion_mode = FUSION_MODE if FUSION_MODE in FUSION_MODES else "rrf"
+    all_chunks, fusion_stats = fuse_results(all_search_results, mode=fusion_mode)
+    print(f"🔗 결과 융합({fusion_stats['mode']}): {fusion_stats['hits']}개 → 고유 {fusion_stats['unique']}개 "
+          f"(여러 쿼리에서 검색 {fusion_stats['multi_query']}개)", file=sys.stderr, flush=True)
+
+    # 계층 검색: 한 논문의 청크가 컨텍스트를 독차지하지 않도록 논문당 청크 수 제한
+    if hierarchical_result is not None:
+        all_chunks, dropped = limit_per_document(all_chunks, DOCUMENT_MAX_CHUNKS)
+        if dropped:
+            print(f"📚 논문당 최대 {DOCUMENT_MAX_CHUNKS}개 청크 → {dropped}개 제외", file=sys.stderr, flush=True)
+
+    for name, target in search_stats.get("targets", {}).items():
+        target_stats = federation_stats[name]
+        target_stats["requests"] += 1
+        target_stats["wall_ms"] += target["wall_ms"]
+        target_stats["timeouts"] += target["timeouts"]
+        target_stats["errors"] += int(target["error"])
+        target_stats["kept"] += target["kept"]
+
+    scope_stats = search_scope_stats[search_scope]
+    scope_stats["requests"] += 1
+    scope_stats["search_ms"] += search_stats["wall_ms"]
+    scope_stats["candidates"] += len(all_chunks)
+
+    # 유사도 점수 분포로 컨텍스트 크기(K) 결정 → 융합 순위 상위 K개 사용
+    # 하이브리드 점수(alpha × 코사인 + (1 - alpha) × BM25)는 코사인 기준 절대 간격과 맞지 않아 상대 기준만 사용
+    _, selection_stats = select_adaptive(
+        all_chunks,
+        min_k=CONTEXT_MIN_K,
+        max_k=CONTEXT_MAX_K,
+        relative_threshold=CONTEXT_RELATIVE_THRESHOLD,
+        max_gap=None if sparse_vectors else CONTEXT_MAX_SCORE_GAP
+    )
+    context_chunks = all_chunks[:selection_stats['k']]
+
+    print(f"✅ Query Expansion 검색 완료: {len(all_chunks)}개 청크 발견 → 상위 {selection_stats['k']}개 선택 "
+          f"({selection_stats['reason']}, score {selection_stats['best_score']} → {selection_stats['cutoff_score']})",
+          file=sys.stderr, flush=True)
+
+    # MMR: 같은 K개를 전체 후보에서 관련도와 다양성을 함께 고려해 다시 선택
+    if selection_mode == "mmr":
+        mmr_started = time.perf_counter()
+        mmr_chunks, mmr_stats = mmr_select(all_chunks, question_embedding, selection_stats['k'], lambda_mult=MMR_LAMBDA)
+        if mmr_chunks:
+            context_chunks = mmr_chunks
+        print(f"🔀 MMR 선택: 후보 {mmr_stats['candidates']}개 → {mmr_stats['k']}개 "
+              f"(최대 청크 간 유사도 {mmr_stats['max_redundancy']}, {(time.perf_counter() - mmr_started) * 1000:.2f}ms)",
+              file=sys.stderr, flush=True)
+
+    # 벡터 값은 선택에만 사용 (캐시/클라이언트 응답에 포함하지 않음)
+    for chunk in all_chunks:
+        chunk.pop('values', None)
+
+    # two_phase 두 번째 단계: 선택된 ID의 메타데이터(본문 포함)만 한 번에 조회
+    # 청크 저장소가 있으면 네트워크 없이 로컬에서, 없으면 Pinecone fetch
+    fetch_stats = {"latency_ms": 0.0, "payload_bytes": 0, "missing": 0}
+    if retrieval_mode == "two_phase" and context_chunks and chunk_store is None:
+        metadata_by_id, fetch_stats = await retriever.fetch([chunk['id'] for chunk in context_chunks])
+        context_chunks = [
+            {**metadata_by_id[chunk['id']], **chunk}
+            for chunk in context_chunks if chunk['id'] in metadata_by_id
+        ]
+
+    # 슬림 메타데이터 인덱스: 선택된 청크의 본문/문서 정보를 로컬 저장소에서 채움
+    hydrate_started = time.perf_counter()
+    selected_count = len(context_chunks)
+    context_chunks = await hydrate_chunks(context_chunks)
+    if chunk_store is not None:
+        fetch_stats["latency_ms"] += round((time.perf_counter() - hydrate_started) * 1000, 1)
+        fetch_stats["missing"] += selected_count - len(context_chunks)
+
+    mode_stats = retrieval_stats[retrieval_mode]
+    mode_stats["requests"] += 1
+    mode_stats["search_ms"] += search_stats["wall_ms"]
+    mode_stats["search_bytes"] += search_stats["payload_bytes"]
+    mode_stats["fetch_ms"] += fetch_stats["latency_ms"]
+    mode_stats["fetch_bytes"] += fetch_stats["payload_bytes"]
+    mode_stats["timeouts"] += search_stats["timeouts"] + int(fetch_stats.get("timed_out", False))
+    mode_stats["errors"] += search_stats.get("errors", 0) + int(fetch_stats.get("failed", False))
+    print(f"📏 검색 단계({retrieval_mode}): search {search_stats['wall_ms']:.0f}ms/{search_stats['payload_bytes']:,} bytes, "
+          f"fetch {fetch_stats['latency_ms']:.0f}ms/{fetch_stats['payload_bytes']:,} bytes"
+          + (f" (누락 {fetch_stats['missing']}개)" if fetch_stats["missing"] else ""), file=sys.stderr, flush=True)
+
+    return context_chunks
+
+
+async def prepare_context(question: str, question_embedding: List[float], context_chunks: List[Dict],
+                          previous_context_chunks: List[Dict], compression_mode: str) -> Tuple[List[Dict], List[Dict], int]:
+    """
+    검색 결과 → 답변 생성용 컨텍스트
+    이전 턴 청크 병합 → 토큰 예산 패킹 → (extractive 모드) 문장 압축
+    반환: (패킹된 컨텍스트, 생성 프롬프트용 청크, 압축으로 절감한 토큰 수)
+    """
+    context_chunks = list(context_chunks)
+
+    # 이전 컨텍스트 병합 (최대 5개)
+    if previous_context_chunks and len(previous_context_chunks) > 0:
+        print(f"🔄 이전 컨텍스트 {len(previous_context_chunks)}개 + 새 컨텍스트 {len(context_chunks)}개 병합", file=sys.stderr, flush=True)
+
+        existing_ids = {chunk.get('id') or chunk.get('chunk_id') for chunk in context_chunks}
+        existing_ids.discard(None)
+
+        added_count = 0
+        for prev_chunk in previous_context_chunks[:5]:
+            chunk_id = prev_chunk.get('id') or prev_chunk.get('chunk_id')
+            if chunk_id and chunk_id not in existing_ids:
+                context_chunks.append(prev_chunk)
+                existing_ids.add(chunk_id)
+                added_count += 1
+
+        print(f"   ✅ 이전 컨텍스트 {added_count}개 추가됨 (총 {len(context_chunks)}개)", file=sys.stderr, flush=True)
+
+    # 토큰 예산 안에서 검색 순위대로 컨텍스트 구성 (이전 컨텍스트는 뒤에 붙어 있으므로 새 검색 결과 우선)
+    context_chunks, packing_stats = pack_context(context_chunks, CONTEXT_TOKEN_BUDGET)
+    print(f"📦 컨텍스트 패킹: {packing_stats['chunks_in']}개 중 {packing_stats['chunks_kept']}개 사용, "
+          f"{packing_stats['tokens_used']:,}/{packing_stats['budget_tokens']:,} 토큰, "
+          f"{packing_stats['chunks_dropped']}개 제외 {packing_stats['dropped_ids']}", file=sys.stderr, flush=True)
+
+    if not context_chunks:
+        return [], [], 0
+
+    # 선택적 추출 압축: 질문과 관련 높은 문장 + 숫자 포함 문장만 프롬프트에 사용
+    generation_chunks = context_chunks
+    tokens_saved = 0
+    if compression_mode == "extractive":
+        compress_started = time.perf_counter()
+        sentences = unique_sentences(context_chunks)
+        sentence_vectors = await embed_queries(sentences, cache=sentence_embedding_cache) if sentences else []
+        generation_chunks, compression = compress_chunks(
+            context_chunks, question_embedding, sentences, sentence_vectors,
+            keep_ratio=CONTEXT_COMPRESSION_KEEP_RATIO
+        )
+        tokens_saved = compression["tokens_saved"]
+        print(f"🗜️  컨텍스트 압축: {compression['sentences_kept']}/{compression['sentences_in']} 문장 유지 "
+              f"(숫자 포함 {compression['numeric_kept']}개 추가), {compression['tokens_before']:,} → "
+              f"{compression['tokens_after']:,} 토큰, {(time.perf_counter() - compress_started) * 1000:.0f}ms",
+              file=sys.stderr, flush=True)
+
+    return context_chunks, generation_chunks, tokens_saved
+
+
 @app.post("/query-stream")
 async def query_stream(request: QueryRequest):
     """
     SSE 스트리밍으로 답변 생성
     """
     async def event_generator():
+        followup_task = None
+        previous_chunks_task = None
+        expanded_task = None
+        speculation = None
+        speculation_accepted = False
+        request_started = time.perf_counter()
         try:
             question = request.question
             conversation_history = request.conversation_history
             previous_context_chunks = request.previous_context_chunks
             language = request.language
 
+            # 서버 측 세션이 있으면 세션의 히스토리/이전 청크 사용 (없으면 요청 필드로 새 세션 시작)
+            session_id = request.session_id
+            session = conversation_store.get(session_id) if session_id else None
+            if session is not None:
+                conversation_history = list(session["history"])
+                if session["chunk_refs"]:
+                    previous_chunks_task = asyncio.create_task(fetch_chunks_by_id(session["chunk_refs"]))
+            elif session_id and not conversation_history:
+                # 세션 만료/서버 재시작: 빈 히스토리로 답하면 후속 질문 맥락이 사라짐 → 클라이언트가 로컬 히스토리로 재요청
+                print(f"⚠️  세션 만료 또는 없음: {session_id} → 클라이언트에 히스토리 재전송 요청", file=sys.stderr, flush=True)
+                yield create_sse_event({
+                    "status": "session_expired",
+                    "message": "대화 세션이 만료되었습니다. 대화 히스토리와 함께 다시 요청해주세요."
+                })
+                return
+            else:
+                if session_id:
+                    print(f"⚠️  세션 만료 또는 없음: {session_id} → 요청 히스토리로 새 세션 시작", file=sys.stderr, flush=True)
+                session_id = conversation_store.create(conversation_history)
+
             print(f"\n{'='*80}", file=sys.stderr, flush=True)
             print(f"📨 New query received", file=sys.stderr, flush=True)
             print(f"   Question: {question}", file=sys.stderr, flush=True)
             print(f"   Language: {language}", file=sys.stderr, flush=True)
             print(f"   Previous context: {len(previous_context_chunks)} chunks", file=sys.stderr, flush=True)
             print(f"   History: {len(conversation_history)} messages", file=sys.stderr, flush=True)
+            print(f"   Session: {session_id} ({'existing' if session is not None else 'new'})", file=sys.stderr, flush=True)
 
             # 1단계: 번역 (언어 감지)
             detected_lang = "Korean" if any(ord(c) >= 0xAC00 and ord(c) <= 0xD7A3 for c in question) else "English"
@@ -682,16 +1323,41 @@ async def query_stream(request: QueryRequest):
                 "message": "질문 이해 중..."
             })
 
+            # 응답 캐시: 대화 맥락이 없는 질문만 대상 (세션 ID가 있으면 후속 질문이므로 제외)
+            cacheable = (not request.session_id and not conversation_history and not previous_context_chunks
+                         and previous_chunks_task is None)
+            response_variant = cache_variant(request)
+            if cacheable:
+                run_in_background(refresh_corpus_version())
+                cached = response_cache.get(question, language, response_variant)
+                if cached is not None:
+                    print(f"⚡ 응답 캐시 히트 - Pinecone/GPT 호출 생략", file=sys.stderr, flush=True)
+                    conversation_store.record_turn(session_id, question, cached["answer"], cached["context_chunks"])
+                    for event in replay_cached_response(cached, session_id, include_chunks=request.include_context_chunks):
+                        yield event
+                    return
+
             # 2단계: 임베딩
+            # 사전 확장(µs 단위): 먼저 확장하고 원본 + 확장 쿼리를 한 번의 배치 호출로 임베딩
+            # LLM 확장: 원본 질문 임베딩과 동시에 시작 (의미 캐시 히트 시 취소)
             yield create_sse_event({
                 "status": "embedding",
                 "message": "벡터 변환 중..."
             })
 
-            query_embedding = openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=question
-            ).data[0].embedding
+            if expands_locally(question, request.expansion_mode):
+                expanded_queries = await expand_query(question, request.expansion_mode)
+                all_embeddings = await embed_queries(expanded_queries)
+                question_embedding = all_embeddings[0]
+                expansion_task = asyncio.get_running_loop().create_future()
+                expansion_task.set_result((expanded_queries, all_embeddings))
+            else:
+                async def expand_and_embed():
+                    expanded_queries = await expand_query(question, request.expansion_mode)
+                    return expanded_queries, await embed_queries(expanded_queries)
+
+                expansion_task = asyncio.create_task(expand_and_embed())
+                question_embedding = (await embed_queries([question]))[0]
 
             # 3단계: 검색
             yield create_sse_event({
@@ -699,88 +1365,97 @@ async def query_stream(request: QueryRequest):
                 "message": "문헌 검색 중..."
             })
 
-            # Query expansion (3개 쿼리)
-            expansion_prompt = f"""Generate 2 alternative phrasings of this veterinary question in Korean:
-
-Original: {question}
-
-Return only the alternative questions, one per line."""
-
-            expansion_response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": expansion_prompt}],
-                temperature=0.7,
-                max_tokens=100
-            )
-
-            expanded_queries = [question]  # 원본 포함
-            expansion_text = expansion_response.choices[0].message.content.strip()
-            for line in expansion_text.split('\n'):
-                if line.strip():
-                    expanded_queries.append(line.strip())
-
-            expanded_queries = expanded_queries[:3]  # 최대 3개
-
-            print(f"🔍 Query expansion: {len(expanded_queries)} queries", file=sys.stderr, flush=True)
-
-            # 모든 쿼리 임베딩 생성
-            all_embeddings = []
-            for exp_query in expanded_queries:
-                emb = openai_client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=exp_query
-                ).data[0].embedding
-                all_embeddings.append(emb)
-
-            # 병렬 검색
-            async def search_single_query(embedding, idx):
-                results = pinecone_index.query(
-                    vector=embedding,
-                    top_k=15,
-                    include_metadata=True
+            # 압축/추측 실행 모드 (추측 생성과 일반 생성 모두 같은 압축 모드 사용)
+            compression_mode = request.compression_mode or CONTEXT_COMPRESSION_MODE
+            if compression_mode not in COMPRESSION_MODES:
+                print(f"⚠️  알 수 없는 압축 모드 '{compression_mode}' → off 사용", file=sys.stderr, flush=True)
+                compression_mode = "off"
+
+            speculation_mode = request.speculation_mode or SPECULATION_MODE
+            if speculation_mode not in SPECULATION_MODES:
+                print(f"⚠️  알 수 없는 추측 실행 모드 '{speculation_mode}' → off 사용", file=sys.stderr, flush=True)
+                speculation_mode = "off"
+
+            answer_source = None  # 채택된 추측 생성 스트림 (없으면 최종 컨텍스트로 새로 생성)
+
+            context_variant = cache_variant(request, generation=False)
+            semantic_hit = semantic_cache.lookup(question_embedding, context_variant)
+            if semantic_hit is not None:
+                expansion_task.cancel()
+                cached_chunks, similarity = semantic_hit
+                context_chunks = list(cached_chunks)
+                print(f"⚡ 의미 캐시 히트 (유사도 {similarity:.4f}) - 쿼리 확장/검색 생략: {len(context_chunks)}개 청크", file=sys.stderr, flush=True)
+            elif speculation_mode == "on":
+                # 추측 실행: 확장 검색을 기다리지 않고 원본 질문 검색 결과로 답변 생성 시작 (토큰은 버퍼에만 쌓음)
+                # 원본 질문 검색 결과는 search_cache로 확장 검색에서 재사용 (같은 쿼리를 두 번 검색하지 않음)
+                search_cache: Dict[str, List[Dict]] = {}
+                speculative_task = asyncio.create_task(
+                    retrieve_context(request, [question], [question_embedding], question_embedding, search_cache)
                 )
-                chunks = []
-                for match in results.matches:
-                    chunk = match.metadata
-                    chunk['score'] = match.score
-                    chunks.append(chunk)
-                return chunks
-
-            search_tasks = [search_single_query(emb, idx) for idx, emb in enumerate(all_embeddings)]
-            all_search_results = await asyncio.gather(*search_tasks)
 
-            # 중복 제거
-            all_chunks = []
-            seen_chunk_ids = set()
+                async def retrieve_expanded():
+                    expanded_queries, all_embeddings = await expansion_task
+                    await speculative_task
+                    return await retrieve_context(request, expanded_queries, all_embeddings, question_embedding, search_cache)
 
-            for chunks in all_search_results:
-                for chunk in chunks:
-                    chunk_id = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}_{chunk.get('page', 0)}"
-                    if chunk_id not in seen_chunk_ids:
-                        all_chunks.append(chunk)
-                        seen_chunk_ids.add(chunk_id)
+                expanded_task = asyncio.create_task(retrieve_expanded())
+                speculative_chunks = await speculative_task
 
-            # 유사도 점수로 재정렬 및 상위 25개 선택
-            all_chunks.sort(key=lambda x: x.get('score', 0), reverse=True)
-            context_chunks = all_chunks[:25]
-
-            print(f"✅ Query Expansion 검색 완료: {len(all_chunks)}개 청크 발견 → 상위 25개 선택", file=sys.stderr, flush=True)
+                if previous_chunks_task is not None:
+                    previous_context_chunks = await previous_chunks_task
+                speculative_context = await prepare_context(
+                    question, question_embedding, speculative_chunks, previous_context_chunks, compression_mode
+                )
+                if speculative_context[0]:
+                    speculation = SpeculativeStream(
+                        generate_answer_stream(question, speculative_context[1], detected_lang, conversation_history)
+                    )
+
+                # 확장 검색 결과와 비교해 추측 생성 채택 여부 결정
+                try:
+                    context_chunks = await expanded_task
+                    expansion_error = None
+                except Exception as e:
+                    # 확장/확장 검색 실패: 이미 버퍼에 쌓인 추측 생성이 있으면 그대로 채택 (없으면 오류 전달)
+                    if speculation is None:
+                        raise
+                    context_chunks, expansion_error = speculative_chunks, e
+                    print(f"⚠️  확장 검색 실패 → 추측 생성 채택: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                speculation_decided_at = time.perf_counter()
+                if context_chunks and expansion_error is None:
+                    semantic_cache.add(question_embedding, context_chunks, context_variant)
+
+                if speculation is not None:
+                    speculation_accepted, change = accept_speculation(
+                        speculative_chunks, context_chunks, SPECULATION_MAX_CONTEXT_CHANGE, speculation_stats
+                    )
+                    waited_ms = (speculation_decided_at - speculation.started_at) * 1000
+                    if speculation_accepted:
+                        context_chunks, generation_chunks, tokens_saved = speculative_context
+                        answer_source = speculation.replay()
+                        print(f"🎲 추측 실행 채택: 컨텍스트 변화 {change:.2f} ≤ {SPECULATION_MAX_CONTEXT_CHANGE} "
+                              f"(확장 검색 대기 {waited_ms:.0f}ms 동안 생성 진행)", file=sys.stderr, flush=True)
+                    else:
+                        speculation.cancel()
+                        speculation = None
+                        print(f"🎲 추측 실행 거절: 컨텍스트 변화 {change:.2f} > {SPECULATION_MAX_CONTEXT_CHANGE} "
+                              f"→ 확장 검색 컨텍스트로 다시 생성", file=sys.stderr, flush=True)
+            else:
+                expanded_queries, all_embeddings = await expansion_task
 
-            # 이전 컨텍스트 병합 (최대 5개)
-            if previous_context_chunks and len(previous_context_chunks) > 0:
-                print(f"🔄 이전 컨텍스트 {len(previous_context_chunks)}개 + 새 컨텍스트 {len(context_chunks)}개 병합", file=sys.stderr, flush=True)
+                context_chunks = await retrieve_context(request, expanded_queries, all_embeddings, question_embedding)
 
-                existing_ids = {chunk.get('chunk_id') for chunk in context_chunks if chunk.get('chunk_id')}
+                if context_chunks:
+                    semantic_cache.add(question_embedding, context_chunks, context_variant)
 
-                added_count = 0
-                for prev_chunk in previous_context_chunks[:5]:
-                    chunk_id = prev_chunk.get('chunk_id')
-                    if chunk_id and chunk_id not in existing_ids:
-                        context_chunks.append(prev_chunk)
-                        existing_ids.add(chunk_id)
-                        added_count += 1
+            # 서버 세션에 저장된 이전 턴 청크 (검색과 동시에 Pinecone에서 조회)
+            if answer_source is None:
+                if previous_chunks_task is not None:
+                    previous_context_chunks = await previous_chunks_task
 
-                print(f"   ✅ 이전 컨텍스트 {added_count}개 추가됨 (총 {len(context_chunks)}개)", file=sys.stderr, flush=True)
+                context_chunks, generation_chunks, tokens_saved = await prepare_context(
+                    question, question_embedding, context_chunks, previous_context_chunks, compression_mode
+                )
 
             if not context_chunks:
                 error_message = "관련 문헌을 찾을 수 없습니다. 다른 질문을 시도해주세요."
@@ -802,11 +1477,49 @@ Return only the alternative questions, one per line."""
             doc_order = []
             seen_docs = {}
 
-            async for result in generate_answer_stream(question, context_chunks, detected_lang, conversation_history):
+            output_stage = StreamOutputStage(
+                mode=request.stream_mode or SSE_STREAM_MODE,
+                flush_ms=SSE_FLUSH_MS,
+                flush_bytes=SSE_FLUSH_BYTES,
+                pacing_ms=SSE_PACING_MS
+            )
+
+            streamed_parts = []
+            streamed_chars = 0
+
+            if answer_source is None:
+                answer_source = generate_answer_stream(question, generation_chunks, detected_lang, conversation_history)
+
+            async for result in output_stage.run(answer_source):
                 if len(result) == 2:  # 스트리밍 중
                     chunk_content, is_done = result
                     chunk_count += 1
 
+                    if chunk_count == 1:
+                        ttft_ms = (time.perf_counter() - request_started) * 1000
+                        mode_stats = compression_stats[compression_mode]
+                        mode_stats["requests"] += 1
+                        mode_stats["ttft_ms_total"] += ttft_ms
+                        mode_stats["tokens_saved"] += tokens_saved
+                        print(f"⚡ 첫 토큰까지 {ttft_ms:.0f}ms (압축 모드: {compression_mode})", file=sys.stderr, flush=True)
+                        if speculation_accepted:
+                            # 추측 없이 확장 검색 후 생성했다면 첫 토큰은 (결정 시점 + 생성 첫 토큰 지연)에 도착
+                            first_item_at = speculation.first_item_at or time.perf_counter()
+                            saved_ms = (min(first_item_at, speculation_decided_at) - speculation.started_at) * 1000
+                            speculation_stats["ttft_saved_ms"] += saved_ms
+                            print(f"🎲 추측 실행으로 첫 토큰 {saved_ms:.0f}ms 단축", file=sys.stderr, flush=True)
+                    streamed_parts.append(chunk_content)
+                    streamed_chars += len(chunk_content)
+
+                    # 후속 질문은 답변 앞부분만 사용 → 앞부분이 모이면 나머지 스트리밍과 동시에 생성 시작
+                    if followup_task is None and streamed_chars >= FOLLOWUP_PREFIX_CHARS:
+                        answer_prefix = "".join(streamed_parts)
+                        if "OUT_OF_SCOPE_QUERY" not in answer_prefix:
+                            print(f"🚀 답변 {streamed_chars}자 도달 → 후속 질문 생성 시작", file=sys.stderr, flush=True)
+                            followup_task = asyncio.create_task(
+                                generate_followup_questions(question, answer_prefix, conversation_history, detected_lang)
+                            )
+
                     event_data = create_sse_event({
                         "status": "streaming",
                         "chunk": chunk_content
@@ -825,15 +1538,15 @@ Return only the alternative questions, one per line."""
                 })
                 return
 
-            # 5단계: 참고문헌 추출
-            print("📚 참고문헌 추출 및 후속 질문 생성 시작...", file=sys.stderr, flush=True)
+            # 5단계: 참고문헌 추출 (짧은 답변이라 후속 질문이 아직 시작되지 않았으면 지금 시작)
+            print("📚 참고문헌 추출 시작...", file=sys.stderr, flush=True)
 
-            # 병렬 실행
-            refs_task = extract_references_from_answer(full_answer, doc_order, seen_docs)
-            followup_task = generate_followup_questions(question, full_answer, conversation_history, detected_lang)
+            if followup_task is None:
+                followup_task = asyncio.create_task(
+                    generate_followup_questions(question, full_answer, conversation_history, detected_lang)
+                )
 
-            remapped_answer, references = await refs_task
-            followup_questions = await followup_task
+            remapped_answer, references = await extract_references_from_answer(full_answer, doc_order, seen_docs)
 
             # 참고문헌 전송
             yield create_sse_event({
@@ -843,15 +1556,22 @@ Return only the alternative questions, one per line."""
             })
             print(f"✅ 참고문헌 전송 완료: {len(references)}개", file=sys.stderr, flush=True)
 
-            # 완료
-            yield create_sse_event({
+            # 세션에 이번 턴 저장
+            conversation_store.record_turn(session_id, question, remapped_answer, context_chunks)
+
+            # 완료 (매 응답마다 세션이 있으므로 context_chunks는 기존 클라이언트가 요청할 때만 전송)
+            done_event = {
                 "status": "done",
                 "message": "완료",
-                "context_chunks": context_chunks
-            })
+                "session_id": session_id
+            }
+            if request.include_context_chunks:
+                done_event["context_chunks"] = context_chunks
+            yield create_sse_event(done_event)
             print(f"✅ 스트리밍 완료 이벤트 전송", file=sys.stderr, flush=True)
 
-            # 후속 질문 전송
+            # 후속 질문 전송 (대부분 스트리밍 중에 이미 생성 완료)
+            followup_questions = await followup_task
             if followup_questions:
                 yield create_sse_event({
                     "status": "followup_ready",
@@ -859,6 +1579,15 @@ Return only the alternative questions, one per line."""
                 })
                 print(f"✅ 후속 질문 전송: {len(followup_questions)}개", file=sys.stderr, flush=True)
 
+            # 인용이 있는 완성된 답변만 캐시
+            if cacheable and references:
+                response_cache.put(question, language, {
+                    "answer": remapped_answer,
+                    "references": [ref.dict() for ref in references],
+                    "context_chunks": context_chunks,
+                    "followup_questions": followup_questions
+                }, response_variant)
+
         except Exception as e:
             print(f"❌ Error in query_stream: {e}", file=sys.stderr, flush=True)
             import traceback
@@ -867,6 +1596,17 @@ Return only the alternative questions, one per line."""
                 "status": "error",
                 "message": "오류가 발생했습니다. 다시 시도해주세요."
             })
+        finally:
+            # 오류, 범위 밖 질문, 클라이언트 연결 종료 시 후속 질문 생성 취소
+            if previous_chunks_task is not None and not previous_chunks_task.done():
+                previous_chunks_task.cancel()
+            if expanded_task is not None and not expanded_task.done():
+                expanded_task.cancel()
+            if speculation is not None:
+                speculation.cancel()
+            if followup_task is not None and not followup_task.done():
+                followup_task.cancel()
+                print("🛑 후속 질문 생성 취소", file=sys.stderr, flush=True)
 
     return StreamingResponse(
         event_generator(),
@@ -0,0 +1,125 @@
+"""
+/query-stream 전체 응답 캐시 (정확히 같은 질문 재사용)
+(정규화된 질문, 언어, 모드 조합, 코퍼스 버전) → 재매핑된 답변, 참고문헌, context_chunks, 후속 질문
+모드 조합(variant): 검색/선택/압축 등 요청별 모드 → 다른 모드로 만든 답변은 재사용하지 않음
+"""
+
+import re
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from embedding_cache import normalize_query
+
+CITATION_TAG_PATTERN = re.compile(r'(\{\{citation:\d+(?:,\d+)*\}\})')
+
+
+def iter_replay_chunks(answer: str, chunk_chars: int = 48) -> Iterator[str]:
+    """
+    캐시된 답변을 SSE 스트리밍용 청크로 분할
+    {{citation:N}} 태그는 중간에서 잘리지 않도록 한 덩어리로 유지
+    """
+    current = ""
+    for part in CITATION_TAG_PATTERN.split(answer):
+        if not part:
+            continue
+        if CITATION_TAG_PATTERN.fullmatch(part):
+            current += part
+            continue
+        for i in range(0, len(part), chunk_chars):
+            current += part[i:i + chunk_chars]
+            if len(current) >= chunk_chars:
+                yield current
+                current = ""
+    if current:
+        yield current
+
+
+class ResponseCache:
+    """
+    완성된 응답 캐시
+    - 항목 수(max_entries)와 총 크기(max_bytes) 한도, 초과 시 LRU 제거
+    - TTL이 지난 항목은 조회 시 만료 처리
+    - 코퍼스 버전이 바뀌면 전체 무효화
+    """
+
+    def __init__(self, max_entries: int = 500, max_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: float = 21600.0, corpus_version: str = ""):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.corpus_version = corpus_version
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Dict, int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def set_corpus_version(self, version: str) -> bool:
+        """코퍼스 버전 갱신 (변경 시 캐시 전체 비우고 True 반환)"""
+        if version == self.corpus_version:
+            return False
+        self.corpus_version = version
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._total_bytes = 0
+        return True
+
+    def get(self, question: str, language: str, variant: str = "") -> Optional[Dict]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        key = (normalize_query(question), language, variant)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        response, size, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, question: str, language: str, response: Dict, variant: str = ""):
+        """응답 저장 (단일 항목이 max_bytes를 넘으면 저장하지 않음)"""
+        key = (normalize_query(question), language, variant)
+        size = len(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (response, size, time.monotonic())
+        self._total_bytes += size
+
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str, str]):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "corpus_version": self.corpus_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
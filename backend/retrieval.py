@@ -0,0 +1,189 @@
+"""
+멀티 쿼리 벡터 검색 레이어
+전용 스레드 풀에서 확장 쿼리 검색을 동시에 실행
+쿼리별 타임아웃 및 지연시간 측정
+2단계 검색용 ID 배치 메타데이터 조회(fetch) 및 단계별 응답 크기 추정
+"""
+
+import sys
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+# JSON 응답에서 float 값 하나가 차지하는 평균 바이트 (예: "-0.012345678,")
+VALUE_JSON_BYTES = 12
+
+
+def estimate_payload_bytes(chunks: List[Dict]) -> int:
+    """응답 크기 추정 (메타데이터 JSON 바이트 + 벡터 값 개수 × VALUE_JSON_BYTES)"""
+    total = 0
+    for chunk in chunks:
+        fields = {key: value for key, value in chunk.items() if key != 'values'}
+        total += len(json.dumps(fields, ensure_ascii=False).encode('utf-8'))
+        if chunk.get('values') is not None:
+            total += len(chunk['values']) * VALUE_JSON_BYTES
+    return total
+
+
+async def search_reusing(retriever, queries: List[str], embeddings: List[List[float]],
+                         search_cache: Dict[str, List[Dict]], top_k: int = 15,
+                         sparse_vectors: Optional[List[Optional[Dict]]] = None,
+                         **query_kwargs) -> Tuple[List[List[Dict]], Dict]:
+    """
+    search_cache(쿼리 → 검색 결과)에 있는 쿼리는 다시 검색하지 않고, 나머지만 검색해 search_cache에 저장
+    (같은 요청 안에서 추측 검색한 원본 질문을 확장 검색에서 재사용, 검색 인자가 같을 때만 사용)
+    Returns: retriever.search와 같은 (쿼리별 chunks 리스트, 통계 - 새로 검색한 쿼리 기준)
+    """
+    pending = [i for i, query in enumerate(queries) if query not in search_cache]
+    results, stats = await retriever.search(
+        [embeddings[i] for i in pending], top_k=top_k,
+        sparse_vectors=[sparse_vectors[i] for i in pending] if sparse_vectors else None,
+        **query_kwargs
+    )
+    for i, chunks in zip(pending, results):
+        search_cache[queries[i]] = chunks
+    stats["reused"] = len(queries) - len(pending)
+    return [search_cache[query] for query in queries], stats
+
+
+class MultiQueryRetriever:
+    """
+    동기 방식 Pinecone Index를 전용 스레드 풀에서 병렬로 조회
+    각 쿼리는 개별 타임아웃을 가지며, 타임아웃/오류가 난 쿼리는 빈 결과로 처리 (나머지 쿼리 결과로 답변)
+    namespace: 지정하면 모든 검색/조회에 사용 (검색 시 namespace 인자로 덮어쓸 수 있음)
+    """
+
+    def __init__(self, index, max_workers: int = 16, timeout: float = 5.0, namespace: Optional[str] = None):
+        self.index = index
+        self.timeout = timeout
+        self.namespace = namespace
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+
+    async def search_one(self, embedding: List[float], top_k: int = 15,
+                         **query_kwargs) -> Tuple[List[Dict], float, bool, bool]:
+        """
+        단일 쿼리 검색
+        Returns: (chunks, latency_ms, timed_out, failed)
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        if self.namespace is not None:
+            query_kwargs.setdefault("namespace", self.namespace)
+        query_kwargs.setdefault("include_metadata", True)
+        call = partial(self.index.query, vector=embedding, top_k=top_k, **query_kwargs)
+
+        try:
+            results = await asyncio.wait_for(loop.run_in_executor(self.executor, call), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return [], (time.perf_counter() - start) * 1000, True, False
+        except Exception as e:
+            if "sparse_vector" not in query_kwargs:
+                # 일시적 네트워크/서버 오류 → 이 쿼리만 빈 결과 (타임아웃과 같은 처리)
+                print(f"⚠️  검색 오류 → 빈 결과로 처리: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                return [], (time.perf_counter() - start) * 1000, False, True
+            # 희소-밀집 쿼리를 지원하지 않는 인덱스(dotproduct 아님 등) → 밀집 검색만으로 재시도
+            print(f"⚠️  하이브리드 검색 실패 → 밀집 검색으로 재시도: {e}", file=sys.stderr, flush=True)
+            query_kwargs.pop("sparse_vector")
+            chunks, latency_ms, timed_out, failed = await self.search_one(embedding, top_k, **query_kwargs)
+            return chunks, (time.perf_counter() - start) * 1000, timed_out, failed
+
+        chunks = []
+        for match in results.matches:
+            chunk = dict(match.metadata or {})
+            chunk['id'] = match.id
+            chunk['score'] = match.score
+            if getattr(match, 'values', None):  # include_values=True 일 때만 (MMR 선택용, float32 배열로 보관)
+                chunk['values'] = np.asarray(match.values, dtype=np.float32)
+            chunks.append(chunk)
+
+        return chunks, (time.perf_counter() - start) * 1000, False, False
+
+    async def search(self, embeddings: List[List[float]], top_k: int = 15,
+                     sparse_vectors: Optional[List[Optional[Dict]]] = None, **query_kwargs) -> Tuple[List[List[Dict]], Dict]:
+        """
+        여러 쿼리 동시 검색
+        sparse_vectors: 쿼리별 희소 벡터 (하이브리드 검색, 없거나 None이면 밀집 검색만)
+        Returns: (쿼리별 chunks 리스트, 지연시간 통계)
+        """
+        start = time.perf_counter()
+        sparse_vectors = sparse_vectors or [None] * len(embeddings)
+        outcomes = await asyncio.gather(*[
+            self.search_one(
+                embedding, top_k,
+                **dict(query_kwargs, **({"sparse_vector": sparse} if sparse else {}))
+            )
+            for embedding, sparse in zip(embeddings, sparse_vectors)
+        ])
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        latencies = [latency for _, latency, _, _ in outcomes]
+        stats = {
+            "latencies_ms": [round(latency, 1) for latency in latencies],
+            "wall_ms": round(wall_ms, 1),
+            "sum_ms": round(sum(latencies), 1),
+            "max_ms": round(max(latencies), 1) if latencies else 0.0,
+            "timeouts": sum(1 for _, _, timed_out, _ in outcomes if timed_out),
+            "errors": sum(1 for _, _, _, failed in outcomes if failed),
+            "payload_bytes": sum(estimate_payload_bytes(chunks) for chunks, _, _, _ in outcomes)
+        }
+
+        per_query = " ".join(f"q{i}={latency:.0f}ms" for i, latency in enumerate(latencies))
+        print(f"⏱️  검색 지연: {per_query} → wall={stats['wall_ms']:.0f}ms "
+              f"(max={stats['max_ms']:.0f}ms, sum={stats['sum_ms']:.0f}ms)", file=sys.stderr, flush=True)
+        if stats["timeouts"]:
+            print(f"⚠️  검색 타임아웃: {stats['timeouts']}개 쿼리 ({self.timeout}s 초과)", file=sys.stderr, flush=True)
+
+        return [chunks for chunks, _, _, _ in outcomes], stats
+
+    async def fetch(self, ids: List[str]) -> Tuple[Dict[str, Dict], Dict]:
+        """
+        ID 목록의 메타데이터를 한 번의 fetch 호출로 조회 (2단계 검색의 두 번째 단계)
+        Returns: ({id: metadata}, {"latency_ms", "payload_bytes", "missing", "timed_out", "failed"})
+        타임아웃/오류가 나면 빈 메타데이터 (선택된 청크가 누락으로 처리됨)
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        metadata: Dict[str, Dict] = {}
+        payload_bytes = 0
+        timed_out = False
+        failed = False
+
+        if ids:
+            try:
+                response = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, partial(
+                        self.index.fetch, ids=list(ids),
+                        **({"namespace": self.namespace} if self.namespace is not None else {})
+                    )),
+                    timeout=self.timeout
+                )
+                for vector_id, vector in response.vectors.items():
+                    metadata[vector_id] = dict(vector.metadata or {})
+                    # fetch는 메타데이터와 함께 벡터 값도 항상 반환
+                    payload_bytes += estimate_payload_bytes([{
+                        "id": vector_id,
+                        "metadata": metadata[vector_id],
+                        "values": list(getattr(vector, 'values', None) or [])
+                    }])
+            except asyncio.TimeoutError:
+                timed_out = True
+                print(f"⚠️  메타데이터 조회 타임아웃 ({self.timeout}s 초과)", file=sys.stderr, flush=True)
+            except Exception as e:
+                failed = True
+                metadata, payload_bytes = {}, 0
+                print(f"⚠️  메타데이터 조회 오류 → 빈 결과로 처리: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+        stats = {
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "payload_bytes": payload_bytes,
+            "missing": sum(1 for vector_id in ids if vector_id not in metadata),
+            "timed_out": timed_out,
+            "failed": failed
+        }
+        return metadata, stats
@@ -0,0 +1,97 @@
+"""
+검색 결과 컨텍스트 선택
+고정 상위 25개 대신 점수 분포로 컨텍스트 크기(K) 결정
+- 상대 임계값: 최고 점수 대비 relative_threshold 배 미만인 청크 제외
+- 점수 간격: 연속 점수 차이가 max_gap 보다 크게 떨어지는 지점에서 자름
+- min_k/max_k 범위 안에서만 조정
+MMR(maximal marginal relevance) 다양성 선택 (같은 논문의 거의 동일한 청크 중복 방지)
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SELECTION_MODES = ("score", "mmr")
+
+
+def select_adaptive(chunks: List[Dict], min_k: int = 5, max_k: int = 25,
+                    relative_threshold: float = 0.8, max_gap: Optional[float] = 0.08) -> Tuple[List[Dict], Dict]:
+    """
+    점수 내림차순으로 정렬한 뒤 적응형 K개 선택
+    max_gap=None: 절대 점수 간격 기준 생략 (코사인이 아닌 점수, 예: 하이브리드)
+    Returns: (선택된 청크, 통계 - k와 자른 이유)
+    """
+    ranked = sorted(chunks, key=lambda c: c.get('score', 0), reverse=True)
+    if not ranked:
+        return [], {"k": 0, "candidates": 0, "reason": "empty", "best_score": 0.0, "cutoff_score": 0.0}
+
+    best = ranked[0].get('score', 0)
+    limit = min(max_k, len(ranked))
+    k = limit
+    reason = "max_k" if len(ranked) > max_k else "all"
+
+    for i in range(1, limit):
+        score = ranked[i].get('score', 0)
+        if i >= min_k and score < best * relative_threshold:
+            k, reason = i, "relative_threshold"
+            break
+        if i >= min_k and max_gap is not None and ranked[i - 1].get('score', 0) - score > max_gap:
+            k, reason = i, "score_gap"
+            break
+
+    selected = ranked[:k]
+    stats = {
+        "k": k,
+        "candidates": len(ranked),
+        "reason": reason,
+        "best_score": round(best, 4),
+        "cutoff_score": round(selected[-1].get('score', 0), 4)
+    }
+    return selected, stats
+
+
+def mmr_select(chunks: List[Dict], query_vector: Sequence[float], k: int,
+               lambda_mult: float = 0.7) -> Tuple[List[Dict], Dict]:
+    """
+    청크의 'values'(Pinecone include_values, float32 배열) 벡터로 MMR 선택
+    score = lambda * sim(query, chunk) - (1 - lambda) * max sim(chunk, 이미 선택된 청크)
+    벡터가 없는 청크는 후보에서 제외
+    Returns: (선택 순서대로 청크, 통계)
+    """
+    candidates = [chunk for chunk in chunks if chunk.get('values') is not None and len(chunk['values'])]
+    k = min(k, len(candidates))
+    if k <= 0:
+        return [], {"k": 0, "candidates": len(candidates), "max_redundancy": 0.0}
+
+    matrix = np.vstack([np.asarray(chunk['values'], dtype=np.float32) for chunk in candidates])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    relevance = matrix @ query
+
+    # 전체 n×n 유사도 대신 새로 선택된 청크와의 유사도만 계산해 누적 최대값 갱신
+    selected = [int(np.argmax(relevance))]
+    max_similarity = matrix @ matrix[selected[0]]
+    max_redundancy = 0.0
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        max_redundancy = max(max_redundancy, float(max_similarity[best]))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, matrix @ matrix[best], out=max_similarity)
+
+    stats = {
+        "k": k,
+        "candidates": len(candidates),
+        "max_redundancy": round(max_redundancy, 4)
+    }
+    return [candidates[i] for i in selected], stats
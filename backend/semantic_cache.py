@@ -0,0 +1,122 @@
+"""
+의미 기반 검색 결과 캐시 (유사 질문 재사용)
+질문 임베딩 → 중복 제거/정렬된 상위 context_chunks
+코사인 유사도가 임계값 이상인 이전 질문이 있으면 쿼리 확장과 Pinecone 검색 생략
+모드 조합(variant)이 같은 항목끼리만 비교 (다른 검색/선택 모드로 만든 컨텍스트는 재사용하지 않음)
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 최고 유사도 분포 집계 구간 (임계값 튜닝용)
+SIMILARITY_BUCKETS = [0.80, 0.85, 0.90, 0.92, 0.95, 0.98]
+
+
+class SemanticCache:
+    """
+    고정 크기 NumPy 행렬 기반 유사도 검색 캐시
+    - 정규화된 임베딩을 (capacity, dim) float32 행렬에 저장 → 조회는 행렬-벡터 곱 1번
+    - 가득 차면 가장 오래 사용되지 않은 슬롯을 덮어씀 (LRU)
+    """
+
+    def __init__(self, dim: int = 1536, capacity: int = 1000, threshold: float = 0.92):
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._payloads: List[Optional[List[Dict]]] = [None] * capacity
+        self._variants: List[Optional[str]] = [None] * capacity
+        self._size = 0
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self._hit_similarity_sum = 0.0
+        self._best_similarity_counts = [0] * (len(SIMILARITY_BUCKETS) + 1)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _best_match(self, vector: np.ndarray, variant: str) -> Tuple[int, float]:
+        """variant가 같은 슬롯 중 최고 유사도 (없으면 (-1, -1.0))"""
+        similarities = self._matrix[:self._size] @ vector
+        mask = np.array([slot_variant == variant for slot_variant in self._variants[:self._size]], dtype=bool)
+        if not mask.any():
+            return -1, -1.0
+        similarities = np.where(mask, similarities, -np.inf)
+        best = int(np.argmax(similarities))
+        return best, float(similarities[best])
+
+    def lookup(self, embedding, variant: str = "") -> Optional[Tuple[List[Dict], float]]:
+        """
+        같은 모드 조합으로 저장된 항목 중 가장 유사한 캐시 항목 조회
+        Returns: (context_chunks, similarity) 또는 임계값 미만이면 None
+        """
+        self.lookups += 1
+        if self._size == 0:
+            return None
+
+        best, similarity = self._best_match(self._normalize(embedding), variant)
+        if best < 0:
+            return None
+        bucket = sum(1 for edge in SIMILARITY_BUCKETS if similarity >= edge)
+        self._best_similarity_counts[bucket] += 1
+
+        if similarity < self.threshold:
+            return None
+
+        self._last_used[best] = time.monotonic()
+        self.hits += 1
+        self._hit_similarity_sum += similarity
+        return self._payloads[best], similarity
+
+    def add(self, embedding, context_chunks: List[Dict], variant: str = ""):
+        """검색 결과 저장 (같은 모드 조합의 거의 같은 질문이 이미 있으면 그 슬롯을 갱신)"""
+        vector = self._normalize(embedding)
+
+        if self._size > 0:
+            best, similarity = self._best_match(vector, variant)
+            if best >= 0 and similarity >= 0.999:
+                slot = best
+            elif self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+        else:
+            slot = 0
+            self._size = 1
+
+        self._matrix[slot] = vector
+        self._payloads[slot] = list(context_chunks)
+        self._variants[slot] = variant
+        self._last_used[slot] = time.monotonic()
+
+    def clear(self):
+        """전체 비우기 (코퍼스 변경 시)"""
+        self._matrix[:] = 0
+        self._last_used[:] = 0
+        self._payloads = [None] * self.capacity
+        self._variants = [None] * self.capacity
+        self._size = 0
+
+    def stats(self) -> Dict:
+        """캐시 통계 (히트율, 히트 시 평균 유사도, 최고 유사도 분포)"""
+        labels = [f"<{SIMILARITY_BUCKETS[0]}"] + [f">={edge}" for edge in SIMILARITY_BUCKETS]
+        return {
+            "entries": self._size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "mean_hit_similarity": round(self._hit_similarity_sum / self.hits, 4) if self.hits else 0.0,
+            "best_similarity_histogram": dict(zip(labels, self._best_similarity_counts)),
+            "evictions": self.evictions
+        }
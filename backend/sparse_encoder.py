@@ -0,0 +1,134 @@
+"""
+BM25 스타일 희소(sparse) 벡터 인코더
+약물명, 품종명, "T4 >4.0 μg/dL" 같은 정확한 토큰 매칭을 밀집 임베딩 검색에 보완 (하이브리드 검색)
+- 코퍼스 어휘/문서 빈도(IDF)는 청크 전체를 한 번 훑어 생성하고 gzip JSON으로 저장
+- 문서: 토큰별 BM25 가중치(tf 포화 + 길이 정규화 + IDF), 쿼리: 고유 토큰마다 1
+- 문서/쿼리 벡터 모두 L2 정규화 → 희소 점수가 0~1 범위라 밀집 점수와 alpha로 섞기 쉬움
+"""
+
+import os
+import re
+import gzip
+import json
+import math
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_SPARSE_VOCAB_PATH = Path(__file__).parent / "data" / "sparse_vocab.json.gz"
+
+# 소수점/단위(4.0, μg/dl, il-6)는 하나의 토큰으로 유지
+TOKEN_PATTERN = re.compile(r"[0-9a-zμ가-힣]+(?:[./\-][0-9a-zμ가-힣]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have if in into is it its may
+might more most no not of on or our should such than that the their then there these they this those
+to was were what when where which while who will with would
+""".split())
+
+
+def sparse_vocab_path() -> Path:
+    """어휘 파일 경로 (SPARSE_VOCAB_PATH 환경 변수 우선)"""
+    return Path(os.getenv("SPARSE_VOCAB_PATH", str(DEFAULT_SPARSE_VOCAB_PATH)))
+
+
+def index_metric(pinecone_client, index_name: str) -> Optional[str]:
+    """Pinecone 인덱스 metric (희소-밀집 쿼리/희소 벡터 upsert는 dotproduct에서만 가능, 조회 실패 시 None)"""
+    try:
+        description = pinecone_client.describe_index(index_name)
+    except Exception:
+        return None
+    metric = getattr(description, "metric", None)
+    if metric is None and hasattr(description, "get"):
+        metric = description.get("metric")
+    return str(metric).lower() if metric else None
+
+
+def tokenize(text: str) -> List[str]:
+    """NFKC 정규화(µ → μ 등) + 소문자 후 토큰 추출 (불용어 제외)"""
+    normalized = unicodedata.normalize("NFKC", text or "").lower()
+    return [token for token in TOKEN_PATTERN.findall(normalized) if token not in STOPWORDS]
+
+
+def sparse_vector_from(weights: Dict[int, float]) -> Dict[str, List]:
+    """{토큰 인덱스: 가중치} → L2 정규화된 Pinecone sparse_values 형식"""
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    indices = sorted(weights)
+    return {"indices": indices, "values": [weights[i] / norm for i in indices]}
+
+
+def scale_sparse(vector: Dict[str, List], factor: float) -> Dict[str, List]:
+    return {"indices": vector["indices"], "values": [value * factor for value in vector["values"]]}
+
+
+class SparseEncoder:
+    """코퍼스 어휘 + 문서 빈도 기반 BM25 인코더"""
+
+    def __init__(self, tokens: List[str], df: List[int], num_docs: int, avgdl: float,
+                 k1: float = 1.2, b: float = 0.75):
+        self.tokens = tokens
+        self.df = df
+        self.num_docs = num_docs
+        self.avgdl = avgdl or 1.0
+        self.k1 = k1
+        self.b = b
+        self.index_of = {token: i for i, token in enumerate(tokens)}
+        self.idf = [math.log(1 + (num_docs - freq + 0.5) / (freq + 0.5)) for freq in df]
+
+    @classmethod
+    def build(cls, texts: Iterable[str], **params) -> "SparseEncoder":
+        """청크 텍스트를 한 번만 훑어 어휘, 문서 빈도, 평균 길이 계산"""
+        df: Counter = Counter()
+        num_docs = 0
+        total_length = 0
+        for text in texts:
+            tokens = tokenize(text)
+            df.update(set(tokens))
+            num_docs += 1
+            total_length += len(tokens)
+
+        # 빈도 높은 토큰이 앞 인덱스 (압축 시 작은 숫자가 자주 반복)
+        vocabulary = [token for token, _ in df.most_common()]
+        return cls(vocabulary, [df[token] for token in vocabulary], num_docs,
+                   total_length / num_docs if num_docs else 1.0, **params)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({
+                "num_docs": self.num_docs,
+                "avgdl": self.avgdl,
+                "k1": self.k1,
+                "b": self.b,
+                "tokens": self.tokens,
+                "df": self.df
+            }, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Path) -> "SparseEncoder":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["tokens"], data["df"], data["num_docs"], data["avgdl"], k1=data["k1"], b=data["b"])
+
+    def encode_document(self, text: str) -> Dict[str, List]:
+        """청크 → BM25 가중치 희소 벡터 (어휘에 없는 토큰은 제외)"""
+        counts = Counter(token for token in tokenize(text) if token in self.index_of)
+        length = sum(counts.values())
+        weights = {}
+        for token, tf in counts.items():
+            i = self.index_of[token]
+            saturation = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / self.avgdl))
+            weights[i] = self.idf[i] * saturation
+        return sparse_vector_from(weights)
+
+    def encode_query(self, text: str) -> Dict[str, List]:
+        """쿼리 → 고유 토큰마다 1 (IDF는 문서 쪽 가중치에 포함)"""
+        return sparse_vector_from({self.index_of[token]: 1.0 for token in tokenize(text) if token in self.index_of})
+
+
+def load_sparse_encoder(path: Optional[Path] = None) -> Optional[SparseEncoder]:
+    """어휘 파일이 있으면 인코더 로드 (없으면 None → 밀집 검색만)"""
+    path = Path(path or sparse_vocab_path())
+    return SparseEncoder.load(path) if path.exists() else None
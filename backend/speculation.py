@@ -0,0 +1,83 @@
+"""
+추측 검색/생성 (speculative retrieval)
+- 원본 질문 임베딩으로 바로 검색 → 컨텍스트 구성 → 답변 생성을 먼저 시작
+- 그동안 쿼리 확장 + 확장 쿼리 임베딩/검색을 병렬 진행 (원본 질문 검색 결과는 재사용)
+- 확장 검색 결과의 컨텍스트 변화량(1 - Jaccard)이 임계값 이하면 추측 생성 채택, 아니면 취소 후 재생성
+- 이미 보낸 토큰은 되돌릴 수 없으므로 추측 생성 결과는 채택 전까지 버퍼에만 쌓음
+"""
+
+import time
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from fusion import chunk_key
+
+SPECULATION_MODES = ("off", "on")
+
+_DONE = object()
+
+
+def context_change(speculative_ids: Iterable[str], final_ids: Iterable[str]) -> float:
+    """두 컨텍스트의 청크 집합 변화량 (0: 동일, 1: 겹침 없음)"""
+    speculative, final = set(speculative_ids), set(final_ids)
+    union = speculative | final
+    if not union:
+        return 0.0
+    return 1.0 - len(speculative & final) / len(union)
+
+
+def accept_speculation(speculative_chunks: List[Dict], final_chunks: List[Dict], max_change: float,
+                       stats: Dict) -> Tuple[bool, float]:
+    """
+    추측 컨텍스트 채택 여부 결정 (확장 검색 컨텍스트와의 변화량이 max_change 이하면 채택) + 통계 누적
+    Returns: (채택 여부, 컨텍스트 변화량)
+    """
+    change = context_change(
+        (chunk_key(chunk) for chunk in speculative_chunks),
+        (chunk_key(chunk) for chunk in final_chunks)
+    )
+    accepted = change <= max_change
+    stats["requests"] += 1
+    stats["context_change_total"] += change
+    stats["accepted" if accepted else "rejected"] += 1
+    return accepted, change
+
+
+class SpeculativeStream:
+    """
+    비동기 제너레이터를 백그라운드 태스크로 미리 소비해 버퍼에 쌓는 스트림
+    채택되면 replay()로 버퍼부터 이어서 내보내고, 거절되면 cancel()로 생성 중단
+    """
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.source = source
+        self.started_at = time.perf_counter()
+        self.first_item_at: Optional[float] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._pump())
+
+    async def _pump(self):
+        try:
+            async for item in self.source:
+                if self.first_item_at is None:
+                    self.first_item_at = time.perf_counter()
+                await self._queue.put(item)
+        except Exception as e:
+            await self._queue.put(e)
+        finally:
+            await self._queue.put(_DONE)
+
+    async def replay(self) -> AsyncIterator[Any]:
+        """버퍼에 쌓인 항목부터 생성이 끝날 때까지 순서대로 반환 (원본 예외는 그대로 전달)"""
+        while True:
+            item = await self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self):
+        """추측 생성 중단 (진행 중인 OpenAI 스트림은 태스크 취소로 함께 닫힘, 이미 끝났으면 무시)"""
+        if not self._task.done():
+            self._task.cancel()
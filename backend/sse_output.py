@@ -0,0 +1,126 @@
+"""
+SSE 스트리밍 출력 단계
+generate_answer_stream의 (chunk_text, False) 출력을 모드에 따라 프레임으로 묶어 전달
+- passthrough: 토큰이 오는 즉시 그대로 전달 (지연 없음)
+- coalesce: flush_ms 시간 창 또는 flush_bytes 크기 단위로 묶어서 전달
+- paced: 토큰마다 전달 후 pacing_ms 만큼 대기 (타이핑 효과용)
+"""
+
+import sys
+import time
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Tuple
+
+STREAM_MODES = ("passthrough", "coalesce", "paced")
+
+
+class StreamOutputStage:
+    """스트림 출력 모드 적용 및 스트림별 frames/sec, bytes/sec 측정"""
+
+    def __init__(self, mode: str = "coalesce", flush_ms: float = 25.0,
+                 flush_bytes: int = 256, pacing_ms: float = 10.0):
+        if mode not in STREAM_MODES:
+            print(f"⚠️  알 수 없는 스트림 모드 '{mode}' → coalesce 사용", file=sys.stderr, flush=True)
+            mode = "coalesce"
+        self.mode = mode
+        self.flush_seconds = flush_ms / 1000
+        self.flush_bytes = flush_bytes
+        self.pacing_seconds = pacing_ms / 1000
+        self.frames = 0
+        self.bytes = 0
+        self._started_at = None
+        self._finished_at = None
+
+    async def run(self, source: AsyncIterator[Tuple]) -> AsyncGenerator[Tuple, None]:
+        """
+        generate_answer_stream과 같은 형식으로 출력
+        (chunk_text, False)는 모드에 맞게 묶고, 그 외(최종 결과)는 남은 버퍼를 비운 뒤 그대로 전달
+        """
+        self._started_at = time.perf_counter()
+        try:
+            if self.mode == "coalesce":
+                async for result in self._coalesce(source):
+                    yield result
+            else:
+                async for result in source:
+                    if len(result) == 2:
+                        yield self._frame(result[0])
+                        if self.mode == "paced":
+                            await asyncio.sleep(self.pacing_seconds)
+                    else:
+                        yield result
+        finally:
+            self._finished_at = time.perf_counter()
+            stats = self.stats()
+            print(f"📡 SSE 출력: mode={self.mode}, {stats['frames']} frames, {stats['bytes']:,} bytes, "
+                  f"{stats['frames_per_sec']} frames/s, {stats['bytes_per_sec']:,} bytes/s", file=sys.stderr, flush=True)
+
+    async def _coalesce(self, source: AsyncIterator[Tuple]) -> AsyncGenerator[Tuple, None]:
+        """시간 창/크기 기준 프레임 묶기 (다음 토큰이 늦게 와도 시간 창이 지나면 전송)"""
+        iterator = source.__aiter__()
+        buffer: List[str] = []
+        buffered_bytes = 0
+        window_started = 0.0
+        pending = None
+
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+
+                timeout = None
+                if buffer:
+                    timeout = max(0.0, self.flush_seconds - (time.perf_counter() - window_started))
+
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    # 시간 창 종료 → 모인 텍스트 전송 후 같은 토큰을 계속 대기
+                    yield self._frame("".join(buffer))
+                    buffer, buffered_bytes = [], 0
+                    continue
+
+                task, pending = pending, None
+                try:
+                    result = task.result()
+                except StopAsyncIteration:
+                    break
+
+                if len(result) != 2:
+                    if buffer:
+                        yield self._frame("".join(buffer))
+                        buffer, buffered_bytes = [], 0
+                    yield result
+                    continue
+
+                if not buffer:
+                    window_started = time.perf_counter()
+                buffer.append(result[0])
+                buffered_bytes += len(result[0].encode('utf-8'))
+
+                if buffered_bytes >= self.flush_bytes or time.perf_counter() - window_started >= self.flush_seconds:
+                    yield self._frame("".join(buffer))
+                    buffer, buffered_bytes = [], 0
+
+            if buffer:
+                yield self._frame("".join(buffer))
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    def _frame(self, text: str) -> Tuple[str, bool]:
+        self.frames += 1
+        self.bytes += len(text.encode('utf-8'))
+        return (text, False)
+
+    def stats(self) -> Dict:
+        """스트림별 출력 통계"""
+        end = self._finished_at or time.perf_counter()
+        duration = end - self._started_at if self._started_at else 0.0
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "duration_sec": round(duration, 3),
+            "frames_per_sec": round(self.frames / duration, 1) if duration > 0 else 0.0,
+            "bytes_per_sec": int(self.bytes / duration) if duration > 0 else 0
+        }
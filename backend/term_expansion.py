@@ -0,0 +1,196 @@
+"""
+로컬 수의학 용어 기반 쿼리 확장 (gpt-4o-mini 확장 호출 대체)
+- vet_terms.json: 그룹마다 첫 항목이 영어 대표어, 나머지는 약어/동의어/상품명↔일반명/한국어
+  (curated: 직접 관리, mined: data-pipeline/mine_vet_terms.py가 코퍼스의 "long form (ABBR)" 등에서 추출,
+   excluded: 뜻이 여러 개라 확장하지 않을 약어)
+- 시작 시 한 번 로드해 접두사 트리 정규식으로 컴파일 → 질문당 수십 마이크로초
+- 확장 쿼리: ① 한국어 용어/약어/상품명을 영어 대표어로 바꾼 질문 ② 매칭된 용어의 영어 동의어 키워드
+"""
+
+import os
+import re
+import json
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+EXPANSION_MODES = ("local", "llm", "hybrid")  # hybrid: 사전 매칭이 없을 때만 LLM 확장
+
+DEFAULT_VET_TERMS_PATH = Path(__file__).parent / "vet_terms.json"
+
+# 키워드 쿼리에 넣을 그룹당 영어 표현 수
+MAX_TERMS_PER_GROUP = 4
+
+HANGUL = re.compile(r"[가-힣]")
+
+
+def vet_terms_path() -> Path:
+    """용어 사전 경로 (VET_TERMS_PATH 환경 변수 우선)"""
+    return Path(os.getenv("VET_TERMS_PATH", str(DEFAULT_VET_TERMS_PATH)))
+
+
+def is_abbreviation(term: str) -> bool:
+    """대문자 약어 (FIP, CKD, T4) → 대소문자 구분 매칭 (alt, ct 같은 일반 단어와 구분)"""
+    return term.upper() == term and any(c.isalpha() for c in term) and not HANGUL.search(term)
+
+
+def term_units(term: str) -> List[str]:
+    """
+    용어 → 글자 단위 정규식 조각
+    - 한국어: 띄어쓰기 무시, 글자 사이 공백 허용 (만성신장병 = 만성 신장병)
+    - 영어: 공백/하이픈 혼용 허용 (immune-mediated = immune mediated)
+    """
+    if HANGUL.search(term):
+        chars = [c for c in term if not c.isspace()]
+        return [re.escape(chars[0])] + [r"\s*" + re.escape(c) for c in chars[1:]]
+    return [r"[\s\-]+" if c in " -" else re.escape(c) for c in " ".join(term.split())]
+
+
+def trie_pattern(terms: List[str]) -> str:
+    """
+    용어 목록 → 접두사 트리 정규식
+    수백 개 용어를 단순 나열(a|b|c)하면 위치마다 모든 용어를 시도하지만,
+    트리 형태는 공통 접두사를 한 번만 비교 → 질문당 수십 마이크로초
+    끝나는 노드는 (?:...)? 로 감싸 더 긴 용어를 먼저 시도 (비만세포종 > 비만)
+    """
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for unit in term_units(term):
+            node = node.setdefault(unit, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [unit + emit(child) for unit, child in node.items() if unit]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class TermExpander:
+    """용어 그룹 사전 기반 확장기"""
+
+    def __init__(self, groups: List[List[str]]):
+        self.groups = [group for group in groups if group]
+        self.group_of: Dict[str, int] = {}  # 정규화된 용어 → 그룹 번호 (중복 시 먼저 나온 그룹)
+        self.compact_group_of: Dict[str, int] = {}  # 띄어쓰기 없는 한국어 용어 → 그룹 번호
+        # 질문에서 영어 대표어로 바꿀 용어: 약어(FIP, FeLV), 상품명(Rimadyl) 등 사전에 대문자로 적힌 용어
+        # (문장 첫 글자 대문자 "Cats ..."는 일반 단어이므로 바꾸지 않고 키워드로만 추가)
+        self.replace_keys: Set[str] = set()
+        abbreviations, english, korean = [], [], []
+
+        for group_id, group in enumerate(self.groups):
+            for term in group:
+                key = self.normalize(term)
+                # 한 글자 한국어(개, 소, 말)는 다른 단어 안에서 오탐이 많아 제외
+                if key in self.group_of or (HANGUL.search(term) and len(key.replace(" ", "")) < 2):
+                    continue
+                self.group_of[key] = group_id
+                if any(c.isupper() for c in term):
+                    self.replace_keys.add(key)
+                if HANGUL.search(term):
+                    self.compact_group_of.setdefault(key.replace(" ", ""), group_id)
+                if HANGUL.search(term):
+                    korean.append(term)
+                elif is_abbreviation(term):
+                    abbreviations.append(term)
+                else:
+                    english.append(term.lower())
+
+        # 영어: 영숫자 경계 + 복수형(s/es) 허용, 약어: 대소문자 구분, 한국어: 경계 없음 (뒤에 조사가 붙어도 매칭)
+        boundary = r"(?<![0-9A-Za-z])(?:{})(?![0-9A-Za-z])"
+        self._patterns = [
+            re.compile(boundary.format(trie_pattern(abbreviations))) if abbreviations else None,
+            re.compile(boundary.format(trie_pattern(english) + r"(?:e?s)?"), re.IGNORECASE) if english else None,
+            re.compile(trie_pattern(korean)) if korean else None
+        ]
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", text).lower().replace("-", " ").split())
+
+    @classmethod
+    def load(cls, path: Path) -> "TermExpander":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        # 뜻이 여러 개인 약어(DM: diabetes mellitus / degenerative myelopathy 등)는 어느 그룹에도 넣지 않음
+        excluded = set(data.get("excluded", []))
+        return cls([
+            [term for term in group if term not in excluded]
+            for group in data.get("curated", []) + data.get("mined", [])
+        ])
+
+    def _lookup_key(self, matched: str) -> Optional[str]:
+        """매칭된 텍스트 → 사전 용어 키 (group_of 키, 없으면 띄어쓰기 없는 한국어 키)"""
+        key = self.normalize(matched)
+        if key in self.group_of:
+            return key
+        # 복수형 / 한국어 띄어쓰기 차이
+        for candidate in (key[:-2] if key.endswith("es") else None, key[:-1] if key.endswith("s") else None):
+            if candidate and candidate in self.group_of:
+                return candidate
+        compact = key.replace(" ", "")
+        return compact if compact in self.compact_group_of else None
+
+    def _lookup(self, matched: str) -> Optional[int]:
+        key = self._lookup_key(matched)
+        if key is None:
+            return None
+        return self.group_of[key] if key in self.group_of else self.compact_group_of[key]
+
+    def match(self, text: str) -> List[Tuple[int, int, int]]:
+        """질문에서 사전 용어 위치 찾기 → [(시작, 끝, 그룹 번호)] (겹치면 긴 매칭 우선)"""
+        text = unicodedata.normalize("NFKC", text)
+        found = []
+        for pattern in self._patterns:
+            if pattern is None:
+                continue
+            for m in pattern.finditer(text):
+                group_id = self._lookup(m.group(0))
+                if group_id is not None:
+                    found.append((m.start(), m.end(), group_id))
+
+        found.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+        spans, last_end = [], -1
+        for start, end, group_id in found:
+            if start >= last_end:
+                spans.append((start, end, group_id))
+                last_end = end
+        return spans
+
+    def expand(self, question: str, max_queries: int = 3) -> List[str]:
+        """
+        원본 + 확장 쿼리 (사전 매칭이 없으면 원본만)
+        ① 한국어/약어/상품명 → 영어 대표어로 바꾼 질문 (영어 일반 동의어는 대소문자와 무관하게 그대로 유지)
+        ② 매칭된 그룹의 영어 표현 키워드 (대표어 + 약어/동의어)
+        """
+        text = unicodedata.normalize("NFKC", question)
+        spans = self.match(text)
+        if not spans:
+            return [question]
+
+        rewritten, cursor = [], 0
+        for start, end, group_id in spans:
+            matched = text[start:end]
+            canonical = self.groups[group_id][0]
+            replace = HANGUL.search(matched) or self._lookup_key(matched) in self.replace_keys
+            rewritten.append(text[cursor:start])
+            rewritten.append(canonical if replace else matched)
+            cursor = end
+        rewritten.append(text[cursor:])
+
+        keywords = []
+        for group_id in dict.fromkeys(group_id for _, _, group_id in spans):
+            english = [term for term in self.groups[group_id] if not HANGUL.search(term)]
+            keywords.extend(english[:MAX_TERMS_PER_GROUP])
+
+        queries = [question, "".join(rewritten).strip(), " ".join(keywords)]
+        return list(dict.fromkeys(query for query in queries if query))[:max_queries]
+
+
+def load_term_expander(path: Optional[Path] = None) -> Optional[TermExpander]:
+    """사전 파일이 있으면 확장기 로드 (없으면 None → LLM 확장만)"""
+    path = Path(path or vet_terms_path())
+    return TermExpander.load(path) if path.exists() else None
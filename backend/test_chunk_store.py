@@ -0,0 +1,50 @@
+"""
+ChunkStore 테스트 (문서 메타데이터 분리 저장, ID 조회, 슬림 메타데이터)
+"""
+
+from chunk_store import ChunkStore, index_metadata, slim_metadata
+
+PAPER = {"title": "Canine parvovirus", "authors": "Kim et al.", "journal": "Vet Res", "year": "2020",
+         "pmcid": "PMC1", "doc_type": "paper", "reference_format": "Kim et al. Vet Res. 2020"}
+
+
+def test_put_and_get_many_round_trip(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite3")
+    store.put_many([
+        {"id": f"paper_PMC1_c{i}", **PAPER, "page": i, "chunk_index": i, "text": f"chunk {i} text"}
+        for i in range(3)
+    ])
+
+    found = store.get_many(["paper_PMC1_c2", "paper_PMC1_c0", "missing"])
+
+    assert set(found) == {"paper_PMC1_c0", "paper_PMC1_c2"}
+    assert found["paper_PMC1_c2"]["text"] == "chunk 2 text"
+    assert found["paper_PMC1_c2"]["page"] == 2
+    assert found["paper_PMC1_c2"]["reference_format"] == PAPER["reference_format"]
+    assert store.stats()["chunks"] == 3 and store.stats()["documents"] == 1
+    store.close()
+
+    readonly = ChunkStore(tmp_path / "chunks.sqlite3", readonly=True)
+    assert readonly.get_many(["paper_PMC1_c1"])["paper_PMC1_c1"]["title"] == PAPER["title"]
+
+
+def test_slim_metadata_keeps_only_filter_fields():
+    metadata = {**PAPER, "page": 4, "text": "long chunk text"}
+
+    assert slim_metadata(metadata) == {"doc_type": "paper", "year": "2020", "pmcid": "PMC1", "page": 4}
+
+
+def test_index_metadata_is_full_unless_slim_mode_enabled(monkeypatch):
+    metadata = {**PAPER, "page": 4, "text": "long chunk text"}
+
+    monkeypatch.delenv("SLIM_METADATA", raising=False)
+    assert index_metadata(metadata) == metadata
+    monkeypatch.setenv("SLIM_METADATA", "true")
+    assert index_metadata(metadata) == slim_metadata(metadata)
+
+
+def test_iter_texts_visits_every_chunk_once(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite3")
+    store.put_many([{"id": f"c{i}", **PAPER, "text": f"text {i}"} for i in range(5)])
+
+    assert sorted(store.iter_texts(batch_size=2)) == [(f"c{i}", f"text {i}") for i in range(5)]
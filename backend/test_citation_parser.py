@@ -0,0 +1,75 @@
+"""
+CitationStreamParser 퍼즈 테스트
+스트림을 모든 글자 위치에서 나눠도 전체 텍스트에 정규식을 한 번에 적용한 결과와 같은지 확인
+"""
+
+import re
+import random
+
+from citation_stream import CitationStreamParser
+
+CITATION_PATTERN = re.compile(r'\{\{?citation:([0-9]+(?:,[0-9]+)*)\}\}?')
+
+SAMPLES = [
+    "Core vaccines include CDV, CAV-2 and CPV-2.{{citation:0,1}} Boosters are given yearly.{{citation:2}}",
+    "Dose is 10 mg/kg PO q12h.{{citation:7}} Invalid {{citation:3,9,1}} and {citation:4} single braces.",
+    "Braces {{ that are not citations }} and {json: 1} and {{citation}} and {{citation:}} and {{citation:1,}}.",
+    "Nested {{{citation:2}}} and {{citation:1{{citation:0}} and {{ci{{citation:3}}} end",
+    "Trailing partial {{citation:1",
+    "Trailing closed once {{citation:2}",
+    "{{citation:0}}{{citation:1}}{citation:2}}{{citation:3}}}",
+    "수치 T4 >4.0 μg/dL{{citation:5}} 그리고 {{citation:12}} 범위 밖",
+    "",
+    "{",
+    "{{",
+    "}}}{{{",
+]
+
+
+def reference_clean(text: str, num_references: int) -> str:
+    """정규식으로 전체 텍스트를 한 번에 정리한 기대값"""
+    def replace(match):
+        nums = [int(n) for n in match.group(1).split(',')]
+        valid = [n for n in nums if 0 <= n < num_references]
+        return '{{citation:' + ','.join(map(str, valid)) + '}}' if valid else ''
+    return CITATION_PATTERN.sub(replace, text)
+
+
+def run_parser(pieces, num_references: int):
+    parser = CitationStreamParser(num_references)
+    emitted = "".join(parser.feed(piece) for piece in pieces) + parser.flush()
+    return emitted, parser
+
+
+def test_every_single_split_offset():
+    for text in SAMPLES:
+        expected = reference_clean(text, num_references=6)
+        for offset in range(len(text) + 1):
+            emitted, parser = run_parser([text[:offset], text[offset:]], num_references=6)
+            assert emitted == expected, (text, offset)
+            assert parser.answer == expected
+
+
+def test_character_by_character():
+    for text in SAMPLES:
+        expected = reference_clean(text, num_references=6)
+        emitted, _ = run_parser(list(text), num_references=6)
+        assert emitted == expected, text
+
+
+def test_random_multi_splits():
+    rng = random.Random(1234)
+    alphabet = ["{", "}", "{{", "}}", "citation:", "cit", "ation", ":", ",", "1", "7", "12", "a", " ", "."]
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        cuts = sorted(rng.sample(range(len(text) + 1), k=min(len(text) + 1, rng.randint(0, 6))))
+        pieces = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        emitted, _ = run_parser(pieces, num_references=10)
+        assert emitted == reference_clean(text, num_references=10), (text, pieces)
+
+
+def test_seen_and_invalid_citations():
+    _, parser = run_parser(["See {{cita", "tion:0,4", ",9}} and {{citation:2}}"], num_references=5)
+    assert parser.answer == "See {{citation:0,4}} and {{citation:2}}"
+    assert parser.seen_citations == {0, 2, 4}
+    assert parser.invalid_citations == [9]
@@ -0,0 +1,75 @@
+"""
+assemble_context 테스트 (문서당 헤더 1개, 인접 청크 중복 제거, citation 인덱스 일치)
+"""
+
+from context_assembly import assemble_context, group_chunks_by_document, merge_spans, overlap_length
+
+TEXT = " ".join(f"Sentence number {i} describes a clinical finding in dogs." for i in range(30))
+
+
+def overlapping_chunks(text, size=600, overlap=150):
+    """recursive_chunk_with_overlap과 같은 방식(문장 경계 + overlap)으로 자른 청크"""
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            end = text.rfind(". ", start, end) + 2
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = end - overlap
+    return chunks
+
+
+def make_doc(title, texts, first_index=0):
+    return [
+        {"id": f"{title}_c{first_index + i}", "source": "vetres", "title": title,
+         "page": first_index + i, "text": text, "score": 0.5}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_adjacent_chunks_are_merged_without_repeated_text():
+    pieces = overlapping_chunks(TEXT)
+    chunks = make_doc("Paper A", pieces)
+    doc_order, seen_docs = group_chunks_by_document(chunks)
+
+    context_text, stats = assemble_context(doc_order, seen_docs)
+
+    assert context_text == "Document 0: Paper A\n" + TEXT
+    assert stats["spans"] == 1
+    assert stats["overlap_chars_removed"] > 0
+    assert stats["assembled_tokens"] < stats["naive_tokens"]
+
+
+def test_one_header_per_document_in_citation_order():
+    chunks = make_doc("Paper A", ["alpha " * 20]) + make_doc("Paper B", ["beta " * 20]) \
+        + make_doc("Paper A", ["gamma " * 20], first_index=7)
+    doc_order, seen_docs = group_chunks_by_document(chunks)
+
+    context_text, stats = assemble_context(doc_order, seen_docs)
+
+    assert context_text.count("Document ") == 2
+    assert context_text.index("Document 0: Paper A") < context_text.index("Document 1: Paper B")
+    # 떨어진 구간(page 0, 7)은 병합하지 않고 구분자로 연결
+    assert "[...]" in context_text.split("Document 1:")[0]
+    assert stats["spans"] == 3
+
+
+def test_chunks_on_same_page_are_kept_as_separate_spans():
+    # PDF 가이드라인: 한 page에 청크 여러 개
+    chunks = [
+        {"id": "guide_p4_a", "title": "Guideline", "page": 4, "text": "Insulin dosing for cats."},
+        {"id": "guide_p4_b", "title": "Guideline", "page": 4, "text": "Monitoring glucose curves."},
+        {"id": "guide_p4_a", "title": "Guideline", "page": 4, "text": "Insulin dosing for cats."},
+    ]
+
+    spans, removed = merge_spans(chunks)
+
+    assert spans == ["Insulin dosing for cats.", "Monitoring glucose curves."]
+    assert removed == 0
+
+
+def test_short_coincidental_match_is_not_removed():
+    assert overlap_length("ends with the", "the start") == 0
+    assert overlap_length("x" * 10 + "shared tail text here!", "shared tail text here! next") == 22
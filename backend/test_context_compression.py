@@ -0,0 +1,36 @@
+"""
+compress_chunks 테스트 (유사도 상위 문장 유지, 숫자 문장 항상 유지, 원래 문장 순서)
+"""
+
+from context_compression import split_sentences, unique_sentences, compress_chunks
+
+# 질문 방향 [1, 0]과 가까울수록 관련 문장
+VECTORS = {
+    "Parvovirus causes severe vomiting.": [0.9, 0.1],
+    "The weather was pleasant.": [0.0, 1.0],
+    "Give maropitant at 1 mg/kg daily.": [0.1, 0.9],
+    "Supportive care is the mainstay of treatment.": [0.8, 0.2],
+}
+
+
+def embed(sentences):
+    return [VECTORS[sentence] for sentence in sentences]
+
+
+def test_split_sentences_keeps_decimal_numbers_together():
+    assert split_sentences("Dose is 0.5 mg/kg. Repeat q12h! Monitor?") == ["Dose is 0.5 mg/kg.", "Repeat q12h!", "Monitor?"]
+
+
+def test_keeps_top_and_numeric_sentences_in_original_order():
+    chunks = [{"id": "c0", "text": " ".join(VECTORS), "score": 0.7}]
+    sentences = unique_sentences(chunks)
+
+    compressed, stats = compress_chunks(chunks, [1.0, 0.0], sentences, embed(sentences), keep_ratio=0.5)
+
+    assert compressed[0]["text"] == ("Parvovirus causes severe vomiting. Give maropitant at 1 mg/kg daily. "
+                                     "Supportive care is the mainstay of treatment.")
+    assert compressed[0]["id"] == "c0"
+    assert chunks[0]["text"] == " ".join(VECTORS)  # 원본 청크는 그대로
+    assert stats["sentences_kept"] == 3
+    assert stats["numeric_kept"] == 1
+    assert stats["tokens_saved"] > 0
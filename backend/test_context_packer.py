@@ -0,0 +1,43 @@
+"""
+pack_context 테스트 (입력 순위 유지, 예산 초과 청크 건너뛰기, 통계)
+"""
+
+from context_packer import count_tokens, pack_context, CHUNK_OVERHEAD_TOKENS
+
+
+def make_chunk(chunk_id: str, score: float, words: int) -> dict:
+    return {"id": chunk_id, "score": score, "text": " ".join(["dose"] * words)}
+
+
+def test_fills_budget_in_input_order_and_skips_oversized():
+    chunks = [
+        make_chunk("top", 0.95, 10),
+        make_chunk("big", 0.90, 400),
+        make_chunk("mid", 0.70, 10),
+        make_chunk("low", 0.50, 10),
+    ]
+    small_cost = count_tokens(chunks[0]["text"]) + CHUNK_OVERHEAD_TOKENS
+    packed, stats = pack_context(chunks, budget_tokens=small_cost * 2)
+
+    assert [c["id"] for c in packed] == ["top", "mid"]
+    assert stats["tokens_used"] <= stats["budget_tokens"]
+    assert stats["chunks_kept"] == 2
+    assert sorted(stats["dropped_ids"]) == ["big", "low"]
+
+
+def test_keeps_fused_order_instead_of_raw_score():
+    # RRF/MMR 순위: 여러 쿼리에서 검색된 청크가 코사인 점수가 더 높은 청크보다 앞에 있을 수 있음
+    chunks = [make_chunk("fused-first", 0.60, 10), make_chunk("high-cosine", 0.95, 10)]
+    small_cost = count_tokens(chunks[0]["text"]) + CHUNK_OVERHEAD_TOKENS
+    packed, stats = pack_context(chunks, budget_tokens=small_cost)
+
+    assert [c["id"] for c in packed] == ["fused-first"]
+    assert stats["dropped_ids"] == ["high-cosine"]
+
+
+def test_everything_fits_in_large_budget():
+    chunks = [make_chunk(str(i), i / 10, 20) for i in range(5)]
+    packed, stats = pack_context(chunks, budget_tokens=100_000)
+
+    assert [c["id"] for c in packed] == ["0", "1", "2", "3", "4"]
+    assert stats["chunks_dropped"] == 0
@@ -0,0 +1,56 @@
+"""
+ConversationStore 테스트 (세션 생성, TTL 만료, LRU 제거, 턴 기록)
+"""
+
+from conversation_store import ConversationStore
+
+
+def test_create_keeps_recent_history():
+    store = ConversationStore(max_history=2)
+    history = [{"role": "user", "content": f"q{i}", "extra": True} for i in range(3)]
+
+    session = store.get(store.create(history))
+
+    assert session["history"] == [{"role": "user", "content": "q1"}, {"role": "user", "content": "q2"}]
+    assert session["chunk_refs"] == []
+
+
+def test_expired_session_is_removed():
+    store = ConversationStore(ttl_seconds=60)
+    session_id = store.create()
+    store._sessions[session_id]["updated_at"] -= 61
+
+    assert store.get(session_id) is None
+    assert store.get("unknown") is None
+    assert store.stats()["expirations"] == 1
+    assert store.stats()["sessions"] == 0
+
+
+def test_least_recently_used_session_is_evicted():
+    store = ConversationStore(max_sessions=2)
+    first, second = store.create(), store.create()
+    store.get(first)
+    third = store.create()
+
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_record_turn_keeps_top_chunk_refs():
+    store = ConversationStore(max_history=4, max_chunk_refs=5)
+    session_id = store.create()
+    chunks = [{"id": f"c{i}", "score": 1.0 - i / 10} for i in range(7)] + [{"text": "no id"}]
+
+    store.record_turn(session_id, "q1", "a1", chunks)
+    store.record_turn(session_id, "q2", "a2", chunks[:2])
+    store.record_turn("unknown", "q", "a", chunks)
+
+    session = store.get(session_id)
+    assert [msg["content"] for msg in session["history"]] == ["q1", "a1", "q2", "a2"]
+    assert session["chunk_refs"] == [{"id": "c0", "score": 1.0}, {"id": "c1", "score": 0.9}]
+
+    store.record_turn(session_id, "q3", "a3", chunks)
+    session = store.get(session_id)
+    assert [ref["id"] for ref in session["chunk_refs"]] == ["c0", "c1", "c2", "c3", "c4"]
+    assert [msg["content"] for msg in session["history"]] == ["q2", "a2", "q3", "a3"]
@@ -0,0 +1,39 @@
+"""
+EmbeddingCache 테스트 (정규화, LRU 제거, TTL 만료, 통계)
+"""
+
+import time
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, normalize_query
+
+
+def test_normalized_keys_share_entry():
+    cache = EmbeddingCache(max_entries=10)
+    cache.put("Core vaccines  for dogs", "m", [0.1, 0.2])
+
+    vector = cache.get("  core VACCINES for dogs ", "m")
+    assert vector is not None
+    assert vector.dtype == np.float32
+    assert cache.get("core vaccines for dogs", "other-model") is None
+    assert normalize_query("FIP　clinical signs") == "fip clinical signs"
+
+
+def test_lru_eviction_and_ttl():
+    cache = EmbeddingCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", "m", [1.0])
+    cache.put("b", "m", [2.0])
+    cache.get("a", "m")
+    cache.put("c", "m", [3.0])  # b가 가장 오래 사용되지 않음
+
+    assert cache.get("b", "m") is None
+    assert cache.get("a", "m") is not None
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("c", "m") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
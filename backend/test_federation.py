@@ -0,0 +1,91 @@
+"""
+연합 검색 테스트 (가짜 인덱스 사용, 네트워크 불필요)
+- 대상 문자열 파싱
+- 대상별 점수 정규화 + ID 기준 중복 제거 병합 (약하게 일치한 대상은 상위로 올라가지 않음)
+- 느린 대상은 대상별 타임아웃으로 빈 결과, 나머지 대상 결과로 응답
+"""
+
+import time
+import asyncio
+from types import SimpleNamespace
+
+from retrieval import MultiQueryRetriever
+from federation import FederatedRetriever, parse_targets, merge_target_results
+from selection import select_adaptive
+
+
+class FixedIndex:
+    """고정된 (id, score) 결과를 delay초 후 반환하는 가짜 Index"""
+
+    def __init__(self, matches, delay=0.0):
+        self.matches = matches
+        self.delay = delay
+        self.namespaces = []
+
+    def query(self, vector, top_k, include_metadata=True, namespace="", **kwargs):
+        time.sleep(self.delay)
+        self.namespaces.append(namespace)
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id=vector_id, score=score, metadata={"text": vector_id}) for vector_id, score in self.matches
+        ])
+
+
+def test_parse_targets():
+    targets = parse_targets("medical-guidelines-kr, medical-guidelines/documents@2.5,", default_timeout=5.0)
+
+    assert targets == [
+        {"name": "medical-guidelines-kr", "index": "medical-guidelines-kr", "namespace": None, "timeout": 5.0},
+        {"name": "medical-guidelines/documents", "index": "medical-guidelines", "namespace": "documents", "timeout": 2.5},
+    ]
+
+
+def test_minmax_merge_aligns_targets_and_deduplicates():
+    korean = [{"id": "kr1", "score": 0.45}, {"id": "kr2", "score": 0.35}]
+    papers = [{"id": "p1", "score": 0.75}, {"id": "p2", "score": 0.55}, {"id": "kr1", "score": 0.40}]
+
+    merged = merge_target_results([korean, papers], ["kr", "papers"], top_k=10)
+
+    ids = [chunk["id"] for chunk in merged]
+    assert len(ids) == len(set(ids)) == 4
+    # 대상별 하위 점수는 전체 최저 점수(0.35)에 맞추고, 상한은 대상 자신의 최고 점수
+    assert ids == ["p1", "p2", "kr1", "kr2"]
+    assert next(chunk for chunk in merged if chunk["id"] == "kr1")["merge_score"] == 0.45
+    assert next(chunk for chunk in merged if chunk["id"] == "kr1")["score"] == 0.45
+    assert merged[-1]["merge_score"] == 0.35
+
+
+def test_uniformly_weak_target_is_not_promoted_and_can_be_cut():
+    strong = [{"id": f"p{i}", "score": 0.80 - i * 0.02} for i in range(4)]
+    weak = [{"id": f"kr{i}", "score": 0.42 - i * 0.01} for i in range(4)]
+
+    merged = merge_target_results([strong, weak], ["papers", "kr"], top_k=10)
+    selected, stats = select_adaptive(merged, min_k=1, max_k=10, relative_threshold=0.8)
+
+    # 약한 대상의 1위는 전체 최고 점수로 올라가지 않음 (상한 = 자기 최고 코사인)
+    assert merged[0]["id"] == "p0"
+    assert next(chunk for chunk in merged if chunk["id"] == "kr0")["merge_score"] == 0.42
+    assert [chunk["target"] for chunk in selected] == ["papers"] * 4
+    assert stats["reason"] == "relative_threshold"
+
+
+def test_slow_target_times_out_without_blocking_others():
+    fast = MultiQueryRetriever(FixedIndex([("a", 0.9)]), max_workers=2, timeout=1.0)
+    slow = MultiQueryRetriever(FixedIndex([("b", 0.8)], delay=0.5), max_workers=2, timeout=0.1, namespace="papers")
+    retriever = FederatedRetriever([("fast", fast), ("slow", slow)])
+
+    started = time.perf_counter()
+    results, stats = asyncio.run(retriever.search([[0.1], [0.2]], top_k=5))
+
+    assert time.perf_counter() - started < 0.4
+    assert [[chunk["id"] for chunk in chunks] for chunks in results] == [["a"], ["a"]]
+    assert stats["targets"]["slow"]["timeouts"] == 2
+
+
+def test_target_namespace_is_passed_to_index():
+    index = FixedIndex([("a", 0.9)])
+    retriever = MultiQueryRetriever(index, max_workers=2, timeout=1.0, namespace="papers")
+
+    asyncio.run(retriever.search([[0.1]], top_k=5))
+    asyncio.run(retriever.search([[0.1]], top_k=5, namespace="documents"))
+
+    assert index.namespaces == ["papers", "documents"]
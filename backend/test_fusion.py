@@ -0,0 +1,36 @@
+"""
+fuse_results 테스트 (벡터 ID 중복 제거, RRF 순위, 최고 점수 유지, provenance)
+"""
+
+from fusion import fuse_results
+
+
+def hit(chunk_id, score, **metadata):
+    return {"id": chunk_id, "score": score, **metadata}
+
+
+def test_dedup_by_vector_id_keeps_max_score_and_provenance():
+    per_query = [
+        [hit("paper_1_c3", 0.61, page=3, title="A"), hit("paper_2_c3", 0.60, page=3, title="A")],
+        [hit("paper_1_c3", 0.72, page=3, title="A")],
+    ]
+    fused, stats = fuse_results(per_query, mode="max")
+
+    # 같은 title/page지만 ID가 다른 청크는 별개로 유지
+    assert [c["id"] for c in fused] == ["paper_1_c3", "paper_2_c3"]
+    assert fused[0]["score"] == 0.72
+    assert fused[0]["provenance"] == [{"query": 0, "rank": 0, "score": 0.61}, {"query": 1, "rank": 0, "score": 0.72}]
+    assert stats["hits"] == 3 and stats["unique"] == 2 and stats["multi_query"] == 1
+
+
+def test_rrf_favors_chunks_found_by_several_queries():
+    per_query = [
+        [hit("a", 0.90), hit("b", 0.80), hit("c", 0.70)],
+        [hit("c", 0.75), hit("d", 0.74)],
+        [hit("c", 0.71), hit("b", 0.70)],
+    ]
+    rrf, _ = fuse_results(per_query, mode="rrf")
+    by_max, _ = fuse_results(per_query, mode="max")
+
+    assert [c["id"] for c in rrf][:2] == ["c", "b"]
+    assert [c["id"] for c in by_max][0] == "a"
@@ -0,0 +1,73 @@
+"""
+계층형 2단계 검색 테스트 (가짜 인덱스 사용, 네트워크 불필요)
+- 1단계 문서 검색의 상위 논문으로 2단계 청크 검색이 필터링되는지
+- 문서 벡터가 없으면 None (전체 검색으로 대체)
+- 논문당 청크 수 제한
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from retrieval import MultiQueryRetriever
+from hierarchical import DOCUMENTS_NAMESPACE, document_vector_id, hierarchical_search, limit_per_document
+
+
+class TwoLevelIndex:
+    """documents 네임스페이스(문서 벡터)와 기본 네임스페이스(청크)를 흉내내는 가짜 Index"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.chunk_filters = []
+
+    def query(self, vector, top_k, include_metadata=True, namespace="", filter=None, **kwargs):
+        if namespace == DOCUMENTS_NAMESPACE:
+            matches = [
+                SimpleNamespace(id=document_vector_id(pmcid), score=score, metadata={"pmcid": pmcid})
+                for pmcid, score in self.documents[:top_k]
+            ]
+        else:
+            self.chunk_filters.append(filter)
+            allowed = filter["pmcid"]["$in"] if filter else ["PMC1", "PMC2", "PMC3"]
+            matches = [
+                SimpleNamespace(id=f"{pmcid}_c0", score=0.5, metadata={"pmcid": pmcid})
+                for pmcid in allowed
+            ]
+        return SimpleNamespace(matches=matches)
+
+
+def test_chunk_search_is_restricted_to_top_documents():
+    index = TwoLevelIndex([("PMC2", 0.9), ("PMC3", 0.7), ("PMC1", 0.4)])
+    retriever = MultiQueryRetriever(index, max_workers=2, timeout=5.0)
+
+    results, stats = asyncio.run(hierarchical_search(retriever, [[0.1], [0.2]], top_documents=2, top_k=15))
+
+    assert index.chunk_filters == [{"pmcid": {"$in": ["PMC2", "PMC3"]}}] * 2
+    assert [chunk["id"] for chunk in results[0]] == ["PMC2_c0", "PMC3_c0"]
+    assert stats["documents"] == 2
+
+
+def test_missing_document_vectors_returns_none():
+    retriever = MultiQueryRetriever(TwoLevelIndex([]), max_workers=2, timeout=5.0)
+
+    assert asyncio.run(hierarchical_search(retriever, [[0.1]], top_documents=5, top_k=15)) is None
+
+
+def test_limit_per_document_keeps_rank_order():
+    chunks = [{"id": "a1", "pmcid": "A"}, {"id": "a2", "pmcid": "A"}, {"id": "b1", "pmcid": "B"},
+              {"id": "a3", "pmcid": "A"}, {"id": "g1"}]
+
+    kept, dropped = limit_per_document(chunks, 2)
+
+    assert [chunk["id"] for chunk in kept] == ["a1", "a2", "b1", "g1"]
+    assert dropped == 1
+
+
+def test_limit_per_document_uses_chunk_id_without_metadata():
+    # two_phase 검색: 메타데이터 없이 ID/점수만 있음
+    chunks = [{"id": "paper_PMC1_c0"}, {"id": "frontvet_PMC1_c3"}, {"id": "paper_PMC2_c1"},
+              {"id": "paper_PMC1_c7"}, {"id": "legacy-id"}]
+
+    kept, dropped = limit_per_document(chunks, 2)
+
+    assert [chunk["id"] for chunk in kept] == ["paper_PMC1_c0", "frontvet_PMC1_c3", "paper_PMC2_c1", "legacy-id"]
+    assert dropped == 1
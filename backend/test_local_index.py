@@ -0,0 +1,114 @@
+"""
+LocalIndex 테스트 (저장 후 메모리 매핑 재로드, 전체 탐색 대비 정확도, 필터, fetch, int8,
+세그먼트 추가 저장/재구성)
+"""
+
+import numpy as np
+
+from local_index import LocalIndex, matches_filter
+
+DIM = 32
+
+
+def build(path, count=400, dtype="float32"):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32)
+    index = LocalIndex(path, nprobe=4, dtype=dtype)
+    index.upsert([
+        {"id": f"v{i}", "values": vectors[i].tolist(), "metadata": {"year": 2000 + i % 20, "pmcid": f"PMC{i % 7}"}}
+        for i in range(count)
+    ])
+    index.save(nlist=16)
+    return vectors
+
+
+def brute_force(vectors, query, top_k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"v{i}" for i in np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:top_k]]
+
+
+def test_reopened_index_matches_brute_force_when_probing_all_lists(tmp_path):
+    vectors = build(tmp_path / "index")
+    index = LocalIndex(tmp_path / "index")
+    query = vectors[5] + 0.1
+
+    result = index.query(vector=query.tolist(), top_k=10, include_metadata=True, nprobe=16)
+
+    assert [m.id for m in result.matches] == brute_force(vectors, query, 10)
+    assert result.matches[0].metadata["pmcid"] == "PMC5"
+    assert index.describe_index_stats()["total_vector_count"] == 400
+
+
+def test_filter_fetch_and_upsert_replaces_existing(tmp_path):
+    vectors = build(tmp_path / "index")
+    index = LocalIndex(tmp_path / "index", nprobe=16)
+
+    result = index.query(vector=vectors[0].tolist(), top_k=50, include_metadata=True,
+                         filter={"year": {"$gte": 2015}, "pmcid": {"$in": ["PMC1", "PMC2"]}})
+    assert result.matches
+    assert all(m.metadata["year"] >= 2015 and m.metadata["pmcid"] in ("PMC1", "PMC2") for m in result.matches)
+
+    index.upsert([{"id": "v3", "values": vectors[3].tolist(), "metadata": {"year": 1999}}])
+    index.save(nlist=16)
+    assert index.fetch(ids=["v3", "missing"]).vectors["v3"].metadata == {"year": 1999}
+    assert index.describe_index_stats()["total_vector_count"] == 400
+
+
+def test_int8_search_finds_the_query_vector(tmp_path):
+    vectors = build(tmp_path / "index", dtype="int8")
+    index = LocalIndex(tmp_path / "index", nprobe=16)
+
+    assert index.query(vector=vectors[42].tolist(), top_k=1).matches[0].id == "v42"
+
+
+def test_int8_does_not_store_float32_vectors(tmp_path):
+    vectors = build(tmp_path / "index", dtype="int8")
+    index = LocalIndex(tmp_path / "index")
+
+    assert not list((tmp_path / "index").rglob("vectors.npy"))
+    assert np.allclose(index.fetch(ids=["v7"]).vectors["v7"].values,
+                       vectors[7] / np.linalg.norm(vectors[7]), atol=0.02)
+
+
+def test_save_appends_segment_without_touching_existing_files(tmp_path):
+    vectors = build(tmp_path / "index")
+    index = LocalIndex(tmp_path / "index", nprobe=16)
+    namespace_dir = tmp_path / "index" / "__default__"
+    before = {path: path.stat().st_mtime_ns for path in namespace_dir.rglob("*.npy")}
+    centroids = index._namespaces["__default__"].centroids.copy()
+
+    index.upsert([{"id": "new", "values": vectors[9].tolist(), "metadata": {}},
+                  {"id": "v1", "values": vectors[2].tolist(), "metadata": {"moved": True}}])
+    index.save()
+
+    reopened = LocalIndex(tmp_path / "index", nprobe=16)
+    data = reopened._namespaces["__default__"]
+    assert {path: path.stat().st_mtime_ns for path in before} == before
+    assert len(data.segments) == 2 and np.array_equal(data.centroids, centroids)
+    assert reopened.describe_index_stats()["total_vector_count"] == 401
+    top = [m.id for m in reopened.query(vector=vectors[2].tolist(), top_k=3, include_metadata=True).matches]
+    assert set(top[:2]) == {"v2", "v1"} and top.count("v1") == 1
+
+
+def test_rebuild_merges_segments_and_retrains(tmp_path):
+    vectors = build(tmp_path / "index")
+    index = LocalIndex(tmp_path / "index", nprobe=16)
+    index.upsert([{"id": f"extra{i}", "values": vectors[i].tolist(), "metadata": {}} for i in range(50)])
+    index.save()
+
+    index.rebuild(nlist=8)
+
+    reopened = LocalIndex(tmp_path / "index", nprobe=8)
+    data = reopened._namespaces["__default__"]
+    assert len(data.segments) == 1 and len(data.centroids) == 8
+    assert [path.name for path in (tmp_path / "index" / "__default__").glob("seg-*")] == [data.manifest["segments"][0]]
+    assert reopened.describe_index_stats()["total_vector_count"] == 450
+    assert reopened.query(vector=vectors[142].tolist(), top_k=1).matches[0].id == "v142"
+
+
+def test_matches_filter_operators():
+    metadata = {"doc_type": "paper", "year": 2020}
+
+    assert matches_filter(metadata, {"doc_type": "paper"})
+    assert matches_filter(metadata, {"$or": [{"year": {"$lt": 2000}}, {"doc_type": {"$ne": "book"}}]})
+    assert not matches_filter(metadata, {"year": {"$nin": [2020]}})
@@ -0,0 +1,53 @@
+"""
+ResponseCache 테스트 (크기 제한 LRU, 코퍼스 버전 무효화, 모드별 키, SSE 재생 청크 분할)
+"""
+
+from response_cache import ResponseCache, iter_replay_chunks
+
+
+def make_response(answer: str) -> dict:
+    return {"answer": answer, "references": [], "context_chunks": [], "followup_questions": []}
+
+
+def test_get_put_and_version_invalidation():
+    cache = ResponseCache(corpus_version="v1")
+    cache.put("FIP clinical signs?", "한국어", make_response("answer"))
+
+    assert cache.get("fip  clinical signs?", "한국어")["answer"] == "answer"
+    assert cache.get("fip clinical signs?", "English") is None
+
+    assert cache.set_corpus_version("v1") is False
+    assert cache.set_corpus_version("v2") is True
+    assert cache.get("FIP clinical signs?", "한국어") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_mode_variants_are_cached_separately():
+    cache = ResponseCache()
+    cache.put("FIP clinical signs?", "한국어", make_response("mmr answer"), "selection=mmr")
+
+    assert cache.get("FIP clinical signs?", "한국어", "selection=score") is None
+    assert cache.get("FIP clinical signs?", "한국어") is None
+    assert cache.get("FIP clinical signs?", "한국어", "selection=mmr")["answer"] == "mmr answer"
+
+
+def test_byte_limit_evicts_least_recently_used():
+    entry_size = len(str(make_response("x" * 100)))
+    cache = ResponseCache(max_entries=100, max_bytes=entry_size * 2 + 10)
+    cache.put("q1", "en", make_response("x" * 100))
+    cache.put("q2", "en", make_response("y" * 100))
+    cache.get("q1", "en")
+    cache.put("q3", "en", make_response("z" * 100))
+
+    assert cache.get("q2", "en") is None
+    assert cache.get("q1", "en") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_replay_chunks_keep_citation_tags_whole():
+    answer = "Core vaccines include CDV.{{citation:0,12}} " + "a" * 120 + "{{citation:3}}"
+    chunks = list(iter_replay_chunks(answer, chunk_chars=10))
+
+    assert "".join(chunks) == answer
+    for chunk in chunks:
+        assert chunk.count("{{") == chunk.count("}}")
@@ -0,0 +1,140 @@
+"""
+MultiQueryRetriever 테스트 (가짜 인덱스 사용, 네트워크 불필요)
+- 확장 쿼리 검색이 직렬이 아니라 동시에 실행되는지 (wall ≈ max(q))
+- 타임아웃/오류가 난 쿼리가 빈 결과로 처리되는지
+- ID 전용 검색 + fetch 2단계 검색
+- 하이브리드 쿼리를 거부하는 인덱스는 밀집 검색으로 재시도
+- 같은 요청에서 이미 검색한 쿼리는 재사용
+"""
+
+import time
+import asyncio
+from types import SimpleNamespace
+
+from retrieval import MultiQueryRetriever, search_reusing
+
+
+class SlowIndex:
+    """벡터 첫 값(초)만큼 블로킹 후 결과를 반환하는 가짜 Pinecone Index"""
+
+    def query(self, vector, top_k, include_metadata=True, **kwargs):
+        time.sleep(vector[0])
+        match = SimpleNamespace(id=f"v{vector[0]}", score=0.9, metadata={"text": "chunk"})
+        return SimpleNamespace(matches=[match])
+
+
+def test_queries_run_concurrently():
+    retriever = MultiQueryRetriever(SlowIndex(), max_workers=4, timeout=5.0)
+    results, stats = asyncio.run(retriever.search([[0.2], [0.2], [0.2]], top_k=15))
+
+    assert [len(chunks) for chunks in results] == [1, 1, 1]
+    assert results[0][0]["score"] == 0.9
+    assert stats["timeouts"] == 0
+    # 직렬이면 ~600ms, 병렬이면 ~200ms
+    assert stats["wall_ms"] < stats["sum_ms"] * 0.6
+
+
+def test_timeout_returns_empty_result():
+    retriever = MultiQueryRetriever(SlowIndex(), max_workers=4, timeout=0.1)
+    results, stats = asyncio.run(retriever.search([[0.0], [0.5]], top_k=15))
+
+    assert len(results[0]) == 1
+    assert results[1] == []
+    assert stats["timeouts"] == 1
+
+
+class MetadataIndex:
+    """ID 검색/메타데이터 조회를 흉내내는 가짜 Index"""
+
+    store = {"a": {"text": "alpha " * 50}, "b": {"text": "beta"}}
+
+    def query(self, vector, top_k, include_metadata=True, **kwargs):
+        matches = [
+            SimpleNamespace(id=vector_id, score=0.8, metadata=metadata if include_metadata else None)
+            for vector_id, metadata in self.store.items()
+        ]
+        return SimpleNamespace(matches=matches)
+
+    def fetch(self, ids):
+        return SimpleNamespace(vectors={
+            vector_id: SimpleNamespace(metadata=self.store[vector_id], values=[0.1] * 4)
+            for vector_id in ids if vector_id in self.store
+        })
+
+
+def test_id_only_search_is_smaller_and_fetch_fills_metadata():
+    retriever = MultiQueryRetriever(MetadataIndex(), max_workers=2, timeout=5.0)
+    _, full_stats = asyncio.run(retriever.search([[0.0]], top_k=2))
+    results, id_stats = asyncio.run(retriever.search([[0.0]], top_k=2, include_metadata=False))
+
+    assert results[0][0] == {"id": "a", "score": 0.8}
+    assert id_stats["payload_bytes"] < full_stats["payload_bytes"]
+
+    metadata, fetch_stats = asyncio.run(retriever.fetch(["a", "missing"]))
+    assert metadata == {"a": MetadataIndex.store["a"]}
+    assert fetch_stats["missing"] == 1
+    assert fetch_stats["payload_bytes"] > 0
+
+
+class DenseOnlyIndex:
+    """sparse_vector 인자를 거부하는 가짜 Index (cosine 인덱스의 희소-밀집 쿼리 오류)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def query(self, vector, top_k, include_metadata=True, **kwargs):
+        self.calls.append(sorted(kwargs))
+        if "sparse_vector" in kwargs:
+            raise ValueError("sparse values are only supported for dotproduct indexes")
+        return SimpleNamespace(matches=[SimpleNamespace(id="a", score=0.7, metadata={"text": "alpha"})])
+
+
+def test_hybrid_query_error_falls_back_to_dense():
+    index = DenseOnlyIndex()
+    retriever = MultiQueryRetriever(index, max_workers=2, timeout=1.0)
+    sparse = {"indices": [1], "values": [0.5]}
+
+    results, stats = asyncio.run(retriever.search([[0.1], [0.2]], top_k=5, sparse_vectors=[sparse, None]))
+
+    assert [[chunk["id"] for chunk in chunks] for chunks in results] == [["a"], ["a"]]
+    assert index.calls.count(["sparse_vector"]) == 1 and index.calls.count([]) == 2
+
+
+def test_search_reusing_skips_already_searched_queries():
+    index = DenseOnlyIndex()
+    retriever = MultiQueryRetriever(index, max_workers=2, timeout=1.0)
+    search_cache = {}
+
+    asyncio.run(search_reusing(retriever, ["original"], [[0.1]], search_cache, top_k=5))
+    results, stats = asyncio.run(search_reusing(
+        retriever, ["original", "expanded 1", "expanded 2"], [[0.1], [0.2], [0.3]], search_cache, top_k=5
+    ))
+
+    assert len(index.calls) == 3
+    assert stats["reused"] == 1 and len(stats["latencies_ms"]) == 2
+    assert results[0] is search_cache["original"]
+    assert [[chunk["id"] for chunk in chunks] for chunks in results] == [["a"], ["a"], ["a"]]
+
+
+class FlakyIndex:
+    """벡터 첫 값이 음수면 일시적 서버 오류를 내는 가짜 Index"""
+
+    def query(self, vector, top_k, include_metadata=True, **kwargs):
+        if vector[0] < 0:
+            raise ConnectionError("503 Service Unavailable")
+        return SimpleNamespace(matches=[SimpleNamespace(id="a", score=0.7, metadata={"text": "alpha"})])
+
+    def fetch(self, ids):
+        raise ConnectionError("503 Service Unavailable")
+
+
+def test_query_error_returns_empty_result_with_flag():
+    retriever = MultiQueryRetriever(FlakyIndex(), max_workers=2, timeout=1.0)
+    results, stats = asyncio.run(retriever.search([[0.1], [-1.0]], top_k=5))
+
+    assert [len(chunks) for chunks in results] == [1, 0]
+    assert stats["errors"] == 1 and stats["timeouts"] == 0
+
+    metadata, fetch_stats = asyncio.run(retriever.fetch(["a"]))
+    assert metadata == {}
+    assert fetch_stats["failed"] is True and fetch_stats["missing"] == 1
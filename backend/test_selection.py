@@ -0,0 +1,58 @@
+"""
+select_adaptive 테스트 (상대 임계값, 점수 간격, min_k/max_k 범위) 및 mmr_select 다양성 선택
+"""
+
+from selection import select_adaptive, mmr_select
+
+
+def chunks_with_scores(scores):
+    return [{"id": f"c{i}", "score": score} for i, score in enumerate(scores)]
+
+
+def test_cuts_below_relative_threshold():
+    chunks = chunks_with_scores([0.70, 0.68, 0.66, 0.64, 0.62, 0.60, 0.55, 0.50, 0.45])
+    selected, stats = select_adaptive(chunks, min_k=2, max_k=25, relative_threshold=0.8, max_gap=1.0)
+
+    assert [c["id"] for c in selected] == ["c0", "c1", "c2", "c3", "c4", "c5"]
+    assert stats["reason"] == "relative_threshold"
+
+
+def test_cuts_at_score_gap_but_respects_min_k():
+    chunks = chunks_with_scores([0.70, 0.50, 0.49, 0.48, 0.47, 0.46, 0.30])
+    selected, stats = select_adaptive(chunks, min_k=3, max_k=25, relative_threshold=0.0, max_gap=0.1)
+
+    # 0.70 → 0.50 간격은 min_k 이전이라 무시, 0.46 → 0.30에서 자름
+    assert stats["k"] == 6
+    assert stats["reason"] == "score_gap"
+
+    # 하이브리드 점수: 절대 간격 기준 생략
+    _, stats = select_adaptive(chunks, min_k=3, max_k=25, relative_threshold=0.0, max_gap=None)
+    assert stats["k"] == 7
+
+
+def test_bounded_by_max_k_and_sorted():
+    chunks = chunks_with_scores([0.5 + i * 0.001 for i in range(40)])
+    selected, stats = select_adaptive(chunks, min_k=5, max_k=25)
+
+    assert stats["k"] == 25
+    assert stats["reason"] == "max_k"
+    assert selected[0]["id"] == "c39"
+
+
+def test_mmr_skips_near_duplicate_chunks():
+    chunks = [
+        {"id": "a1", "values": [1.0, 0.0, 0.0]},
+        {"id": "a2", "values": [0.99, 0.01, 0.0]},  # a1과 거의 동일
+        {"id": "b", "values": [0.6, 0.8, 0.0]},
+    ]
+    selected, stats = mmr_select(chunks, [1.0, 0.0, 0.0], k=2, lambda_mult=0.3)
+
+    assert [c["id"] for c in selected] == ["a1", "b"]
+    assert stats["candidates"] == 3
+
+
+def test_mmr_with_lambda_one_is_pure_relevance():
+    chunks = [{"id": f"c{i}", "values": [1.0, i * 0.1]} for i in range(5)]
+    selected, _ = mmr_select(chunks, [1.0, 0.0], k=3, lambda_mult=1.0)
+
+    assert [c["id"] for c in selected] == ["c0", "c1", "c2"]
@@ -0,0 +1,55 @@
+"""
+SemanticCache 테스트 (임계값 히트/미스, LRU 슬롯 교체, 모드별 분리, 통계)
+"""
+
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+
+def unit(seed: int, dim: int = 8) -> np.ndarray:
+    vector = np.random.default_rng(seed).normal(size=dim)
+    return vector / np.linalg.norm(vector)
+
+
+def test_near_duplicate_hits_and_distant_misses():
+    cache = SemanticCache(dim=8, capacity=4, threshold=0.95)
+    base = unit(0)
+    cache.add(base, [{"text": "core vaccines"}])
+
+    paraphrase = base + 0.05 * unit(1)
+    chunks, similarity = cache.lookup(paraphrase)
+    assert chunks == [{"text": "core vaccines"}]
+    assert similarity >= 0.95
+
+    assert cache.lookup(unit(2)) is None
+    stats = cache.stats()
+    assert stats["lookups"] == 2
+    assert stats["hits"] == 1
+    assert sum(stats["best_similarity_histogram"].values()) == 2
+
+
+def test_capacity_evicts_least_recently_used_slot():
+    cache = SemanticCache(dim=8, capacity=2, threshold=0.99)
+    cache.add(unit(10), [{"id": "a"}])
+    cache.add(unit(11), [{"id": "b"}])
+    cache.lookup(unit(10))
+    cache.add(unit(12), [{"id": "c"}])
+
+    assert cache.lookup(unit(11)) is None
+    assert cache.lookup(unit(10))[0] == [{"id": "a"}]
+    assert cache.lookup(unit(12))[0] == [{"id": "c"}]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lookup_only_matches_same_mode_variant():
+    cache = SemanticCache(dim=8, capacity=4, threshold=0.95)
+    cache.add(unit(20), [{"id": "mmr"}], "selection=mmr")
+
+    assert cache.lookup(unit(20), "selection=score") is None
+    assert cache.lookup(unit(20)) is None
+
+    cache.add(unit(20), [{"id": "score"}], "selection=score")
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(unit(20), "selection=mmr")[0] == [{"id": "mmr"}]
+    assert cache.lookup(unit(20), "selection=score")[0] == [{"id": "score"}]
@@ -0,0 +1,42 @@
+"""
+SparseEncoder 테스트 (임상 토큰화, BM25 가중치, 저장/로드, 쿼리-문서 매칭)
+"""
+
+from sparse_encoder import SparseEncoder, tokenize
+
+CORPUS = [
+    "Serum T4 >4.0 µg/dL confirms hyperthyroidism in cats.",
+    "Methimazole is the first-line drug for feline hyperthyroidism.",
+    "Vaccination schedules for dogs include distemper and parvovirus.",
+    "Cats with chronic kidney disease need fluid therapy.",
+]
+
+
+def dot(a, b):
+    weights = dict(zip(a["indices"], a["values"]))
+    return sum(weights.get(i, 0.0) * value for i, value in zip(b["indices"], b["values"]))
+
+
+def test_tokenize_keeps_clinical_tokens_together():
+    assert tokenize("T4 >4.0 µg/dL, IL-6") == ["t4", "4.0", "μg/dl", "il-6"]
+
+
+def test_exact_token_query_ranks_matching_chunk_first():
+    encoder = SparseEncoder.build(CORPUS)
+    query = encoder.encode_query("methimazole dose")
+
+    scores = [dot(query, encoder.encode_document(text)) for text in CORPUS]
+    assert max(range(len(CORPUS)), key=scores.__getitem__) == 1
+    assert scores[2] == 0.0
+
+
+def test_rare_tokens_weigh_more_than_common_ones(tmp_path):
+    encoder = SparseEncoder.build(CORPUS)
+    encoder.save(tmp_path / "vocab.json.gz")
+    loaded = SparseEncoder.load(tmp_path / "vocab.json.gz")
+
+    vector = loaded.encode_document(CORPUS[0])
+    weights = {loaded.tokens[i]: value for i, value in zip(vector["indices"], vector["values"])}
+    assert loaded.num_docs == 4
+    assert weights["μg/dl"] > weights["cats"]
+    assert abs(sum(value * value for value in vector["values"]) - 1.0) < 1e-9
@@ -0,0 +1,77 @@
+"""
+추측 실행 테스트 (가짜 생성 스트림 사용, 네트워크 불필요)
+- 컨텍스트 변화량 (1 - Jaccard)과 채택/거절 결정
+- 추측 생성은 백그라운드에서 버퍼에 쌓이고 채택 시 처음부터 재생
+- 거절 시 취소하면 생성 스트림도 닫힘
+"""
+
+import asyncio
+
+from speculation import SpeculativeStream, accept_speculation, context_change
+
+
+async def fake_answer(tokens, delay=0.01, closed=None):
+    try:
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield token
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+def test_context_change():
+    assert context_change([], []) == 0.0
+    assert context_change(["a", "b"], ["b", "a"]) == 0.0
+    assert context_change(["a", "b", "c"], ["a", "b", "d"]) == 0.5
+    assert context_change(["a"], ["b"]) == 1.0
+
+
+def test_accept_speculation_compares_chunk_sets():
+    stats = {"requests": 0, "accepted": 0, "rejected": 0, "context_change_total": 0.0}
+    speculative = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+
+    # 확장 검색이 같은 청크를 다른 순서로 찾음 → 채택
+    assert accept_speculation(speculative, [{"id": "c"}, {"id": "a"}, {"id": "b"}], 0.3, stats) == (True, 0.0)
+    # 청크 하나만 바뀜 (변화량 0.5) → 임계값 0.3 초과로 거절
+    assert accept_speculation(speculative, [{"id": "a"}, {"id": "b"}, {"id": "d"}], 0.3, stats) == (False, 0.5)
+
+    assert stats == {"requests": 2, "accepted": 1, "rejected": 1, "context_change_total": 0.5}
+
+
+def test_tokens_are_buffered_then_replayed_in_order():
+    async def run():
+        speculation = SpeculativeStream(fake_answer(["고양이", " ", "CKD"]))
+        await asyncio.sleep(0.1)  # 채택 결정 전 생성 완료
+        assert speculation.first_item_at is not None
+        return [token async for token in speculation.replay()]
+
+    assert asyncio.run(run()) == ["고양이", " ", "CKD"]
+
+
+def test_cancel_closes_generation():
+    async def run():
+        closed = []
+        speculation = SpeculativeStream(fake_answer(["a"] * 100, closed=closed))
+        await asyncio.sleep(0.03)
+        speculation.cancel()
+        await asyncio.sleep(0.01)
+        return closed
+
+    assert asyncio.run(run()) == [True]
+
+
+def test_generation_error_is_raised_on_replay():
+    async def failing():
+        yield "a"
+        raise RuntimeError("stream failed")
+
+    async def run():
+        received = []
+        try:
+            async for token in SpeculativeStream(failing()).replay():
+                received.append(token)
+        except RuntimeError as e:
+            return received, str(e)
+
+    assert asyncio.run(run()) == (["a"], "stream failed")
@@ -0,0 +1,55 @@
+"""
+StreamOutputStage 테스트 (passthrough, 크기/시간 창 묶기, 최종 결과 전달)
+"""
+
+import asyncio
+
+from sse_output import StreamOutputStage
+
+
+async def fake_answer_stream(tokens, delays=None):
+    """generate_answer_stream과 같은 형식의 가짜 스트림"""
+    for i, token in enumerate(tokens):
+        if delays:
+            await asyncio.sleep(delays[i])
+        yield (token, False)
+    yield ("".join(tokens), True, [], {})
+
+
+async def collect(stage, source):
+    return [result async for result in stage.run(source)]
+
+
+def test_passthrough_keeps_every_token():
+    tokens = ["a", "b", "c"]
+    results = asyncio.run(collect(StreamOutputStage(mode="passthrough"), fake_answer_stream(tokens)))
+
+    assert [r[0] for r in results[:-1]] == tokens
+    assert results[-1][1] is True
+
+
+def test_coalesce_merges_fast_tokens_by_size():
+    tokens = ["x" * 10] * 10
+    stage = StreamOutputStage(mode="coalesce", flush_ms=1000, flush_bytes=30)
+    results = asyncio.run(collect(stage, fake_answer_stream(tokens)))
+
+    frames = [r[0] for r in results if len(r) == 2]
+    assert "".join(frames) == "x" * 100
+    assert len(frames) == 4
+    assert results[-1][0] == "x" * 100
+    assert stage.stats()["frames"] == 4
+
+
+def test_coalesce_flushes_when_window_expires_during_stall():
+    stage = StreamOutputStage(mode="coalesce", flush_ms=20, flush_bytes=10_000)
+    source = fake_answer_stream(["a", "b", "c"], delays=[0, 0, 0.2])
+
+    async def first_frame_time():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async for result in stage.run(source):
+            return result, loop.time() - start
+
+    (text, _), elapsed = asyncio.run(first_frame_time())
+    assert text == "ab"
+    assert elapsed < 0.15
@@ -0,0 +1,88 @@
+"""
+로컬 용어 확장 테스트
+- 한국어 용어(띄어쓰기/조사 무관) → 영어 대표어 쿼리
+- 대문자 약어는 대소문자 구분, 긴 용어 우선 매칭
+- 배포되는 vet_terms.json 로드 및 확장 속도
+- 일반 용어/모호한 약어가 특정 질환으로 바뀌지 않음
+- 문장 첫 글자 대문자인 일반 단어는 바꾸지 않음 (약어/상품명/한국어만 대표어로 교체)
+"""
+
+import time
+
+from term_expansion import TermExpander, load_term_expander
+
+GROUPS = [
+    ["chronic kidney disease", "CKD", "chronic renal failure", "만성 신장병"],
+    ["alanine aminotransferase", "ALT"],
+    ["mast cell tumor", "MCT", "비만세포종"],
+    ["obesity", "비만"],
+    ["carprofen", "Rimadyl"],
+    ["feline", "cat", "고양이"],
+]
+
+
+def test_korean_terms_are_rewritten_to_english():
+    expander = TermExpander(GROUPS)
+
+    queries = expander.expand("고양이 만성신장병은 어떻게 관리하나요?")
+
+    assert queries[0] == "고양이 만성신장병은 어떻게 관리하나요?"
+    assert queries[1] == "feline chronic kidney disease은 어떻게 관리하나요?"
+    assert queries[2] == "feline cat chronic kidney disease CKD chronic renal failure"
+
+
+def test_abbreviations_are_case_sensitive_and_longest_match_wins():
+    expander = TermExpander(GROUPS)
+
+    assert expander.expand("What is the alt key?") == ["What is the alt key?"]
+    assert [g for _, _, g in expander.match("ALT 상승과 비만세포종")] == [1, 2]
+    assert expander.expand("Rimadyl for cats")[1] == "carprofen for cats"
+
+
+def test_shipped_dictionary_loads_and_expands_quickly():
+    expander = load_term_expander()
+    assert expander is not None
+
+    questions = ["고양이 FIP 치료", "IMHA in dogs", "당뇨병성 케톤산증 수액 요법", "core vaccines for puppies"]
+    start = time.perf_counter()
+    for _ in range(200):
+        results = [expander.expand(question) for question in questions]
+    per_question_us = (time.perf_counter() - start) / (200 * len(questions)) * 1e6
+
+    assert "feline infectious peritonitis" in results[0][1]
+    assert "diabetic ketoacidosis fluid therapy" == results[2][1]
+    assert per_question_us < 1000
+
+
+def test_generic_terms_and_ambiguous_abbreviations_are_not_steered():
+    expander = load_term_expander()
+
+    assert expander.expand("강아지 복막염 치료")[1] == "canine peritonitis 치료"
+    assert expander.expand("DM in German Shepherds") == ["DM in German Shepherds"]
+    assert "osteoarthritis" not in " ".join(expander.expand("노령견 관절염"))
+
+
+def test_sentence_initial_capital_is_not_replaced():
+    expander = TermExpander(GROUPS)
+
+    queries = expander.expand("Cats with CKD")
+
+    assert queries[1] == "Cats with chronic kidney disease"
+    assert expander.expand("Rimadyl for cats")[1] == "carprofen for cats"
+
+
+def test_shipped_dictionary_keeps_plain_english_terms():
+    expander = load_term_expander()
+
+    assert "diabetes mellitus" in expander.expand("Cats with diabetes")[-1]
+    assert not any("feline with" in query for query in expander.expand("Cats with diabetes"))
+    assert "distemper" not in " ".join(expander.expand("홍역 증상"))
+
+
+def test_excluded_abbreviations_are_dropped_on_load(tmp_path):
+    path = tmp_path / "terms.json"
+    path.write_text('{"excluded": ["DM"], "curated": [["diabetes mellitus", "DM", "당뇨병"]], "mined": []}', encoding="utf-8")
+
+    expander = TermExpander.load(path)
+
+    assert expander.groups == [["diabetes mellitus", "당뇨병"]]
@@ -0,0 +1,130 @@
+"""
+이미 수집된 논문의 문서 벡터 백필 (계층 검색 1단계용)
+1. XML 폴더의 논문마다 PMCID, 제목, 초록, 연도 추출
+2. 제목 + 초록을 100개씩 임베딩해 documents 네임스페이스에 doc_<PMCID> ID로 upsert
+   (새로 수집하는 논문은 process_*_xml.py가 청크와 함께 문서 벡터를 저장)
+
+사용법:
+  python build_document_vectors.py <XML 폴더> [<XML 폴더> ...] [--dry-run]
+"""
+
+import os
+import re
+import sys
+import argparse
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from openai import OpenAI
+from pinecone import Pinecone
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import slim_metadata  # noqa: E402
+from hierarchical import DOCUMENTS_NAMESPACE, document_vector_id, document_vector_text  # noqa: E402
+from local_index import LocalIndex, local_index_path  # noqa: E402
+
+load_dotenv()
+
+BATCH_SIZE = 100
+VECTOR_TARGETS = os.getenv("VECTOR_TARGETS", "pinecone")
+
+
+def element_text(element) -> str:
+    return "".join(element.itertext()).strip() if element is not None else ""
+
+
+def extract_document(xml_path: Path) -> Optional[Dict]:
+    """PMC XML → {pmcid, title, abstract, year} (process_*_xml.py와 같은 PMCID 규칙: 파일명 우선)"""
+    try:
+        root = ET.parse(xml_path).getroot()
+    except ET.ParseError as e:
+        print(f"  ❌ XML 파싱 오류 {xml_path.name}: {e}")
+        return None
+
+    article_meta = root.find('.//article-meta')
+    if article_meta is None:
+        return None
+
+    pmcid_match = re.search(r'PMC\d+', xml_path.name)
+    pmcid = pmcid_match.group(0) if pmcid_match else element_text(article_meta.find('.//article-id[@pub-id-type="pmcid"]'))
+    year_elem = article_meta.find('.//pub-date[@pub-type="epub"]/year')
+    if year_elem is None:
+        year_elem = article_meta.find('.//pub-date/year')
+
+    return {
+        "pmcid": pmcid,
+        "title": element_text(article_meta.find('.//article-title')),
+        "abstract": element_text(article_meta.find('.//abstract')),
+        "year": element_text(year_elem)
+    }
+
+
+def upsert_batch(client: OpenAI, index, local_index, documents: List[Dict]):
+    texts = [document_vector_text(doc["title"], doc["abstract"]) for doc in documents]
+    response = client.embeddings.create(model="text-embedding-3-small", input=texts)
+    vectors = [
+        {
+            "id": document_vector_id(doc["pmcid"]),
+            "values": item.embedding,
+            "metadata": slim_metadata({"doc_type": "paper", "year": doc["year"], "pmcid": doc["pmcid"]})
+        }
+        for doc, item in zip(documents, response.data)
+    ]
+    if index is not None:
+        index.upsert(vectors=vectors, namespace=DOCUMENTS_NAMESPACE)
+    if local_index is not None:
+        local_index.upsert(vectors, namespace=DOCUMENTS_NAMESPACE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="논문 문서 벡터(제목 + 초록) 백필")
+    parser.add_argument("folders", nargs="+", type=Path)
+    parser.add_argument("--dry-run", action="store_true", help="임베딩/저장 없이 추출 결과만 집계")
+    args = parser.parse_args()
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    index = None
+    if VECTOR_TARGETS != "local" and not args.dry_run:
+        index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(os.getenv("PINECONE_INDEX_NAME", "medical-guidelines"))
+    local_index = LocalIndex(local_index_path()) if VECTOR_TARGETS in ("local", "both") and not args.dry_run else None
+
+    totals = {"files": 0, "documents": 0, "no_abstract": 0, "skipped": 0}
+    pending: List[Dict] = []
+    seen = set()
+
+    for folder in args.folders:
+        for xml_path in sorted(folder.glob("*.xml")):
+            if xml_path.name.startswith("."):
+                continue
+            totals["files"] += 1
+            doc = extract_document(xml_path)
+            if doc is None or not doc["pmcid"] or doc["pmcid"] in seen or not (doc["title"] or doc["abstract"]):
+                totals["skipped"] += 1
+                continue
+            seen.add(doc["pmcid"])
+            totals["no_abstract"] += 0 if doc["abstract"] else 1
+            pending.append(doc)
+
+            if len(pending) >= BATCH_SIZE:
+                if not args.dry_run:
+                    upsert_batch(client, index, local_index, pending)
+                totals["documents"] += len(pending)
+                pending = []
+                print(f"  📚 문서 벡터 {totals['documents']:,}개 (파일 {totals['files']:,}개 확인)")
+                sys.stdout.flush()
+
+    if pending:
+        if not args.dry_run:
+            upsert_batch(client, index, local_index, pending)
+        totals["documents"] += len(pending)
+
+    if local_index is not None:
+        local_index.save()
+
+    print(f"\n✅ 완료: {totals}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+하이브리드 검색용 BM25 어휘 생성 (+ 기존 벡터에 희소 벡터 백필)
+1. 청크 저장소의 모든 청크 본문을 한 번 훑어 어휘/문서 빈도(IDF) 계산 → SPARSE_VOCAB_PATH에 저장
+2. --backfill: 인덱스의 벡터를 100개씩 fetch해서 sparse_values를 붙여 다시 upsert
+   (Pinecone 희소-밀집 쿼리는 metric=dotproduct 인덱스에서만 동작)
+
+사용법:
+  python build_sparse_vocab.py [--backfill] [--index medical-guidelines] [--namespace ""]
+  (어휘를 다시 만들면 토큰 인덱스가 바뀌므로 반드시 --backfill로 모든 벡터를 다시 인코딩)
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pinecone import Pinecone
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import ChunkStore, chunk_store_path  # noqa: E402
+from sparse_encoder import SparseEncoder, index_metric, load_sparse_encoder, sparse_vocab_path  # noqa: E402
+
+load_dotenv()
+
+
+def page_ids(page) -> list:
+    """index.list() 페이지에서 ID 목록 추출 (SDK 버전에 따라 문자열 리스트 또는 ListResponse)"""
+    items = page.vectors if hasattr(page, "vectors") else page
+    return [getattr(item, "id", item) for item in items]
+
+
+def build_vocab(store: ChunkStore) -> SparseEncoder:
+    print(f"📚 어휘 생성: {store.path}")
+    encoder = SparseEncoder.build(text for _, text in store.iter_texts())
+    encoder.save(sparse_vocab_path())
+    size_mb = sparse_vocab_path().stat().st_size / (1024 * 1024)
+    print(f"✅ 저장: {sparse_vocab_path()} (청크 {encoder.num_docs:,}개, 토큰 {len(encoder.tokens):,}개, "
+          f"평균 길이 {encoder.avgdl:.0f}, {size_mb:.1f}MB)")
+    return encoder
+
+
+def backfill(encoder: SparseEncoder, store: ChunkStore, index_name: str, namespace: str):
+    """기존 벡터에 sparse_values 추가 (밀집 벡터/메타데이터는 그대로 다시 upsert)"""
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    metric = index_metric(pc, index_name)
+    if metric != "dotproduct":
+        print(f"❌ {index_name} 인덱스 metric이 dotproduct가 아님({metric}) → 희소 벡터를 저장할 수 없어 백필 중단")
+        return
+    index = pc.Index(index_name)
+    print(f"🧬 희소 벡터 백필: index={index_name}, namespace='{namespace}'")
+
+    totals = {"vectors": 0, "updated": 0, "missing_text": 0, "empty": 0}
+    for page in index.list(namespace=namespace, limit=100):
+        ids = page_ids(page)
+        response = index.fetch(ids=ids, namespace=namespace)
+        stored = store.get_many(ids)
+
+        upserts = []
+        for vector_id, vector in response.vectors.items():
+            totals["vectors"] += 1
+            metadata = dict(vector.metadata or {})
+            # 슬림 메타데이터면 저장소에서, 마이그레이션 전이면 메타데이터에서 본문 조회
+            text = stored.get(vector_id, {}).get("text") or metadata.get("text")
+            if not text:
+                totals["missing_text"] += 1
+                continue
+
+            sparse = encoder.encode_document(text)
+            if not sparse["indices"]:
+                totals["empty"] += 1
+                continue
+            upserts.append({"id": vector_id, "values": list(vector.values), "sparse_values": sparse, "metadata": metadata})
+
+        if upserts:
+            index.upsert(vectors=upserts, namespace=namespace)
+            totals["updated"] += len(upserts)
+
+        print(f"  📦 {totals['vectors']:,}개 처리 (업데이트 {totals['updated']:,}, 본문 없음 {totals['missing_text']:,}, "
+              f"빈 희소 벡터 {totals['empty']:,})")
+        sys.stdout.flush()
+
+    print(f"\n✅ 백필 완료: {totals}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 어휘 생성 및 희소 벡터 백필")
+    parser.add_argument("--index", default=os.getenv("PINECONE_INDEX_NAME", "medical-guidelines"))
+    parser.add_argument("--namespace", default="")
+    parser.add_argument("--backfill", action="store_true", help="어휘 생성 후 기존 벡터에 희소 벡터 추가")
+    parser.add_argument("--reuse-vocab", action="store_true", help="어휘를 새로 만들지 않고 기존 파일 사용")
+    args = parser.parse_args()
+
+    store = ChunkStore(chunk_store_path(), readonly=True)
+    encoder = load_sparse_encoder() if args.reuse_vocab else None
+    if encoder is None:
+        encoder = build_vocab(store)
+
+    if args.backfill:
+        backfill(encoder, store, args.index, args.namespace)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
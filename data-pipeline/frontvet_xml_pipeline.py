@@ -12,6 +12,7 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from pinecone import Pinecone
 import json
+import sys
 
 load_dotenv()
 
@@ -20,6 +21,41 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 index = pc.Index("medical-guidelines")
 
+# 로컬 청크 저장소 (청크 본문/문서 메타데이터는 저장소에, Pinecone에는 ID와 필터용 필드만)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import ChunkStore, chunk_store_path, index_metadata, slim_metadata  # noqa: E402
+
+# 벡터 저장 대상: pinecone | local | both (local = 백엔드 로컬 IVF 인덱스, VECTOR_BACKEND=local로 서빙)
+from local_index import LocalIndex, local_index_path  # noqa: E402
+
+VECTOR_TARGETS = os.getenv("VECTOR_TARGETS", "pinecone")
+
+# 청크 저장소/로컬 인덱스는 실행할 때만 열기 (import만으로 backend/data에 파일이 생기지 않도록)
+chunk_store = None
+local_index = None
+
+
+def open_local_stores():
+    """청크 저장소와 (VECTOR_TARGETS가 local/both면) 로컬 인덱스 열기"""
+    global chunk_store, local_index
+    chunk_store = ChunkStore(chunk_store_path())
+    if VECTOR_TARGETS in ("local", "both"):
+        local_index = LocalIndex(local_index_path())
+
+# BM25 희소 벡터 (어휘 파일이 있을 때만, build_sparse_vocab.py로 생성 → 하이브리드 검색용)
+# Pinecone 인덱스가 dotproduct일 때만 (cosine 인덱스는 sparse_values upsert를 거부)
+from sparse_encoder import index_metric, load_sparse_encoder  # noqa: E402
+
+sparse_encoder = None
+if VECTOR_TARGETS != "local":
+    sparse_encoder = load_sparse_encoder()
+    if sparse_encoder is not None and index_metric(pc, "medical-guidelines") != "dotproduct":
+        print("⚠️  medical-guidelines 인덱스가 dotproduct가 아님 → 희소 벡터 없이 저장")
+        sparse_encoder = None
+
+# 논문 문서 벡터 (제목 + 초록 → documents 네임스페이스, 백엔드 계층 검색 1단계용)
+from hierarchical import DOCUMENTS_NAMESPACE, document_vector_id, document_vector_text  # noqa: E402
+
 
 def extract_text_from_element(element):
     """XML 요소에서 모든 텍스트 추출"""
@@ -135,11 +171,16 @@ def extract_metadata_from_xml(xml_path: Path) -> Dict:
                 if day_text:
                     year += f" {day_text}"
 
+        # Abstract
+        abstract_elem = article_meta.find('.//abstract')
+        abstract = extract_text_from_element(abstract_elem) if abstract_elem is not None else ""
+
         return {
             "pmcid": pmcid,
             "pmid": pmid,
             "doi": doi,
             "title": title,
+            "abstract": abstract,
             "authors": authors,
             "journal": journal_title if journal_title else "Front Vet Sci",
             "year": year,
@@ -231,6 +272,20 @@ def create_embeddings(texts: List[str]) -> List[List[float]]:
     return embeddings
 
 
+def upsert_document_vector(metadata: Dict, embedding: List[float]):
+    """논문 문서 벡터 저장 (청크와 같은 필터용 필드, ID는 doc_<PMCID>)"""
+    vector = {
+        "id": document_vector_id(metadata["pmcid"]),
+        "values": embedding,
+        "metadata": slim_metadata({"doc_type": "paper", "year": metadata.get("year", ""), "pmcid": metadata["pmcid"]})
+    }
+    if VECTOR_TARGETS != "local":
+        index.upsert(vectors=[vector], namespace=DOCUMENTS_NAMESPACE)
+    if local_index is not None:
+        local_index.upsert([vector], namespace=DOCUMENTS_NAMESPACE)
+    print(f"  📚 문서 벡터 저장: {vector['id']}")
+
+
 def process_single_xml(xml_path: Path) -> int:
     """단일 XML 파일 처리"""
     print(f"\n{'='*60}")
@@ -279,12 +334,17 @@ def process_single_xml(xml_path: Path) -> int:
 
     # 임베딩 생성
     print(f"\n  ⚙️  임베딩 생성 중...")
-    embeddings = create_embeddings(chunks)
+    # 논문 문서 벡터(제목 + 초록)도 같은 배치 호출로 임베딩
+    document_text = document_vector_text(metadata['title'], metadata['abstract'])
+    has_document_vector = bool(metadata['pmcid'] and document_text)
+    embeddings = create_embeddings(chunks + ([document_text] if has_document_vector else []))
+    document_embedding = embeddings.pop() if has_document_vector else None
     print(f"  📊 임베딩 생성 완료: {len(embeddings)}개")
 
     # Pinecone에 저장
     print(f"  ⚙️  Pinecone에 저장 중...")
     vectors = []
+    store_rows = []
     pmcid = metadata['pmcid']
 
     for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
@@ -305,19 +365,33 @@ def process_single_xml(xml_path: Path) -> int:
             "filename": metadata['filename']
         }
 
+        store_rows.append({"id": vector_id, **vector_metadata})
         vectors.append({
             "id": vector_id,
             "values": embedding,
-            "metadata": vector_metadata
+            "metadata": index_metadata(vector_metadata)
         })
+        if sparse_encoder is not None:
+            sparse = sparse_encoder.encode_document(chunk)
+            if sparse["indices"]:
+                vectors[-1]["sparse_values"] = sparse
+
+    # 저장소 먼저 기록 → 본문 없는 벡터가 검색되는 일이 없도록
+    chunk_store.put_many(store_rows)
 
     # 배치로 업로드
     batch_size = 100
     for i in range(0, len(vectors), batch_size):
         batch = vectors[i:i + batch_size]
-        index.upsert(vectors=batch)
+        if VECTOR_TARGETS != "local":
+            index.upsert(vectors=batch)
+        if local_index is not None:
+            local_index.upsert(batch)
         print(f"  💾 Pinecone 저장: {i+1}-{min(i+batch_size, len(vectors))}/{len(vectors)}")
 
+    if document_embedding is not None:
+        upsert_document_vector(metadata, document_embedding)
+
     print(f"  ✅ 완료! {len(chunks)}개 청크 저장")
 
     return len(chunks)
@@ -359,8 +433,10 @@ def process_all_xmls(xml_dir: Path, start_from: int = 0):
                 processed_count += 1
                 processed_files.add(xml_path.name)
 
-                # 진행상황 저장 (10개마다)
+                # 진행상황 저장 (10개마다, 로컬 인덱스도 함께)
                 if processed_count % 10 == 0:
+                    if local_index is not None:
+                        local_index.save()
                     with open(progress_file, 'w') as f:
                         json.dump({
                             'processed_files': list(processed_files),
@@ -383,7 +459,10 @@ def process_all_xmls(xml_dir: Path, start_from: int = 0):
             print(f"실패: {failed_count}개")
             print(f"{'='*60}\n")
 
-    # 최종 진행상황 저장
+    # 최종 진행상황 저장 (로컬 인덱스는 추가된 벡터만 새 세그먼트로 저장, 재학습은 rebuild_local_index.py)
+    if local_index is not None:
+        local_index.save()
+        print("💡 로컬 인덱스 중심점 재학습/세그먼트 병합: python rebuild_local_index.py")
     with open(progress_file, 'w') as f:
         json.dump({
             'processed_files': list(processed_files),
@@ -401,5 +480,6 @@ def process_all_xmls(xml_dir: Path, start_from: int = 0):
 
 
 if __name__ == "__main__":
+    open_local_stores()
     xml_dir = Path("guidelines/xml_frontvet")
     process_all_xmls(xml_dir, start_from=0)
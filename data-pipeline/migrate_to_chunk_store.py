@@ -0,0 +1,113 @@
+"""
+기존 Pinecone 인덱스 → 로컬 청크 저장소 마이그레이션
+1. 인덱스의 모든 벡터 ID를 나열하고 100개씩 fetch
+2. 전체 메타데이터(본문, 저자, reference_format 등)를 청크 저장소(SQLite)에 기록
+3. --slim: 같은 벡터를 필터용 필드만 남긴 슬림 메타데이터로 다시 upsert (희소 벡터는 그대로 유지)
+
+사용법:
+  python migrate_to_chunk_store.py [--index medical-guidelines] [--namespace ""] [--slim] [--dry-run]
+  (백엔드 배포 전에 저장소 파일(CHUNK_STORE_PATH)을 먼저 만들고, 그 다음에 --slim 실행)
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pinecone import Pinecone
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import ChunkStore, chunk_store_path, slim_metadata  # noqa: E402
+
+load_dotenv()
+
+
+def page_ids(page) -> list:
+    """index.list() 페이지에서 ID 목록 추출 (SDK 버전에 따라 문자열 리스트 또는 ListResponse)"""
+    items = page.vectors if hasattr(page, "vectors") else page
+    return [getattr(item, "id", item) for item in items]
+
+
+def sparse_values(vector):
+    """fetch 결과의 희소 벡터 (SDK 버전에 따라 SparseValues 객체 또는 dict, 없으면 None)"""
+    sparse = getattr(vector, "sparse_values", None)
+    if sparse is None:
+        return None
+    if isinstance(sparse, dict):
+        indices, values = sparse.get("indices"), sparse.get("values")
+    else:
+        indices, values = getattr(sparse, "indices", None), getattr(sparse, "values", None)
+    return {"indices": list(indices), "values": list(values)} if indices else None
+
+
+def metadata_bytes(metadata: dict) -> int:
+    return len(json.dumps(metadata, ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pinecone 메타데이터를 로컬 청크 저장소로 이전")
+    parser.add_argument("--index", default=os.getenv("PINECONE_INDEX_NAME", "medical-guidelines"))
+    parser.add_argument("--namespace", default="")
+    parser.add_argument("--slim", action="store_true", help="저장 후 Pinecone 메타데이터를 슬림 메타데이터로 교체")
+    parser.add_argument("--dry-run", action="store_true", help="저장/업데이트 없이 크기만 계산")
+    args = parser.parse_args()
+
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(args.index)
+    store = None if args.dry_run else ChunkStore(chunk_store_path())
+
+    print(f"🚚 마이그레이션 시작: index={args.index}, namespace='{args.namespace}', "
+          f"store={chunk_store_path()}, slim={args.slim}, dry_run={args.dry_run}")
+
+    totals = {"vectors": 0, "stored": 0, "already_slim": 0, "slimmed": 0, "bytes_before": 0, "bytes_after": 0}
+
+    for page in index.list(namespace=args.namespace, limit=100):
+        ids = page_ids(page)
+        response = index.fetch(ids=ids, namespace=args.namespace)
+
+        rows = []
+        upserts = []
+        for vector_id, vector in response.vectors.items():
+            metadata = dict(vector.metadata or {})
+            totals["vectors"] += 1
+            totals["bytes_before"] += metadata_bytes(metadata)
+
+            if "text" not in metadata:
+                # 이미 슬림 메타데이터 (이전 실행 또는 새 수집 스크립트)
+                totals["already_slim"] += 1
+                totals["bytes_after"] += metadata_bytes(metadata)
+                continue
+
+            slim = slim_metadata(metadata)
+            totals["bytes_after"] += metadata_bytes(slim)
+            rows.append({"id": vector_id, **metadata})
+            upsert = {"id": vector_id, "values": list(vector.values), "metadata": slim}
+            # upsert는 벡터 전체를 교체 → BM25 희소 벡터(build_sparse_vocab.py --backfill)도 함께 유지
+            sparse = sparse_values(vector)
+            if sparse is not None:
+                upsert["sparse_values"] = sparse
+            upserts.append(upsert)
+
+        if not args.dry_run and rows:
+            store.put_many(rows)
+            totals["stored"] += len(rows)
+            if args.slim:
+                # upsert는 메타데이터 전체를 교체 (update의 set_metadata는 필드를 지우지 못함)
+                index.upsert(vectors=upserts, namespace=args.namespace)
+                totals["slimmed"] += len(upserts)
+
+        print(f"  📦 {totals['vectors']:,}개 처리 (저장 {totals['stored']:,}, 슬림 교체 {totals['slimmed']:,}, "
+              f"이미 슬림 {totals['already_slim']:,})")
+        sys.stdout.flush()
+
+    print(f"\n✅ 완료: 벡터 {totals['vectors']:,}개")
+    print(f"   메타데이터 크기: {totals['bytes_before'] / 1024 / 1024:.1f}MB → {totals['bytes_after'] / 1024 / 1024:.1f}MB")
+    if store is not None:
+        print(f"   청크 저장소: {store.stats()}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+코퍼스에서 수의학 약어/상품명 사전 추출 → backend/vet_terms.json의 "mined" 항목 갱신
+1. 청크 저장소의 모든 청크를 한 번 훑어 두 가지 패턴 수집
+   - 약어 정의: "chronic kidney disease (CKD)" (약어 글자가 앞 단어 머리글자와 일치하는 경우만)
+   - 일반명(상품명): "carprofen (Rimadyl®)"
+2. 약어마다 가장 많이 나온 원어가 --min-count 이상, 전체 정의 중 --min-share 이상이면 채택
+3. curated에 이미 있는 용어, excluded의 모호한 약어(DM 등)는 건너뜀 (curated는 직접 관리, mined만 덮어씀)
+
+사용법:
+  python mine_vet_terms.py [--min-count 5] [--min-share 0.6] [--dry-run]
+"""
+
+import re
+import sys
+import json
+import argparse
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import ChunkStore, chunk_store_path  # noqa: E402
+from term_expansion import TermExpander, vet_terms_path  # noqa: E402
+
+# "long form words (ABBR)" - 원어는 최대 8단어
+DEFINITION_PATTERN = re.compile(r"((?:[A-Za-z][\w\-']*\s+){0,7}[A-Za-z][\w\-']*)\s+\(([A-Z][A-Za-z0-9\-]{1,9})\)")
+# "generic (Brand®" 또는 "generic (Brand™"
+BRAND_PATTERN = re.compile(r"\b([a-z][a-z\-]{4,})\s+\(([A-Z][A-Za-z\-]{2,})\s*[®™]")
+
+STOP_LEADING = {"the", "a", "an", "of", "and", "or", "in", "with", "for", "to", "as", "by", "on", "was", "were", "is"}
+
+
+def match_long_form(words: list, abbreviation: str):
+    """
+    약어 글자와 머리글자가 맞는 가장 짧은 원어 (Schwartz-Hearst 방식 단순화)
+    하이픈 단어는 부분마다 머리글자 인정 (immune-mediated hemolytic anemia → IMHA)
+    """
+    letters = [c.lower() for c in abbreviation if c.isalpha()]
+    for start in range(len(words) - 1, -1, -1):
+        candidate = words[start:]
+        if candidate[0].lower() in STOP_LEADING:
+            continue
+        initials = [part[0].lower() for word in candidate for part in word.split("-") if part]
+        content = [i for word, i in zip(candidate, initials) if word.lower() not in STOP_LEADING]
+        if initials == letters or content == letters:
+            return " ".join(candidate)
+        if len(initials) > len(letters) + 2:
+            break
+    return None
+
+
+def mine(store: ChunkStore):
+    definitions = defaultdict(Counter)
+    brands = defaultdict(Counter)
+    chunks = 0
+
+    for _, text in store.iter_texts():
+        chunks += 1
+        for long_words, abbreviation in DEFINITION_PATTERN.findall(text):
+            long_form = match_long_form(long_words.split(), abbreviation)
+            if long_form:
+                definitions[abbreviation][long_form.lower()] += 1
+        for generic, brand in BRAND_PATTERN.findall(text):
+            brands[brand][generic.lower()] += 1
+
+        if chunks % 100000 == 0:
+            print(f"  📖 {chunks:,}개 청크 (약어 {len(definitions):,}, 상품명 {len(brands):,})")
+            sys.stdout.flush()
+
+    return definitions, brands, chunks
+
+
+def select(candidates, min_count: int, min_share: float, known: TermExpander, excluded=()):
+    """가장 많이 나온 원어가 기준을 넘는 항목 → [[원어, 약어/상품명]] (excluded 약어는 제외)"""
+    groups = []
+    for short, long_forms in sorted(candidates.items()):
+        if short in excluded:
+            continue
+        long_form, count = long_forms.most_common(1)[0]
+        if count < min_count or count / sum(long_forms.values()) < min_share:
+            continue
+        if known.normalize(short) in known.group_of or known.normalize(long_form) in known.group_of:
+            continue
+        groups.append([long_form, short])
+    return groups
+
+
+def format_terms(data: dict) -> str:
+    """사전 JSON (그룹당 한 줄, curated 항목 diff가 깔끔하도록)"""
+    def group_list(groups):
+        if not groups:
+            return "[]"
+        return "[\n" + ",\n".join("    " + json.dumps(group, ensure_ascii=False) for group in groups) + "\n  ]"
+
+    return (
+        "{\n"
+        f'  "description": {json.dumps(data.get("description", ""), ensure_ascii=False)},\n'
+        f'  "excluded": {json.dumps(data.get("excluded", []), ensure_ascii=False)},\n'
+        f'  "curated": {group_list(data.get("curated", []))},\n'
+        f'  "mined": {group_list(data.get("mined", []))}\n'
+        "}\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="코퍼스에서 약어/상품명 사전 추출")
+    parser.add_argument("--min-count", type=int, default=5)
+    parser.add_argument("--min-share", type=float, default=0.6)
+    parser.add_argument("--dry-run", action="store_true", help="사전 파일을 쓰지 않고 결과만 출력")
+    args = parser.parse_args()
+
+    path = vet_terms_path()
+    data = json.loads(path.read_text(encoding="utf-8"))
+    curated = TermExpander(data.get("curated", []))
+
+    store = ChunkStore(chunk_store_path(), readonly=True)
+    print(f"⛏️  용어 추출: {store.path}")
+    definitions, brands, chunks = mine(store)
+    store.close()
+
+    excluded = set(data.get("excluded", []))
+    mined = select(definitions, args.min_count, args.min_share, curated, excluded)
+    mined += select(brands, args.min_count, args.min_share, TermExpander(data.get("curated", []) + mined), excluded)
+
+    print(f"\n✅ 청크 {chunks:,}개 → 약어 후보 {len(definitions):,}개, 상품명 후보 {len(brands):,}개 → 채택 {len(mined):,}개")
+    for group in mined[:30]:
+        print(f"   {group[1]:<12} → {group[0]}")
+
+    if not args.dry_run:
+        data["mined"] = mined
+        path.write_text(format_terms(data), encoding="utf-8")
+        print(f"💾 저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,41 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 index = pc.Index("medical-guidelines")
 
+# 로컬 청크 저장소 (청크 본문/문서 메타데이터는 저장소에, Pinecone에는 ID와 필터용 필드만)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from chunk_store import ChunkStore, chunk_store_path, index_metadata, slim_metadata  # noqa: E402
+
+# 벡터 저장 대상: pinecone | local | both (local = 백엔드 로컬 IVF 인덱스, VECTOR_BACKEND=local로 서빙)
+from local_index import LocalIndex, local_index_path  # noqa: E402
+
+VECTOR_TARGETS = os.getenv("VECTOR_TARGETS", "pinecone")
+
+# 청크 저장소/로컬 인덱스는 실행할 때만 열기 (import만으로 backend/data에 파일이 생기지 않도록)
+chunk_store = None
+local_index = None
+
+
+def open_local_stores():
+    """청크 저장소와 (VECTOR_TARGETS가 local/both면) 로컬 인덱스 열기"""
+    global chunk_store, local_index
+    chunk_store = ChunkStore(chunk_store_path())
+    if VECTOR_TARGETS in ("local", "both"):
+        local_index = LocalIndex(local_index_path())
+
+# BM25 희소 벡터 (어휘 파일이 있을 때만, build_sparse_vocab.py로 생성 → 하이브리드 검색용)
+# Pinecone 인덱스가 dotproduct일 때만 (cosine 인덱스는 sparse_values upsert를 거부)
+from sparse_encoder import index_metric, load_sparse_encoder  # noqa: E402
+
+sparse_encoder = None
+if VECTOR_TARGETS != "local":
+    sparse_encoder = load_sparse_encoder()
+    if sparse_encoder is not None and index_metric(pc, "medical-guidelines") != "dotproduct":
+        print("⚠️  medical-guidelines 인덱스가 dotproduct가 아님 → 희소 벡터 없이 저장")
+        sparse_encoder = None
+
+# 논문 문서 벡터 (제목 + 초록 → documents 네임스페이스, 백엔드 계층 검색 1단계용)
+from hierarchical import DOCUMENTS_NAMESPACE, document_vector_id, document_vector_text  # noqa: E402
+
 # 진행 상황 파일
 PROGRESS_FILE = Path("/Users/ksinfosys/medical/data-pipeline/frontvet_processing_progress.json")
 
@@ -43,7 +78,9 @@ def load_progress():
 
 
 def save_progress(progress):
-    """진행 상황 저장"""
+    """진행 상황 저장 (로컬 인덱스를 쓰는 경우 이번에 추가된 벡터만 새 세그먼트로 저장)"""
+    if local_index is not None:
+        local_index.save()
     with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
         json.dump(progress, f, indent=2, ensure_ascii=False)
     print(f"\n  💾 진행 상황 저장됨: {progress['total_processed']}개 파일, {progress['total_chunks']}개 청크")
@@ -277,7 +314,7 @@ def create_embeddings(texts: List[str], batch_size: int = 100) -> List[List[floa
 
 
 def upsert_to_pinecone(chunks_metadata: List[Dict], embeddings: List[List[float]], batch_size: int = 100):
-    """Pinecone에 벡터 저장 (PDF 파이프라인과 동일)"""
+    """Pinecone에 벡터 저장 (전체 메타데이터는 로컬 청크 저장소에도 기록, SLIM_METADATA=true면 Pinecone에는 슬림 메타데이터)"""
 
     total = len(chunks_metadata)
 
@@ -286,6 +323,7 @@ def upsert_to_pinecone(chunks_metadata: List[Dict], embeddings: List[List[float]
         batch_emb = embeddings[i:i + batch_size]
 
         vectors = []
+        store_rows = []
         for chunk_meta, embedding in zip(batch_meta, batch_emb):
             metadata = {
                 "doc_type": "paper",  # XML은 모두 논문
@@ -301,16 +339,40 @@ def upsert_to_pinecone(chunks_metadata: List[Dict], embeddings: List[List[float]
                 "pmid": chunk_meta.get("pmid", "")
             }
 
+            store_rows.append({"id": chunk_meta["id"], **metadata})
             vectors.append({
                 "id": chunk_meta["id"],
                 "values": embedding,
-                "metadata": metadata
+                "metadata": index_metadata(metadata)
             })
-
-        index.upsert(vectors=vectors)
+            if sparse_encoder is not None:
+                sparse = sparse_encoder.encode_document(chunk_meta["text"])
+                if sparse["indices"]:
+                    vectors[-1]["sparse_values"] = sparse
+
+        # 저장소 먼저 기록 → 본문 없는 벡터가 검색되는 일이 없도록
+        chunk_store.put_many(store_rows)
+        if VECTOR_TARGETS != "local":
+            index.upsert(vectors=vectors)
+        if local_index is not None:
+            local_index.upsert(vectors)
         print(f"  💾 Pinecone 저장: {i+1}-{i+len(batch_meta)}/{total}")
 
 
+def upsert_document_vector(metadata: Dict, embedding: List[float]):
+    """논문 문서 벡터 저장 (청크와 같은 필터용 필드, ID는 doc_<PMCID>)"""
+    vector = {
+        "id": document_vector_id(metadata["pmcid"]),
+        "values": embedding,
+        "metadata": slim_metadata({"doc_type": "paper", "year": metadata.get("year", ""), "pmcid": metadata["pmcid"]})
+    }
+    if VECTOR_TARGETS != "local":
+        index.upsert(vectors=[vector], namespace=DOCUMENTS_NAMESPACE)
+    if local_index is not None:
+        local_index.upsert([vector], namespace=DOCUMENTS_NAMESPACE)
+    print(f"  📚 문서 벡터 저장: {vector['id']}")
+
+
 # ============================================================
 # Step 5: 메인 파이프라인
 # ============================================================
@@ -403,12 +465,18 @@ def process_single_xml(xml_path: Path) -> Dict:
         print(f"\n  ⚙️  임베딩 생성 중...")
         sys.stdout.flush()
         chunk_texts = [c["text"] for c in all_chunks_metadata]
-        embeddings = create_embeddings(chunk_texts)
+        # 논문 문서 벡터(제목 + 초록)도 같은 배치 호출로 임베딩
+        document_text = document_vector_text(metadata.get("title", ""), metadata.get("abstract", ""))
+        has_document_vector = bool(metadata.get("pmcid") and document_text)
+        embeddings = create_embeddings(chunk_texts + ([document_text] if has_document_vector else []))
+        document_embedding = embeddings.pop() if has_document_vector else None
 
         # Pinecone에 저장
         print(f"\n  ⚙️  Pinecone에 저장 중...")
         sys.stdout.flush()
         upsert_to_pinecone(all_chunks_metadata, embeddings)
+        if document_embedding is not None:
+            upsert_document_vector(metadata, document_embedding)
 
         print(f"\n  ✅ 완료!")
         sys.stdout.flush()
@@ -435,6 +503,7 @@ def process_single_xml(xml_path: Path) -> Dict:
 # ============================================================
 
 if __name__ == "__main__":
+    open_local_stores()
     xml_folder = Path("/Users/ksinfosys/medical/data-pipeline/guidelines/xml_frontvet")
 
     # 진행 상황 로드
@@ -490,3 +559,6 @@ if __name__ == "__main__":
     print(f"✅ 총 처리된 파일: {progress['total_processed']}개")
     print(f"📦 총 생성된 청크: {progress['total_chunks']:,}개")
     print(f"{'='*60}\n")
+
+    if local_index is not None:
+        print("💡 로컬 인덱스 중심점 재학습/세그먼트 병합: python rebuild_local_index.py")
@@ -0,0 +1,44 @@
+"""
+로컬 벡터 인덱스 재구성 (VECTOR_BACKEND=local)
+수집 스크립트는 새 벡터를 처음 학습한 IVF 중심점에 배정해 세그먼트로 추가만 함
+→ 수집이 끝나면 이 스크립트로 전체 벡터에서 중심점을 다시 학습하고 세그먼트를 하나로 병합
+(새 세그먼트를 다 쓴 뒤 manifest.json을 원자적으로 교체하므로 실행 중인 백엔드는 재시작 시 새 인덱스 사용)
+
+사용법:
+  python rebuild_local_index.py [--nlist 1024] [--namespace ""] [--namespace documents]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from local_index import LocalIndex, local_index_path  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 벡터 인덱스 IVF 재학습 + 세그먼트 병합")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF 리스트 수 (기본값: √벡터 수)")
+    parser.add_argument("--namespace", action="append", default=None, help="대상 네임스페이스 (기본값: 전체)")
+    parser.add_argument("--dtype", choices=("float32", "int8"), default="float32")
+    parser.add_argument("--store-float32", action="store_true", help="int8 인덱스에도 float32 원본 저장")
+    args = parser.parse_args()
+
+    path = local_index_path()
+    index = LocalIndex(path, dtype=args.dtype, store_float32=args.store_float32 or None)
+    before = {name: (len(data), len(data.segments), len(data.centroids)) for name, data in index._namespaces.items()}
+    print(f"🏗️  로컬 인덱스 재구성: {path}")
+    for name, (count, segments, nlist) in before.items():
+        print(f"   {name}: 벡터 {count:,}개, 세그먼트 {segments}개, nlist={nlist}")
+
+    start = time.perf_counter()
+    index.rebuild(nlist=args.nlist, namespaces=args.namespace)
+
+    print(f"\n✅ 완료 ({time.perf_counter() - start:.1f}s)")
+    for name, data in index._namespaces.items():
+        print(f"   {name}: 벡터 {len(data):,}개, 세그먼트 {len(data.segments)}개, nlist={len(data.centroids)} ({data.dtype})")
+
+
+if __name__ == "__main__":
+    main()